@@ -0,0 +1,339 @@
+"""
+ASGI middleware for request metrics and body compression.
+
+Implemented as plain ASGI (not `BaseHTTPMiddleware`) so it adds no extra task
+or body buffering per request.
+"""
+import time
+import zlib
+from typing import Optional
+
+from config import COMPRESSION_MIN_SIZE, MAX_DECODED_REQUEST_BYTES
+from utils.metrics import (
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_BYTES,
+    HTTP_RESPONSE_BYTES,
+    HTTP_COMPRESSION_BYTES,
+    DB_QUERIES,
+    DB_QUERY_TIME,
+    DB_SESSION_TIME,
+    begin_request,
+    end_request,
+)
+
+UNMATCHED_ROUTE = "unmatched"  # Keeps label cardinality bounded for 404 scans
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that served `scope`, e.g. /api/episodes/{episode_id}.
+
+    Rebuilt from the matched path parameters (set on the scope by the router)
+    so it includes router prefixes regardless of how routers are nested.
+    """
+    if "endpoint" not in scope:
+        return UNMATCHED_ROUTE
+    params = list(scope.get("path_params", {}).items())
+    if not params:
+        return scope["path"]
+
+    segments = scope["path"].split("/")
+    # Parameters appear in the path in declaration order; match from the end
+    # so static prefixes that happen to equal a value are left alone
+    for i in range(len(segments) - 1, -1, -1):
+        if params and segments[i] == str(params[-1][1]):
+            segments[i] = "{" + params.pop()[0] + "}"
+    return "/".join(segments)
+
+
+class MetricsMiddleware:
+    """Records per-route request counts, latency and DB usage"""
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+        stats, token = begin_request()
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            end_request(token)
+
+            method = scope["method"]
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            if request_bytes:
+                HTTP_REQUEST_BYTES.observe(request_bytes, method=method, route=route)
+            HTTP_RESPONSE_BYTES.observe(response_bytes, method=method, route=route)
+            if stats.queries or stats.session_seconds:
+                DB_QUERIES.observe(stats.queries, route=route)
+                DB_QUERY_TIME.observe(stats.query_seconds, route=route)
+                DB_SESSION_TIME.observe(stats.session_seconds, route=route)
+
+
+# ==================== Compression ====================
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoding
+    zstandard = None
+
+GZIP_LEVEL = 5  # Close to level 9's ratio on float-heavy JSON at a fraction of the CPU
+ZSTD_LEVEL = 3
+COMPRESSIBLE_TYPES = ("application/json", "application/msgpack", "application/x-msgpack", "text/")
+
+
+def supported_encodings():
+    """Content codings this server can decode and produce, most preferred first"""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported coding allowed by an Accept-Encoding header (None = identity)"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _compressor(encoding: str):
+    """Streaming compressor with compress()/flush() for `encoding`"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+
+def decode_body(encoding: str, body: bytes, max_size: int) -> bytes:
+    """
+    Decompress a request body. Raises ValueError for unsupported or corrupt
+    input and OverflowError past `max_size` bytes (guards against bombs).
+    """
+    if encoding == "gzip":
+        decoder = zlib.decompressobj(31)
+        decoded = decoder.decompress(body, max_size + 1)
+        if not decoder.eof:
+            if len(decoded) > max_size:
+                raise OverflowError
+            raise ValueError("truncated gzip body")
+    elif encoding == "zstd" and zstandard is not None:
+        # Read at most max_size + 1 bytes: the frame header's content size
+        # is client-controlled, so one-shot decompression could allocate it
+        chunks, size = [], 0
+        with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+            while size <= max_size:
+                chunk = reader.read(max_size + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        decoded = b"".join(chunks)
+    else:
+        raise ValueError(f"unsupported content encoding {encoding!r}")
+    if len(decoded) > max_size:
+        raise OverflowError
+    return decoded
+
+
+async def _plain_response(send, status_code: int, detail: str):
+    body = ('{"detail":"' + detail + '"}').encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """
+    gzip/zstd content encoding in both directions.
+
+    - Requests with `Content-Encoding: gzip|zstd` are decompressed before
+      routing (415 for other codings, 413 past `max_request_size` decoded
+      bytes, 400 for corrupt bodies).
+    - Responses are compressed with the best coding in `Accept-Encoding` when
+      the body is at least `minimum_size` bytes and of a compressible type,
+      so small inference responses skip the CPU cost. Streaming responses
+      are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, max_request_size: int = MAX_DECODED_REQUEST_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_request_size = max_request_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name: value for name, value in scope["headers"]}
+        content_encoding = headers.get(b"content-encoding", b"identity").decode("latin-1").strip().lower()
+        if content_encoding != "identity":
+            if content_encoding not in supported_encodings():
+                await _plain_response(send, 415, f"Unsupported Content-Encoding: {content_encoding}")
+                return
+            receive = await self._decoded_receive(scope, receive, content_encoding, send)
+            if receive is None:
+                return
+
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size))
+
+    async def _decoded_receive(self, scope, receive, encoding: str, send):
+        """Read + decompress the whole body; returns a replaying receive (None if rejected)"""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return None  # Client disconnected
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        try:
+            decoded = decode_body(encoding, body, self.max_request_size)
+        except OverflowError:
+            await _plain_response(send, 413, "Decompressed request body too large")
+            return None
+        except Exception:
+            await _plain_response(send, 400, f"Invalid {encoding} request body")
+            return None
+
+        HTTP_COMPRESSION_BYTES.inc(len(body), direction="request", encoding=encoding, stage="encoded")
+        HTTP_COMPRESSION_BYTES.inc(len(decoded), direction="request", encoding=encoding, stage="identity")
+
+        # The app sees a plain body (scope is mutated in place so outer
+        # middleware still see routing results)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(decoded)).encode())]
+
+        delivered = False
+
+        async def replay():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": decoded, "more_body": False}
+            return await receive()
+
+        return replay
+
+
+class _CompressingSender:
+    """`send` wrapper that compresses the response body when worthwhile"""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.raw_bytes = 0
+        self.encoded_bytes = 0
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = _compressor(self.encoding)
+            headers = [
+                (name, value) for name, value in self.start_message.get("headers", [])
+                if name not in (b"content-length", b"vary")
+            ]
+            vary = [value for name, value in self.start_message.get("headers", []) if name == b"vary"]
+            headers += [
+                (b"content-encoding", self.encoding.encode()),
+                (b"vary", b", ".join(vary + [b"Accept-Encoding"])),
+            ]
+            if not more_body:
+                compressed = self.compressor.compress(body) + self.compressor.flush()
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                await self.send({**self.start_message, "headers": headers})
+                await self._send_body(body, compressed, more_body=False)
+                return
+            await self.send({**self.start_message, "headers": headers})
+
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.flush()
+        await self._send_body(body, compressed, more_body)
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = {name: value for name, value in self.start_message.get("headers", [])}
+        if b"content-encoding" in headers or self.start_message["status"] in (204, 304):
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        # A streamed body's size is unknown up front; compress it
+        return more_body or len(body) >= self.minimum_size
+
+    async def _send_body(self, raw: bytes, compressed: bytes, more_body: bool):
+        self.raw_bytes += len(raw)
+        self.encoded_bytes += len(compressed)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+        if not more_body:
+            HTTP_COMPRESSION_BYTES.inc(self.raw_bytes, direction="response", encoding=self.encoding, stage="identity")
+            HTTP_COMPRESSION_BYTES.inc(self.encoded_bytes, direction="response", encoding=self.encoding, stage="encoded")
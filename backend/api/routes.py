@@ -1,12 +1,18 @@
 """
 FastAPI routes for the wrestling arena backend
 """
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import asyncio
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Optional
+import logging
 
-from database import get_db, Fighter, Episode, FightFrame, ModelCheckpoint, TrainingMetrics, FighterProfile, TrainingJob
+from config import INFERENCE_QUANTIZED, PROFILE_JOB_TTL_SECONDS, WEIGHT_SYNC_ENABLED
+from database import get_db, get_read_db, get_async_db, get_db_manager, Fighter, Episode, FightFrame, ModelCheckpoint, TrainingMetrics, FighterProfile, TrainingJob
 from api.schemas import (
     FighterCreateSchema,
     FighterSchema,
@@ -14,6 +20,8 @@ from api.schemas import (
     EpisodeSchema,
     EpisodeCompleteSchema,
     FightFrameCreateSchema,
+    FightFrameBulkCreateSchema,
+    FightFrameBulkResultSchema,
     FightFrameSchema,
     ModelCheckpointSchema,
     HealthCheckSchema,
@@ -21,14 +29,20 @@ from api.schemas import (
     FighterProfileSchema,
     TrainingJobCreateSchema,
     TrainingJobSchema,
+    ProfileRequestSchema,
 )
+from api.serialization import fast_response, rows_to_dicts, schema_columns
+from database.retention import get_retention_engine, read_archive
+from simulation.rewards import check_reward_weights
+from utils.profiling import PhaseTimer, get_profiler
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 # ==================== Health Check ====================
 @router.get("/health", response_model=HealthCheckSchema)
-def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_read_db)):
     """Health check endpoint"""
     try:
         # Test database connection
@@ -67,16 +81,19 @@ def create_fighter(fighter: FighterCreateSchema, db: Session = Depends(get_db)):
 
 
 @router.get("/fighters", response_model=List[FighterSchema])
-def list_fighters(db: Session = Depends(get_db)):
-    """List all fighters"""
-    fighters = db.query(Fighter).all()
+async def list_fighters(request: Request, fast: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """List all fighters (`?fast=true`: projected rows, orjson/msgpack)"""
+    if fast:
+        rows = (await db.execute(select(*schema_columns(Fighter, FighterSchema)))).all()
+        return fast_response(request, rows_to_dicts(rows, FighterSchema.model_fields))
+    fighters = (await db.scalars(select(Fighter))).all()
     return fighters
 
 
 @router.get("/fighters/{fighter_id}", response_model=FighterSchema)
-def get_fighter(fighter_id: int, db: Session = Depends(get_db)):
+async def get_fighter(fighter_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific fighter"""
-    fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
+    fighter = await db.get(Fighter, fighter_id)
     if not fighter:
         raise HTTPException(status_code=404, detail="Fighter not found")
     return fighter
@@ -106,9 +123,9 @@ def create_episode(episode: EpisodeCreateSchema, db: Session = Depends(get_db)):
 
 
 @router.get("/episodes/{episode_id}", response_model=EpisodeSchema)
-def get_episode(episode_id: int, db: Session = Depends(get_db)):
+async def get_episode(episode_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get episode details"""
-    episode = db.query(Episode).filter(Episode.id == episode_id).first()
+    episode = await db.get(Episode, episode_id)
     if not episode:
         raise HTTPException(status_code=404, detail="Episode not found")
     return episode
@@ -136,17 +153,48 @@ def complete_episode(
     return episode
 
 
+@router.put("/episodes/{episode_id}/flag", response_model=EpisodeSchema)
+def flag_episode(episode_id: int, db: Session = Depends(get_db)):
+    """Keep this episode's frames at full resolution (exempt from retention)"""
+    return _set_episode_flag(episode_id, True, db)
+
+
+@router.delete("/episodes/{episode_id}/flag", response_model=EpisodeSchema)
+def unflag_episode(episode_id: int, db: Session = Depends(get_db)):
+    """Make the episode subject to retention again"""
+    return _set_episode_flag(episode_id, False, db)
+
+
+def _set_episode_flag(episode_id: int, flagged: bool, db: Session) -> Episode:
+    episode = db.query(Episode).filter(Episode.id == episode_id).first()
+    if not episode:
+        raise HTTPException(status_code=404, detail="Episode not found")
+    if flagged and (episode.frames_downsampled or episode.archived_at):
+        logger.info(f"Episode {episode_id} flagged after retention already thinned its frames")
+    episode.is_flagged = flagged
+    db.commit()
+    db.refresh(episode)
+    return episode
+
+
 @router.get("/fighters/{fighter_id}/episodes", response_model=List[EpisodeSchema])
-def get_fighter_episodes(
+async def get_fighter_episodes(
+    request: Request,
     fighter_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    fast: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get episodes for a fighter with pagination"""
-    episodes = db.query(Episode).filter(
+    """Get episodes for a fighter with pagination (`?fast=true`: projected rows, orjson/msgpack)"""
+    query = select(*schema_columns(Episode, EpisodeSchema)) if fast else select(Episode)
+    query = query.where(
         Episode.fighter_id == fighter_id
-    ).order_by(Episode.id.desc()).offset(skip).limit(limit).all()
+    ).order_by(Episode.id.desc()).offset(skip).limit(limit)
+    if fast:
+        rows = (await db.execute(query)).all()
+        return fast_response(request, rows_to_dicts(rows, EpisodeSchema.model_fields))
+    episodes = (await db.scalars(query)).all()
     return episodes
 
 
@@ -177,50 +225,109 @@ def create_fight_frame(frame: FightFrameCreateSchema, db: Session = Depends(get_
     return new_frame
 
 
+@router.post(
+    "/fight-frames/bulk",
+    response_model=FightFrameBulkResultSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_fight_frames_bulk(data: FightFrameBulkCreateSchema, db: Session = Depends(get_db)):
+    """
+    Record many frames of one episode in one transaction (COPY on PostgreSQL).
+    Game servers should buffer frames and flush them here instead of posting
+    each frame to /fight-frames.
+    """
+    episode = db.query(Episode).filter(Episode.id == data.episode_id).first()
+    if not episode:
+        raise HTTPException(status_code=404, detail="Episode not found")
+
+    rows = [{"episode_id": data.episode_id, **frame.model_dump()} for frame in data.frames]
+    inserted = get_db_manager().bulk_insert_frames(db, rows)
+    db.commit()
+    return {"episode_id": data.episode_id, "inserted": inserted}
+
+
 @router.get("/episodes/{episode_id}/frames", response_model=List[FightFrameSchema])
-def get_episode_frames(
+async def get_episode_frames(
+    request: Request,
     episode_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    fast: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get frames for an episode with pagination"""
-    frames = db.query(FightFrame).filter(
+    """
+    Get frames for an episode with pagination (from the archive file once archived).
+    `?fast=true`: projected rows, orjson/msgpack.
+    """
+    query = select(*schema_columns(FightFrame, FightFrameSchema)) if fast else select(FightFrame)
+    query = query.where(
         FightFrame.episode_id == episode_id
-    ).order_by(FightFrame.frame_number.asc()).offset(skip).limit(limit).all()
-    return frames
+    ).order_by(FightFrame.frame_number.asc()).offset(skip).limit(limit)
+    if fast:
+        frames = rows_to_dicts((await db.execute(query)).all(), FightFrameSchema.model_fields)
+    else:
+        frames = (await db.scalars(query)).all()
+
+    if not frames:
+        episode = await db.get(Episode, episode_id)
+        if episode is not None and episode.archive_path:
+            archived = await asyncio.to_thread(read_archive, episode.archive_path)
+            frames = archived[skip:skip + limit]
+            if fast:
+                frames = [{name: frame[name] for name in FightFrameSchema.model_fields} for frame in frames]
+    return fast_response(request, frames) if fast else frames
 
 
 # ==================== Model Checkpoints ====================
 @router.get("/fighters/{fighter_id}/checkpoints", response_model=List[ModelCheckpointSchema])
-def get_fighter_checkpoints(fighter_id: int, db: Session = Depends(get_db)):
-    """Get all model checkpoints for a fighter"""
-    checkpoints = db.query(ModelCheckpoint).filter(
+async def get_fighter_checkpoints(
+    request: Request,
+    fighter_id: int,
+    fast: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get all model checkpoints for a fighter (`?fast=true`: projected rows, orjson/msgpack)"""
+    query = select(*schema_columns(ModelCheckpoint, ModelCheckpointSchema)) if fast else select(ModelCheckpoint)
+    query = query.where(
         ModelCheckpoint.fighter_id == fighter_id
-    ).order_by(ModelCheckpoint.model_version.desc()).all()
+    ).order_by(ModelCheckpoint.model_version.desc())
+    if fast:
+        rows = (await db.execute(query)).all()
+        return fast_response(request, rows_to_dicts(rows, ModelCheckpointSchema.model_fields))
+    checkpoints = (await db.scalars(query)).all()
     return checkpoints
 
 
 @router.get("/fighters/{fighter_id}/best-model", response_model=Optional[ModelCheckpointSchema])
-def get_best_model(fighter_id: int, db: Session = Depends(get_db)):
+async def get_best_model(fighter_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get the best performing model for a fighter"""
-    best = db.query(ModelCheckpoint).filter(
-        ModelCheckpoint.fighter_id == fighter_id
-    ).order_by(ModelCheckpoint.win_rate.desc(), ModelCheckpoint.model_version.desc()).first()
+    best = (await db.scalars(
+        select(ModelCheckpoint).where(
+            ModelCheckpoint.fighter_id == fighter_id
+        ).order_by(ModelCheckpoint.win_rate.desc(), ModelCheckpoint.model_version.desc()).limit(1)
+    )).first()
     return best
 
 
 # ==================== Statistics ====================
 @router.get("/fighters/{fighter_id}/stats")
-def get_fighter_stats(fighter_id: int, db: Session = Depends(get_db)):
+async def get_fighter_stats(fighter_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive statistics for a fighter"""
-    fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
+    fighter = await db.get(Fighter, fighter_id)
     if not fighter:
         raise HTTPException(status_code=404, detail="Fighter not found")
 
-    episodes = db.query(Episode).filter(Episode.fighter_id == fighter_id).all()
-
-    if not episodes:
+    # Aggregated in SQL: one row back instead of every episode
+    total_episodes, victories, avg_reward, avg_length = (await db.execute(
+        select(
+            func.count(Episode.id),
+            func.count(Episode.id).filter(Episode.is_victory.is_(True)),
+            func.avg(Episode.total_reward),
+            func.avg(Episode.duration_frames),
+        ).where(Episode.fighter_id == fighter_id)
+    )).one()
+
+    if not total_episodes:
         return {
             "fighter_id": fighter_id,
             "glb_filename": fighter.glb_filename,
@@ -230,25 +337,27 @@ def get_fighter_stats(fighter_id: int, db: Session = Depends(get_db)):
             "avg_episode_length": 0,
         }
 
-    total_episodes = len(episodes)
-    victories = len([e for e in episodes if e.is_victory])
-    win_rate = victories / total_episodes if total_episodes > 0 else 0.0
-    avg_reward = sum(e.total_reward for e in episodes) / total_episodes
-    avg_length = sum(e.duration_frames for e in episodes) / total_episodes
+    win_rate = victories / total_episodes
 
     return {
         "fighter_id": fighter_id,
         "glb_filename": fighter.glb_filename,
         "total_episodes": total_episodes,
         "win_rate": win_rate,
-        "avg_reward": avg_reward,
-        "avg_episode_length": int(avg_length),
+        "avg_reward": float(avg_reward or 0.0),
+        "avg_episode_length": int(avg_length or 0),
     }
 
 
 # ==================== Model Inference ====================
 @router.post("/fighters/{fighter_id}/inference")
-def run_model_inference(fighter_id: int, data: dict, db: Session = Depends(get_db)):
+def run_model_inference(fighter_id: int, data: dict, db: Session = Depends(get_read_db)):
+    """Run inference; captured by the profiler when "inference" profiling is armed"""
+    with get_profiler().maybe_profile("inference"):
+        return _run_model_inference(fighter_id, data, db)
+
+
+def _run_model_inference(fighter_id: int, data: dict, db: Session):
     """
     Run neural network inference on observations
     Used by game frontend for real-time AI decisions
@@ -256,12 +365,22 @@ def run_model_inference(fighter_id: int, data: dict, db: Session = Depends(get_d
     Supports both:
     - Default model: Best checkpoint for the fighter
     - Profile-specific model: Named personality profile model
+
+    Set "quantized": true to use the int8 variant of the model when available.
+
+    A policy pushed by a learner for the fighter profile (see
+    inference/weight_sync.py) is served instead of the registered checkpoint
+    while it is newer. "model_version" in the response is the registered
+    checkpoint's version and "pushed_version" the pushed policy's, if served.
     """
     # Check if profile name specified in request
     profile_name = data.get('profile_name', None)
 
     model_path = None
     model_info = None
+    model_version = None
+    # Only profiles that exist get their own weight sync channel
+    channel_profile = 'default'
 
     if profile_name and profile_name != 'default':
         # Try to load profile-specific model
@@ -271,7 +390,9 @@ def run_model_inference(fighter_id: int, data: dict, db: Session = Depends(get_d
         ).first()
 
         if profile:
+            channel_profile = profile.profile_name
             model_path = profile.model_path
+            model_version = profile.model_version
             model_info = f"{profile.profile_name} (Aggression: {profile.aggression})"
         else:
             # Profile not found, fall back to default
@@ -283,65 +404,69 @@ def run_model_inference(fighter_id: int, data: dict, db: Session = Depends(get_d
             ModelCheckpoint.fighter_id == fighter_id
         ).order_by(ModelCheckpoint.win_rate.desc()).first()
 
-        if not best_model:
-            # No trained models available - this is normal for new games
-            logger.debug(f"No trained model available for fighter {fighter_id}, using scripted AI")
-            raise HTTPException(status_code=404, detail="No trained model available")
+        if best_model:
+            model_path = best_model.weights_path
+            model_version = best_model.model_version
+            model_info = f"v{best_model.model_version}"
 
-        model_path = best_model.weights_path
-        model_info = f"v{best_model.model_version}"
+    published = None
+    if WEIGHT_SYNC_ENABLED:
+        from inference import get_weight_subscriber
 
-    try:
-        # Import trainer to use for inference
-        from rl.training import Trainer
-        from rl.agent import FighterPolicyNetwork
-        import torch
-        import os
-
-        # Load the trained model
-        if not os.path.exists(model_path):
-            # Model file doesn't exist - this is normal for new fighters
-            logger.debug(f"Model weights file not found: {model_path}, using scripted AI")
-            raise HTTPException(status_code=404, detail=f"Model weights file not found: {model_path}")
+        published = get_weight_subscriber().get(fighter_id, channel_profile)
+        if published is not None and not published.supersedes(model_path):
+            published = None
 
-        # Create agent and load weights
-        agent = FighterPolicyNetwork()
-        checkpoint = torch.load(model_path, map_location='cpu')
-        agent.load_state_dict(checkpoint['model_state_dict'])
-        agent.eval()  # Inference mode
+    if published is not None:
+        model_info = f"v{published.version} (pushed)"
+    elif not model_path:
+        # No trained models available - this is normal for new games
+        logger.debug(f"No trained model available for fighter {fighter_id}, using scripted AI")
+        raise HTTPException(status_code=404, detail="No trained model available")
 
-        # Get observation from request
-        observation = data.get('observation', [])
-        if not observation or len(observation) != 30:
-            raise HTTPException(status_code=400, detail="Invalid observation vector")
+    # Get observation from request
+    observation = data.get('observation', [])
+    if not observation or len(observation) != 30:
+        raise HTTPException(status_code=400, detail="Invalid observation vector")
 
-        # Convert to tensor
-        obs_tensor = torch.tensor(observation, dtype=torch.float32).unsqueeze(0)
+    try:
+        if published is not None:
+            # Already in memory; fetched once, so a concurrent swap can't change it mid-request
+            policy = published.policy
+        else:
+            # Lean serving runtime: loads the exported TorchScript artifact
+            from inference import get_policy_cache
 
-        # Run inference (no gradients)
-        with torch.no_grad():
-            logits, value = agent(obs_tensor)
+            policy_cache = get_policy_cache()
+            quantized = bool(data.get('quantized', INFERENCE_QUANTIZED))
+            policy = policy_cache.get(model_path, quantized=quantized)
+        if policy is None:
+            # Model file doesn't exist - this is normal for new fighters
+            logger.debug(f"Model weights file not found: {model_path}, using scripted AI")
+            raise HTTPException(status_code=404, detail=f"Model weights file not found: {model_path}")
 
-        # Get action probabilities
-        action_probs = torch.softmax(logits[0], dim=0).cpu().numpy().tolist()
+        # Run inference
+        action_probs, value = policy.evaluate(observation)
 
-        # Sample action from distribution
-        import numpy as np
-        action = int(np.argmax(action_probs))  # Greedy: take best action
+        # Greedy: take best action
+        action = int(action_probs.argmax())
 
         return {
             "action": action,
-            "action_probs": action_probs,
-            "value": float(value[0].item()),
+            "action_probs": action_probs.tolist(),
+            "value": value,
             "model_info": model_info,
+            "model_version": model_version,
+            "pushed_version": published.version if published is not None else None,
+            "weights_source": published.source if published is not None else "checkpoint",
+            "runtime": policy.backend,
         }
 
     except HTTPException:
         # Re-raise HTTP exceptions (404 for missing models, etc)
         raise
     except Exception as e:
-        import logging
-        logging.error(f"Inference failed: {str(e)}")
+        logger.error(f"Inference failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
 
 
@@ -374,6 +499,7 @@ def create_fighter_profile(profile: FighterProfileCreateSchema, db: Session = De
         risk_tolerance=profile.risk_tolerance,
         endurance=profile.endurance,
         model_path=profile.model_path,
+        reward_weights=profile.reward_weights,
     )
     db.add(new_profile)
     db.commit()
@@ -382,26 +508,30 @@ def create_fighter_profile(profile: FighterProfileCreateSchema, db: Session = De
 
 
 @router.get("/fighter-profiles/{fighter_id}", response_model=List[FighterProfileSchema])
-def get_fighter_profiles(fighter_id: int, db: Session = Depends(get_db)):
+async def get_fighter_profiles(fighter_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all personality profiles for a fighter"""
     # Verify fighter exists
-    fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
+    fighter = await db.get(Fighter, fighter_id)
     if not fighter:
         raise HTTPException(status_code=404, detail="Fighter not found")
 
-    profiles = db.query(FighterProfile).filter(
-        FighterProfile.fighter_id == fighter_id
-    ).order_by(FighterProfile.created_at.desc()).all()
+    profiles = (await db.scalars(
+        select(FighterProfile).where(
+            FighterProfile.fighter_id == fighter_id
+        ).order_by(FighterProfile.created_at.desc())
+    )).all()
     return profiles
 
 
 @router.get("/fighter-profiles/{fighter_id}/{profile_name}", response_model=FighterProfileSchema)
-def get_fighter_profile(fighter_id: int, profile_name: str, db: Session = Depends(get_db)):
+async def get_fighter_profile(fighter_id: int, profile_name: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific personality profile"""
-    profile = db.query(FighterProfile).filter(
-        FighterProfile.fighter_id == fighter_id,
-        FighterProfile.profile_name == profile_name
-    ).first()
+    profile = (await db.scalars(
+        select(FighterProfile).where(
+            FighterProfile.fighter_id == fighter_id,
+            FighterProfile.profile_name == profile_name
+        ).limit(1)
+    )).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
@@ -424,6 +554,11 @@ def update_fighter_profile(fighter_id: int, profile_name: str, data: dict, db: S
         profile.total_episodes = data["total_episodes"]
     if "avg_reward" in data:
         profile.avg_reward = data["avg_reward"]
+    if "reward_weights" in data:
+        try:
+            profile.reward_weights = check_reward_weights(data["reward_weights"] or {})
+        except (AttributeError, TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid reward_weights: {e}")
 
     profile.updated_at = datetime.utcnow()
     db.commit()
@@ -474,7 +609,7 @@ def create_training_job(job: TrainingJobCreateSchema, db: Session = Depends(get_
 
 
 @router.get("/training-jobs/{job_id}", response_model=TrainingJobSchema)
-def get_training_job(job_id: int, db: Session = Depends(get_db)):
+def get_training_job(job_id: int, db: Session = Depends(get_read_db)):
     """Get status of a training job"""
     job = db.query(TrainingJob).filter(TrainingJob.id == job_id).first()
     if not job:
@@ -483,7 +618,7 @@ def get_training_job(job_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/training-jobs/fighter/{fighter_id}", response_model=List[TrainingJobSchema])
-def get_fighter_training_jobs(fighter_id: int, db: Session = Depends(get_db)):
+def get_fighter_training_jobs(fighter_id: int, db: Session = Depends(get_read_db)):
     """Get all training jobs for a fighter"""
     # Verify fighter exists
     fighter = db.query(Fighter).filter(Fighter.id == fighter_id).first()
@@ -547,19 +682,29 @@ def _execute_training_background(job_id: int):
         # Simulate training with progress updates
         epochs = int(job.epochs)
         simulated_rewards = []
+        phase_timer = PhaseTimer()
+        profiler = get_profiler()
 
         for epoch in range(epochs):
-            # Simulate training step
-            time.sleep(0.05)  # Simulate some work
+            with profiler.maybe_profile("training", key=job_id):
+                # Simulate training step
+                with phase_timer.phase("train"):
+                    time.sleep(0.05)  # Simulate some work
 
-            progress = ((epoch + 1) / epochs) * 100
-            job.progress = min(progress, 99)  # Cap at 99 until complete
+                progress = ((epoch + 1) / epochs) * 100
+                job.progress = min(progress, 99)  # Cap at 99 until complete
 
-            # Simulate improving rewards
-            reward = 50 + (epoch * 2) + random.uniform(-5, 5)
-            simulated_rewards.append(reward)
+                # Simulate improving rewards
+                reward = 50 + (epoch * 2) + random.uniform(-5, 5)
+                simulated_rewards.append(reward)
 
-            session.commit()
+                with phase_timer.phase("progress_update"):
+                    session.commit()
+
+        # Keep any profiles stored while the job ran (see profile_training_job)
+        report = dict(job.profile_report or {})
+        report["phases"] = phase_timer.summary()
+        job.profile_report = report
 
         # Mark as complete
         job.status = "completed"
@@ -594,9 +739,52 @@ def _execute_training_background(job_id: int):
         job.completed_at = dt.utcnow()
         session.commit()
     finally:
+        # An arm for this job that didn't complete can never fire now
+        get_profiler().cancel("training", key=job_id)
         session.close()
 
 
+def _store_job_profile(job_id: int, profile: dict):
+    """Append a captured profile to a training job's profile_report"""
+    from database import get_db_manager
+
+    with get_db_manager().session_scope() as session:
+        job = session.query(TrainingJob).filter(TrainingJob.id == job_id).first()
+        if job is None:
+            return
+        report = dict(job.profile_report or {})
+        report["profiles"] = report.get("profiles", []) + [profile]
+        job.profile_report = report
+
+
+@router.post("/training-jobs/{job_id}/profile")
+def profile_training_job(job_id: int, request: ProfileRequestSchema, db: Session = Depends(get_db)):
+    """
+    Profile the next `count` training iterations of this job (it must be
+    running) and store the report with it (`profile_report.profiles`).
+    Iterations of other jobs are not captured; the arm is dropped when the
+    job ends or after PROFILE_JOB_TTL_SECONDS.
+    """
+    job = db.query(TrainingJob).filter(TrainingJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    if job.status != "in_progress":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}, not running")
+
+    try:
+        get_profiler().arm(
+            "training",
+            request.count,
+            request.mode,
+            on_complete=lambda report: _store_job_profile(job_id, report),
+            key=job_id,
+            ttl=PROFILE_JOB_TTL_SECONDS,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "armed", "job_id": job_id, "iterations": request.count, "mode": request.mode}
+
+
 @router.post("/training-jobs/{job_id}/execute")
 def execute_training_job(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
@@ -618,3 +806,58 @@ def execute_training_job(job_id: int, background_tasks: BackgroundTasks, db: Ses
         "job_id": job_id,
         "message": "Training job queued for execution. Poll the job status for progress updates."
     }
+
+
+# ==================== Weight Sync ====================
+@router.get("/weight-sync")
+def get_weight_sync_status():
+    """Pushed policy versions currently served by this worker"""
+    from inference import get_weight_subscriber
+
+    return {"enabled": WEIGHT_SYNC_ENABLED, **get_weight_subscriber().status()}
+
+
+# ==================== Retention ====================
+@router.get("/retention")
+def get_retention_status():
+    """Retention policy and the result of the last pass"""
+    engine = get_retention_engine()
+    return {"policy": asdict(engine.policy), "last_pass": engine.last_pass}
+
+
+@router.post("/retention/run")
+def run_retention_pass():
+    """Run one bounded retention pass now"""
+    return get_retention_engine().run_pass()
+
+
+# ==================== Profiling ====================
+@router.get("/profiling")
+def get_profiling_status():
+    """Armed profiling targets and recently captured reports"""
+    return get_profiler().status()
+
+
+@router.post("/profiling/{target}")
+def arm_profiling(target: str, request: ProfileRequestSchema):
+    """Profile the next `count` events of a target ("inference" or "training")"""
+    try:
+        get_profiler().arm(target, request.count, request.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "armed", "target": target, "count": request.count, "mode": request.mode}
+
+
+@router.delete("/profiling/{target}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_profiling(target: str):
+    """Disarm a target without producing a report"""
+    get_profiler().cancel(target)
+
+
+@router.get("/profiling/reports/{report_id}")
+def get_profiling_report(report_id: int):
+    """Full text of a captured profile"""
+    report = get_profiler().get_report(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile report not found")
+    return report
@@ -1,10 +1,14 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+from simulation.rewards import check_reward_weights
+
+MAX_BULK_FRAMES = 5000  # Frames per bulk upload request
+
 
 class FighterMetadataSchema(BaseModel):
     """Fighter metadata"""
@@ -31,9 +35,8 @@ class FighterSchema(BaseModel):
         from_attributes = True
 
 
-class FightFrameCreateSchema(BaseModel):
-    """Create a fight frame record"""
-    episode_id: int
+class FightFrameDataSchema(BaseModel):
+    """Fight frame contents (without the episode)"""
     frame_number: int
     fighter_position: List[float]  # [x, z]
     fighter_health: float
@@ -45,6 +48,23 @@ class FightFrameCreateSchema(BaseModel):
     observation_vector: List[float]
 
 
+class FightFrameCreateSchema(FightFrameDataSchema):
+    """Create a fight frame record"""
+    episode_id: int
+
+
+class FightFrameBulkCreateSchema(BaseModel):
+    """Create many frames of one episode in a single request"""
+    episode_id: int
+    frames: List[FightFrameDataSchema] = Field(..., min_length=1, max_length=MAX_BULK_FRAMES)
+
+
+class FightFrameBulkResultSchema(BaseModel):
+    """Bulk upload result"""
+    episode_id: int
+    inserted: int
+
+
 class FightFrameSchema(BaseModel):
     """Fight frame response"""
     id: int
@@ -81,6 +101,9 @@ class EpisodeSchema(BaseModel):
     rank: int
     started_at: datetime
     ended_at: Optional[datetime]
+    is_flagged: bool = False
+    frames_downsampled: Optional[str] = None
+    archived_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -105,6 +128,11 @@ class ModelCheckpointSchema(BaseModel):
     total_episodes_trained: int
     weights_path: str
     training_mode: Optional[str]
+    elo: Optional[float] = None
+    elo_ci: Optional[float] = None
+    win_rate_ci_low: Optional[float] = None
+    win_rate_ci_high: Optional[float] = None
+    matches_played: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -135,6 +163,12 @@ class FighterProfileCreateSchema(BaseModel):
     risk_tolerance: float = 50.0      # 0-100
     endurance: float = 50.0           # 0-100
     model_path: str                   # Path to trained model file
+    reward_weights: Dict[str, float] = {}  # {reward term: weight} overrides (simulation.rewards.REWARD_TERMS)
+
+    @field_validator("reward_weights")
+    @classmethod
+    def _known_reward_terms(cls, value: Dict[str, float]) -> Dict[str, float]:
+        return check_reward_weights(value)
 
 
 class FighterProfileSchema(BaseModel):
@@ -148,10 +182,14 @@ class FighterProfileSchema(BaseModel):
     risk_tolerance: float
     endurance: float
     model_path: str
+    reward_weights: Optional[Dict[str, Any]] = None
     model_version: int
     win_rate: float
     total_episodes: int
     avg_reward: float
+    elo: Optional[float] = None
+    elo_ci: Optional[float] = None
+    matches_played: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -171,6 +209,12 @@ class TrainingJobCreateSchema(BaseModel):
     endurance: float = 50.0
 
 
+class ProfileRequestSchema(BaseModel):
+    """Arm the profiler for the next N events"""
+    count: int = 10
+    mode: str = "cprofile"  # cprofile or torch
+
+
 class TrainingJobSchema(BaseModel):
     """Training job response"""
     id: int
@@ -187,6 +231,7 @@ class TrainingJobSchema(BaseModel):
     final_reward: Optional[float]
     final_win_rate: Optional[float]
     error_message: Optional[str]
+    profile_report: Optional[Dict[str, Any]] = None
     created_at: datetime
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
@@ -0,0 +1,72 @@
+"""
+Fast list responses.
+
+List endpoints normally load ORM objects, validate each one into its
+`response_model` and serialize with stdlib `json`. With `?fast=true` they
+instead select only the schema's columns, build plain dicts from the row
+tuples and encode them in one call:
+
+- `Accept: application/msgpack` (or `application/x-msgpack`): MessagePack
+- anything else: JSON via orjson (stdlib `json` if orjson isn't installed)
+
+The payload has the same shape and field names as the regular response, so a
+client can switch by adding the query parameter. Datetimes are ISO 8601
+strings in both formats.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Sequence, Type
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional format
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> List[Any]:
+    """ORM columns of `model` for every field of `schema`, in field order"""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_to_dicts(rows: Iterable[Sequence[Any]], names: Sequence[str]) -> List[Dict[str, Any]]:
+    return [dict(zip(names, row)) for row in rows]
+
+
+def _isoformat(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def negotiate(request: Request) -> str:
+    """Response media type for the request's Accept header"""
+    accept = request.headers.get("accept", "")
+    for media_type in MSGPACK_MEDIA_TYPES:
+        if media_type in accept:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def fast_response(request: Request, payload: Any) -> Response:
+    """Encode `payload` (plain dicts/lists/scalars) in the negotiated format"""
+    media_type = negotiate(request)
+    if media_type in MSGPACK_MEDIA_TYPES:
+        if msgpack is None:
+            raise HTTPException(status_code=406, detail="MessagePack responses need `pip install msgpack`")
+        body = msgpack.packb(payload, default=_isoformat)
+    elif orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, default=_isoformat).encode()
+    return Response(content=body, media_type=media_type)
@@ -0,0 +1,310 @@
+"""
+Database layer benchmarks.
+
+Compares the connection setups of `DatabaseManager` on a throwaway SQLite
+file:
+- "legacy": WAL + foreign keys only (default synchronous=FULL) and one
+  engine for reads and writes, as before the connection tuning
+- "tuned": the default `SQLITE_PRAGMAS` and a separate read-only engine
+
+Cases:
+- `frame_insert`: one fight frame per commit, as `POST /fight-frames` does
+- `frame_insert_bulk`: `BULK_BATCH` frames per commit through
+  `DatabaseManager.bulk_insert_frames`, as `POST /fight-frames/bulk` does
+- `frames_response`: `GET /episodes/{id}/frames` for `RESPONSE_ROWS` frames,
+  as the default path (ORM objects -> response_model validation ->
+  jsonable_encoder -> json) vs `?fast=true` (projected tuples -> orjson)
+- `dashboard_read`: the episode queries behind the dashboard's stats and
+  episode list (through the sync read engine), while `writers` background processes keep inserting frames
+
+Usage:
+    python -m benchmarks.database --output db.json
+    python -m benchmarks.database --baseline db.json   # exit 1 on regressions
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from benchmarks.harness import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    case_filter,
+    compare,
+    format_comparison,
+    format_results,
+    load_results,
+    measure,
+    write_results,
+)
+
+logger = logging.getLogger(__name__)
+
+# (name, params, fn, ops_per_call)
+Case = Tuple[str, Dict[str, Any], Callable[[], Any], int]
+
+# DatabaseManager keyword arguments per setup
+CONFIGS = {
+    "legacy": {"pragmas": {"foreign_keys": "ON", "journal_mode": "WAL"}, "separate_reads": False},
+    "tuned": {},
+}
+
+SWEEPS = {
+    "full": {"writers": [0, 1, 4], "seed_episodes": 200},
+    "quick": {"writers": [0, 2], "seed_episodes": 50},
+}
+
+FRAMES_PER_EPISODE = 20
+BULK_BATCH = 100
+RESPONSE_ROWS = 1000
+
+
+def _frame(episode_id: int, frame_number: int):
+    from database.models import FightFrame
+
+    return FightFrame(
+        episode_id=episode_id,
+        frame_number=frame_number,
+        fighter_position=[1.0, 2.0],
+        fighter_health=100.0,
+        fighter_velocity=[0.0, 0.0],
+        enemies_state=[{"id": 1, "position": [5.0, 5.0], "health": 100.0}],
+        action_vector=[1, 0, 0, -1],
+        reward_delta=0.5,
+        cumulative_reward=frame_number * 0.5,
+        observation_vector=[0.0] * 30,
+    )
+
+
+def _seed(manager, num_episodes: int) -> Tuple[int, int, int]:
+    """
+    Create a fighter with `num_episodes` finished episodes, one long
+    recorded episode and one live episode; returns (fighter_id, live_id, long_id)
+    """
+    from database.models import Episode, Fighter
+
+    with manager.session_scope() as session:
+        fighter = Fighter(glb_filename="bench.glb")
+        session.add(fighter)
+        session.flush()
+        for i in range(num_episodes):
+            episode = Episode(
+                fighter_id=fighter.id,
+                episode_number=i,
+                total_reward=float(i),
+                duration_frames=FRAMES_PER_EPISODE,
+                is_victory=i % 2 == 0,
+            )
+            session.add(episode)
+            session.flush()
+            session.add_all(_frame(episode.id, f) for f in range(FRAMES_PER_EPISODE))
+        long = Episode(fighter_id=fighter.id, episode_number=num_episodes, duration_frames=RESPONSE_ROWS)
+        session.add(long)
+        session.flush()
+        session.add_all(_frame(long.id, f) for f in range(RESPONSE_ROWS))
+        live = Episode(fighter_id=fighter.id, episode_number=num_episodes + 1)
+        session.add(live)
+        session.flush()
+        return fighter.id, live.id, long.id
+
+
+def _write_frames(db_url: str, kwargs: Dict[str, Any], episode_id: int, stop):
+    from database.db import DatabaseManager
+
+    manager = DatabaseManager(db_url, **kwargs)
+    frame_number = 0
+    while not stop.is_set():
+        session = manager.get_session()
+        try:
+            session.add(_frame(episode_id, frame_number))
+            session.commit()
+        finally:
+            session.close()
+        frame_number += 1
+    manager.close()
+
+
+class _Writers:
+    """
+    Background processes inserting frames one commit at a time (processes,
+    not threads, so the readers measure SQLite locking rather than the GIL)
+    """
+
+    def __init__(self, db_url: str, kwargs: Dict[str, Any], episode_id: int, count: int):
+        context = multiprocessing.get_context("spawn")
+        self.stop = context.Event()
+        self.processes = [
+            context.Process(target=_write_frames, args=(db_url, kwargs, episode_id, self.stop), daemon=True)
+            for _ in range(count)
+        ]
+
+    def __enter__(self):
+        for process in self.processes:
+            process.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for process in self.processes:
+            process.join()
+
+
+def database_cases(sweep: Dict[str, Any], wanted: Callable[[str], bool]) -> Iterator[Case]:
+    if not any(wanted(name) for name in ("frame_insert", "frame_insert_bulk", "frames_response", "dashboard_read")):
+        return
+    from sqlalchemy import func
+
+    from database.backends import FRAME_COLUMNS
+    from database.db import DatabaseManager
+    from database.models import Episode
+
+    for config_name, kwargs in CONFIGS.items():
+        workdir = tempfile.mkdtemp(prefix="arena-db-bench-")
+        db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        manager = DatabaseManager(db_url, **kwargs)
+        try:
+            manager.init_db()
+            fighter_id, episode_id, long_episode_id = _seed(manager, sweep["seed_episodes"])
+
+            counter = [0]
+
+            def insert(manager=manager, episode_id=episode_id, counter=counter):
+                session = manager.get_session()
+                try:
+                    session.add(_frame(episode_id, counter[0]))
+                    session.commit()
+                finally:
+                    session.close()
+                counter[0] += 1
+
+            if wanted("frame_insert"):
+                yield "frame_insert", {"config": config_name}, insert, 1
+
+            rows = [
+                {column: getattr(_frame(episode_id, f), column) for column in FRAME_COLUMNS}
+                for f in range(BULK_BATCH)
+            ] if wanted("frame_insert_bulk") else []
+
+            def insert_bulk(manager=manager, rows=rows):
+                session = manager.get_session()
+                try:
+                    manager.bulk_insert_frames(session, rows)
+                    session.commit()
+                finally:
+                    session.close()
+
+            if wanted("frame_insert_bulk"):
+                yield "frame_insert_bulk", {"config": config_name, "batch": BULK_BATCH}, insert_bulk, BULK_BATCH
+
+            def dashboard(manager=manager, fighter_id=fighter_id):
+                session = manager.get_read_session()
+                try:
+                    session.query(
+                        func.count(Episode.id), func.avg(Episode.total_reward), func.avg(Episode.duration_frames)
+                    ).filter(Episode.fighter_id == fighter_id).one()
+                    session.query(Episode).filter(Episode.fighter_id == fighter_id).order_by(
+                        Episode.started_at.desc()
+                    ).limit(50).all()
+                finally:
+                    session.close()
+
+            if config_name == "tuned" and wanted("frames_response"):
+                yield from _response_cases(manager, long_episode_id)
+
+            for writers in sweep["writers"] if wanted("dashboard_read") else []:
+                with _Writers(db_url, kwargs, episode_id, writers):
+                    yield "dashboard_read", {"config": config_name, "writers": writers}, dashboard, 1
+        finally:
+            manager.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _response_cases(manager, episode_id: int) -> Iterator[Case]:
+    import json
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+
+    from api.schemas import FightFrameSchema
+    from api.serialization import rows_to_dicts, schema_columns
+    from database.models import FightFrame
+
+    def orm(manager=manager, episode_id=episode_id):
+        session = manager.get_read_session()
+        try:
+            frames = session.query(FightFrame).filter(
+                FightFrame.episode_id == episode_id
+            ).order_by(FightFrame.frame_number.asc()).limit(RESPONSE_ROWS).all()
+            validated = [FightFrameSchema.model_validate(frame) for frame in frames]
+            return json.dumps(jsonable_encoder(validated)).encode()
+        finally:
+            session.close()
+
+    def fast(manager=manager, episode_id=episode_id):
+        session = manager.get_read_session()
+        try:
+            rows = session.execute(
+                select(*schema_columns(FightFrame, FightFrameSchema)).where(
+                    FightFrame.episode_id == episode_id
+                ).order_by(FightFrame.frame_number.asc()).limit(RESPONSE_ROWS)
+            ).all()
+            return orjson.dumps(rows_to_dicts(rows, FightFrameSchema.model_fields))
+        finally:
+            session.close()
+
+    for mode, fn in (("orm", orm), ("fast", fast)):
+        yield "frames_response", {"mode": mode, "rows": RESPONSE_ROWS}, fn, RESPONSE_ROWS
+
+
+def run(sweep_name: str = "full", name_filter: str = "", min_time: float = 0.2) -> List[Dict[str, Any]]:
+    """Run every case whose name contains `name_filter` (other cases are never built)"""
+    sweep = SWEEPS[sweep_name]
+    results = []
+    for name, params, fn, ops_per_call in database_cases(sweep, case_filter(name_filter)):
+        result = measure(name, fn, params=params, ops_per_call=ops_per_call, min_time=min_time)
+        logger.info(f"{result['key']}: {result['us_per_op']:.2f} µs/op")
+        results.append(result)
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Database layer benchmarks (legacy vs tuned SQLite)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative µs/op increase that counts as a regression (default 0.10)",
+    )
+    parser.add_argument("--quick", action="store_true", help="Small sweep for smoke runs")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    results = run("quick" if args.quick else "full", args.filter, args.min_time)
+    print(format_results(results))
+
+    if args.output:
+        write_results(results, args.output, suite="database")
+        logger.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row["status"] == "regression"]
+        if regressions:
+            logger.error(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
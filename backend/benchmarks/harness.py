@@ -0,0 +1,213 @@
+"""
+Shared benchmark harness.
+
+A benchmark is a named callable plus its sweep parameters. `measure()` times
+it (best-of-N repeats after a warmup), then runs it a few more times under
+tracemalloc to report the peak Python allocation per op. Results are plain
+dicts so runs can be written to JSON and compared against a stored baseline.
+"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# A case regresses when its µs/op grows by more than this fraction
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def case_key(name: str, params: Dict[str, Any]) -> str:
+    """Stable identifier for a (benchmark, params) case, e.g. `arena_step[fighters=8]`"""
+    inner = ",".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{name}[{inner}]"
+
+
+def case_filter(name_filter: str = "") -> Callable[[str], bool]:
+    """Predicate for case names containing `name_filter`; suites check it before building a case"""
+    return lambda name: not name_filter or name_filter in name
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    params: Optional[Dict[str, Any]] = None,
+    ops_per_call: int = 1,
+    min_time: float = 0.2,
+    repeats: int = 5,
+    alloc_calls: int = 3,
+) -> Dict[str, Any]:
+    """
+    Benchmark `fn`.
+
+    Args:
+        fn: Zero-argument callable; one call performs `ops_per_call` ops
+            (e.g. one env step per env for a vectorized loop)
+        min_time: Seconds each repeat should run for (sets the call count)
+        repeats: Timed repeats; the fastest is reported, the spread as p50/max
+        alloc_calls: Calls traced with tracemalloc for the allocation figures
+    """
+    params = params or {}
+
+    # Warmup + calibrate the number of calls per repeat
+    fn()
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or calls >= 1_000_000:
+            break
+        calls *= 4
+    calls = max(1, int(calls * (min_time / max(elapsed, 1e-9))))
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(calls):
+                fn()
+            timings.append((time.perf_counter() - start) / (calls * ops_per_call))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Allocations (separate pass: tracing distorts timings)
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(alloc_calls):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+        snapshot_before = tracemalloc.take_snapshot()
+        fn()
+        snapshot_after = tracemalloc.take_snapshot()
+        allocated_blocks = sum(
+            max(stat.count_diff, 0) for stat in snapshot_after.compare_to(snapshot_before, "lineno")
+        )
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "name": name,
+        "key": case_key(name, params),
+        "params": params,
+        "us_per_op": best * 1e6,
+        "us_per_op_median": float(np.median(timings)) * 1e6,
+        "us_per_op_max": max(timings) * 1e6,
+        "ops_per_sec": 1.0 / best if best > 0 else float("inf"),
+        "peak_alloc_bytes_per_op": int(np.median(peaks)) // ops_per_call,
+        "retained_blocks_per_call": allocated_blocks,
+        "calls": calls * repeats,
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Machine/runtime details stored alongside results"""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": np.__version__,
+    }
+    try:
+        import torch
+
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def write_results(results: List[Dict[str, Any]], filepath: str, suite: str):
+    """Write a run as JSON"""
+    with open(filepath, "w") as f:
+        json.dump(
+            {
+                "suite": suite,
+                "created_at": datetime.utcnow().isoformat(),
+                "environment": environment_info(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+
+def load_results(filepath: str) -> Dict[str, Dict[str, Any]]:
+    """Load a run written by `write_results`, keyed by case"""
+    with open(filepath) as f:
+        data = json.load(f)
+    return {result["key"]: result for result in data["results"]}
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a baseline.
+
+    Returns one row per case with the relative change in µs/op
+    (positive = slower) and a status: "regression", "improvement", "ok"
+    or "new" (no baseline entry).
+    """
+    rows = []
+    for result in results:
+        base = baseline.get(result["key"])
+        if base is None:
+            rows.append({"key": result["key"], "status": "new", "us_per_op": result["us_per_op"]})
+            continue
+
+        change = result["us_per_op"] / base["us_per_op"] - 1.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "key": result["key"],
+            "status": status,
+            "us_per_op": result["us_per_op"],
+            "baseline_us_per_op": base["us_per_op"],
+            "change": change,
+        })
+    return rows
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    """Human-readable table of a run"""
+    lines = [f"{'case':<52} {'µs/op':>10} {'ops/s':>12} {'peak B/op':>10}"]
+    for r in results:
+        lines.append(
+            f"{r['key']:<52} {r['us_per_op']:>10.2f} {r['ops_per_sec']:>12.0f} "
+            f"{r['peak_alloc_bytes_per_op']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Human-readable table of a comparison"""
+    lines = [f"{'case':<52} {'baseline':>10} {'current':>10} {'change':>8}  status"]
+    for row in rows:
+        if row["status"] == "new":
+            lines.append(f"{row['key']:<52} {'-':>10} {row['us_per_op']:>10.2f} {'-':>8}  new")
+            continue
+        lines.append(
+            f"{row['key']:<52} {row['baseline_us_per_op']:>10.2f} {row['us_per_op']:>10.2f} "
+            f"{row['change']:>+7.1%}  {row['status']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,421 @@
+"""
+API load test with a simulated game client.
+
+Each simulated match replays the traffic one browser tab generates during a
+fight (see backend-integration.js / AI_INTEGRATION.js):
+- POST /api/episodes when the match starts, PATCH /api/episodes/{id} at the end
+- POST /api/fight-frames every FRAME_SAMPLE_RATE game frames (fire and forget)
+- POST /api/fighters/{id}/inference per AI opponent, at most every
+  INFERENCE_COOLDOWN_MS
+- GET /api/fighters/{id}/stats every STATUS_POLL_SECONDS
+
+Dashboard clients additionally poll the analytics page endpoints. Latency is
+reported per route template (p50/p95/p99) together with throughput and how
+far each match's tick loop fell behind schedule, which is the first sign a
+node cannot keep up.
+
+Targets:
+- in-process (default): httpx ASGITransport against `main.app`
+- --uvicorn: a real uvicorn server on localhost in a background thread
+- --base-url: an already running backend
+
+The first two use a throwaway SQLite database and seed a fighter with an
+untrained policy so inference exercises the full serving path.
+
+Usage:
+    python -m benchmarks.load_test --matches 20 --match-seconds 30
+    python -m benchmarks.load_test --uvicorn --matches 50 --speed 2 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - benchmark-only dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Client cadences, mirrored from the frontend
+GAME_FPS = 60
+FRAME_SAMPLE_RATE = 6  # backend-integration.js: send every 6th frame
+INFERENCE_COOLDOWN_MS = 100  # AI_INTEGRATION.js: per fighter
+STATUS_POLL_SECONDS = 10  # backend-integration.js training status
+DASHBOARD_POLL_SECONDS = 10  # analytics.php auto refresh
+
+# Numeric path segments collapse into a template so latencies group per route
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def route_template(method: str, path: str) -> str:
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+class LatencyRecorder:
+    """Per-route latencies, status codes and schedule lag"""
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.tick_lag: List[float] = []
+
+    async def request(self, client: "httpx.AsyncClient", method: str, path: str, **kwargs):
+        route = route_template(method, path)
+        start = time.perf_counter()
+        try:
+            # Enforced here rather than by httpx so it also applies in-process
+            response = await asyncio.wait_for(client.request(method, path, **kwargs), self.timeout)
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            self.errors[route] += 1
+            logger.debug(f"{route} failed: {e}")
+            return None
+        self.latencies[route].append(time.perf_counter() - start)
+        self.statuses[route][response.status_code] += 1
+        return response
+
+    def report(self, wall_time: float) -> Dict[str, Any]:
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            samples = np.array(self.latencies.get(route, [])) * 1000.0
+            count = len(samples)
+            routes[route] = {
+                "requests": count,
+                "throughput_rps": count / wall_time if wall_time > 0 else 0.0,
+                "p50_ms": float(np.percentile(samples, 50)) if count else None,
+                "p95_ms": float(np.percentile(samples, 95)) if count else None,
+                "p99_ms": float(np.percentile(samples, 99)) if count else None,
+                "max_ms": float(samples.max()) if count else None,
+                "status_codes": dict(self.statuses.get(route, {})),
+                "errors": self.errors.get(route, 0),
+            }
+
+        total = sum(r["requests"] for r in routes.values())
+        lag = np.array(self.tick_lag) * 1000.0
+        return {
+            "wall_time_s": wall_time,
+            "total_requests": total,
+            "throughput_rps": total / wall_time if wall_time > 0 else 0.0,
+            "tick_lag_p95_ms": float(np.percentile(lag, 95)) if len(lag) else None,
+            "tick_lag_max_ms": float(lag.max()) if len(lag) else None,
+            "routes": routes,
+        }
+
+
+def _random_frame(rng: np.random.Generator, episode_id: int, frame_number: int, num_enemies: int):
+    return {
+        "episode_id": episode_id,
+        "frame_number": frame_number,
+        "fighter_position": rng.uniform(-40, 40, size=2).tolist(),
+        "fighter_health": float(rng.uniform(0, 100)),
+        "fighter_velocity": rng.uniform(-2, 2, size=2).tolist(),
+        "enemies_state": [
+            {"id": i + 2, "position": rng.uniform(-40, 40, size=2).tolist(), "health": 100.0}
+            for i in range(num_enemies)
+        ],
+        "action_vector": np.eye(10)[rng.integers(0, 10)].tolist(),
+        "reward_delta": float(rng.normal()),
+        "cumulative_reward": float(rng.normal() * 10),
+        "observation_vector": rng.standard_normal(30).astype(np.float32).tolist(),
+    }
+
+
+async def simulate_match(
+    client: "httpx.AsyncClient",
+    recorder: LatencyRecorder,
+    match_index: int,
+    fighter_id: int,
+    match_seconds: float,
+    num_opponents: int,
+    speed: float,
+    seed: int,
+):
+    """One browser tab playing one match"""
+    rng = np.random.default_rng([seed, match_index])
+    # Stagger starts so matches don't tick in lockstep
+    await asyncio.sleep(float(rng.uniform(0, 1.0)) / speed)
+
+    response = await recorder.request(client, "POST", "/api/episodes", json={
+        "fighter_id": fighter_id,
+        "episode_number": match_index,
+        "opponent_ids": list(range(2, 2 + num_opponents)),
+    })
+    if response is None or response.status_code != 201:
+        logger.warning(f"Match {match_index}: could not create episode")
+        return
+    episode_id = response.json()["id"]
+
+    # The client's tick loop runs at the frame-sampling rate (10 Hz at 60 FPS);
+    # inference cooldown (100 ms) lines up with it
+    tick = FRAME_SAMPLE_RATE / GAME_FPS
+    inference_every = max(1, round(INFERENCE_COOLDOWN_MS / 1000 / tick))
+    poll_every = max(1, round(STATUS_POLL_SECONDS / tick))
+    num_ticks = int(match_seconds / tick)
+
+    pending = set()
+
+    def fire(coro):
+        task = asyncio.ensure_future(coro)
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    start = time.perf_counter()
+    for t in range(num_ticks):
+        due = start + t * tick / speed
+        now = time.perf_counter()
+        if due > now:
+            await asyncio.sleep(due - now)
+        recorder.tick_lag.append(max(0.0, time.perf_counter() - due))
+
+        fire(recorder.request(
+            client, "POST", "/api/fight-frames",
+            json=_random_frame(rng, episode_id, t * FRAME_SAMPLE_RATE, num_opponents),
+        ))
+        if t % inference_every == 0:
+            for _ in range(num_opponents):
+                fire(recorder.request(
+                    client, "POST", f"/api/fighters/{fighter_id}/inference",
+                    json={"observation": rng.standard_normal(30).tolist()},
+                ))
+        if t % poll_every == 0:
+            fire(recorder.request(client, "GET", f"/api/fighters/{fighter_id}/stats"))
+
+    if pending:
+        await asyncio.gather(*pending)
+
+    await recorder.request(client, "PATCH", f"/api/episodes/{episode_id}", json={
+        "total_reward": float(rng.normal() * 50),
+        "duration_frames": num_ticks * FRAME_SAMPLE_RATE,
+        "is_victory": bool(rng.random() < 0.5),
+        "rank": int(rng.integers(1, num_opponents + 2)),
+    })
+
+
+async def poll_dashboard(
+    client: "httpx.AsyncClient",
+    recorder: LatencyRecorder,
+    stop: asyncio.Event,
+    speed: float,
+):
+    """An analytics dashboard with auto refresh on"""
+    while not stop.is_set():
+        response = await recorder.request(client, "GET", "/api/fighters")
+        if response is not None and response.status_code == 200:
+            for fighter in response.json():
+                fighter_id = fighter["id"]
+                await asyncio.gather(
+                    recorder.request(client, "GET", f"/api/fighters/{fighter_id}/stats"),
+                    recorder.request(client, "GET", f"/api/fighters/{fighter_id}/episodes"),
+                    recorder.request(client, "GET", f"/api/fighters/{fighter_id}/checkpoints"),
+                )
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=DASHBOARD_POLL_SECONDS / speed)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(
+    client: "httpx.AsyncClient",
+    fighter_id: int,
+    matches: int,
+    match_seconds: float,
+    num_opponents: int,
+    dashboards: int,
+    speed: float,
+    seed: int,
+    timeout: float = 10.0,
+) -> Dict[str, Any]:
+    recorder = LatencyRecorder(timeout)
+    stop = asyncio.Event()
+    dashboard_tasks = [
+        asyncio.ensure_future(poll_dashboard(client, recorder, stop, speed))
+        for _ in range(dashboards)
+    ]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        simulate_match(client, recorder, i, fighter_id, match_seconds, num_opponents, speed, seed)
+        for i in range(matches)
+    ])
+    stop.set()
+    await asyncio.gather(*dashboard_tasks)
+
+    return recorder.report(time.perf_counter() - start)
+
+
+def prepare_local_backend(workdir: Path) -> int:
+    """
+    Point the app at a throwaway database and seed a fighter with an
+    untrained policy (plus serving artifacts). Returns the fighter id.
+    """
+    import database.db as db_module
+    from database.db import DatabaseManager
+    from database.models import Fighter, ModelCheckpoint
+    from rl.agent import FighterPolicyNetwork, AgentCheckpoint
+    from rl.export import export_policy_artifacts
+
+    db_module._db_manager = DatabaseManager(f"sqlite:///{workdir / 'loadtest.db'}")
+    db_module._db_manager.init_db()
+
+    weights_path = workdir / "loadtest_fighter.pth"
+    AgentCheckpoint.save(FighterPolicyNetwork(), str(weights_path), {"source": "load_test"})
+    export_policy_artifacts(str(weights_path), formats=("torchscript", "numpy"))
+
+    with db_module._db_manager.session_scope() as session:
+        fighter = Fighter(glb_filename="loadtest.glb")
+        session.add(fighter)
+        session.flush()
+        session.add(ModelCheckpoint(
+            fighter_id=fighter.id,
+            model_version=1,
+            training_iteration=0,
+            weights_path=str(weights_path),
+        ))
+        return fighter.id
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class UvicornThread:
+    """Serve `app` with uvicorn on localhost from a background thread"""
+
+    def __init__(self, app, port: int):
+        import uvicorn
+
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{'route':<44} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status",
+    ]
+    for route, r in report["routes"].items():
+        if r["requests"]:
+            timing = f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+        else:
+            timing = f"{'-':>8} {'-':>8} {'-':>8}"
+        codes = ",".join(f"{code}x{n}" for code, n in sorted(r["status_codes"].items()))
+        if r["errors"]:
+            codes += f",errorx{r['errors']}"
+        lines.append(f"{route:<44} {r['requests']:>7} {r['throughput_rps']:>8.1f} {timing}  {codes}")
+    lines.append(
+        f"total: {report['total_requests']} requests in {report['wall_time_s']:.1f}s "
+        f"({report['throughput_rps']:.1f} req/s)"
+    )
+    if report["tick_lag_p95_ms"] is not None:
+        lines.append(
+            f"client tick lag: p95 {report['tick_lag_p95_ms']:.1f} ms, "
+            f"max {report['tick_lag_max_ms']:.1f} ms"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the backend with simulated game clients")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", help="Test a running backend (e.g. http://localhost:8001)")
+    target.add_argument("--uvicorn", action="store_true", help="Serve the app with uvicorn on localhost")
+    parser.add_argument("--fighter-id", type=int, default=1, help="Fighter to use with --base-url")
+    parser.add_argument("--matches", type=int, default=10, help="Concurrent simulated matches")
+    parser.add_argument("--match-seconds", type=float, default=30.0, help="Game time per match")
+    parser.add_argument("--opponents", type=int, default=3, help="AI opponents per match")
+    parser.add_argument("--dashboards", type=int, default=1, help="Polling analytics dashboards")
+    parser.add_argument("--speed", type=float, default=1.0, help="Game-time speedup (2 = twice the request rate)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # Per-request logs
+    if httpx is None:
+        logger.error("The load test needs httpx: pip install httpx")
+        return 1
+
+    load_kwargs = dict(
+        matches=args.matches,
+        match_seconds=args.match_seconds,
+        num_opponents=args.opponents,
+        dashboards=args.dashboards,
+        speed=args.speed,
+        seed=args.seed,
+        timeout=args.timeout,
+    )
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async def against(base_url: str, transport=None, fighter_id: int = args.fighter_id):
+        async with httpx.AsyncClient(
+            base_url=base_url, transport=transport, limits=limits, timeout=None
+        ) as client:
+            return await run_load(client, fighter_id, **load_kwargs)
+
+    if args.base_url:
+        mode = "remote"
+        report = asyncio.run(against(args.base_url))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            fighter_id = prepare_local_backend(Path(tmp))
+            from main import app
+
+            if args.uvicorn:
+                mode = "uvicorn"
+                port = _free_port()
+                with UvicornThread(app, port):
+                    report = asyncio.run(against(f"http://127.0.0.1:{port}", fighter_id=fighter_id))
+            else:
+                mode = "in-process"
+                transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+                report = asyncio.run(against("http://testserver", transport, fighter_id))
+
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "created_at": datetime.utcnow().isoformat(),
+                    "mode": mode,
+                    "config": {**load_kwargs, "frame_sample_rate": FRAME_SAMPLE_RATE},
+                    "report": report,
+                },
+                f,
+                indent=2,
+            )
+        logger.info(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
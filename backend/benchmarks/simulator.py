@@ -0,0 +1,290 @@
+"""
+Simulator and training throughput benchmarks.
+
+Covers the hot paths of a training run: `HeadlessArena.step` and
+`get_fighter_state`, `BatchedArena.step` with shared or per-slot
+personality reward weights, `WrestlingArenaEnv.step` / `_get_observation`,
+`RolloutBuffer` GAE and `Trainer.train_step`, swept over fighter counts, env
+counts and episode (buffer) lengths.
+
+Usage:
+    python -m benchmarks.simulator --output bench.json
+    python -m benchmarks.simulator --baseline bench.json   # exit 1 on regressions
+    python -m benchmarks.simulator --quick --filter arena
+"""
+import argparse
+import logging
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from benchmarks.harness import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    case_filter,
+    compare,
+    format_comparison,
+    format_results,
+    load_results,
+    measure,
+    write_results,
+)
+from simulation.arena import HeadlessArena
+
+logger = logging.getLogger(__name__)
+
+# (name, params, fn, ops_per_call)
+Case = Tuple[str, Dict[str, Any], Callable[[], Any], int]
+
+SWEEPS = {
+    "full": {
+        "fighters": [2, 8, 32],
+        "envs": [1, 16, 64],
+        "enemies": [0, 5, 20],
+        "episode_length": [256, 2048, 8192],
+    },
+    "quick": {
+        "fighters": [8],
+        "envs": [16],
+        "enemies": [5],
+        "episode_length": [512],
+    },
+}
+
+
+def _make_arena(num_fighters: int, seed: int = 0) -> HeadlessArena:
+    arena = HeadlessArena(seed=seed)
+    for fighter_id in range(num_fighters):
+        arena.add_fighter(fighter_id, is_agent=fighter_id == 0)
+    return arena
+
+
+def _game_state(rng: np.random.Generator, num_enemies: int) -> Dict[str, Any]:
+    """Synthetic `set_game_state` payload with `num_enemies` enemies"""
+    return {
+        "fighter_position": rng.uniform(-40, 40, size=2).tolist(),
+        "fighter_health": 100.0,
+        "fighter_velocity": [0.0, 0.0],
+        "is_alive": True,
+        "enemies": [
+            {"id": i, "position": rng.uniform(-40, 40, size=2).tolist(), "health": 100.0}
+            for i in range(num_enemies)
+        ],
+    }
+
+
+def _fill_buffer_state(length: int, seed: int = 0) -> Dict[str, list]:
+    """RolloutBuffer state with `length` random transitions (episodes of 256 steps)"""
+    rng = np.random.default_rng(seed)
+    return {
+        "observations": list(rng.standard_normal((length, 30)).astype(np.float32)),
+        "actions": rng.integers(0, 10, size=length).tolist(),
+        "rewards": rng.standard_normal(length).tolist(),
+        "values": rng.standard_normal(length).tolist(),
+        "log_probs": (-rng.uniform(0.5, 3.0, size=length)).tolist(),
+        "dones": [(t + 1) % 256 == 0 for t in range(length)],
+    }
+
+
+def arena_cases(sweep: Dict[str, List[int]], wanted: Callable[[str], bool]) -> Iterator[Case]:
+    for num_fighters in sweep["fighters"]:
+        if not (wanted("arena_step") or wanted("arena_get_fighter_state")):
+            break
+        arena = _make_arena(num_fighters)
+        start = arena.snapshot()
+        actions = np.random.default_rng(0).integers(0, 10, size=(4096, num_fighters))
+        fighter_ids = list(arena.fighters)
+        cursor = [0]
+
+        def step(arena=arena, start=start, actions=actions, fighter_ids=fighter_ids, cursor=cursor):
+            # Rewind instead of re-spawning so every call steps a comparable state
+            if arena.is_done() or cursor[0] == len(actions):
+                arena.restore(start)
+                cursor[0] = 0
+            row = actions[cursor[0]]
+            cursor[0] += 1
+            arena.step({fighter_id: int(a) for fighter_id, a in zip(fighter_ids, row)})
+
+        if wanted("arena_step"):
+            yield "arena_step", {"fighters": num_fighters}, step, 1
+
+        def fighter_state(arena=arena, fighter_ids=fighter_ids):
+            for fighter_id in fighter_ids:
+                arena.get_fighter_state(fighter_id)
+
+        arena.restore(start)
+        if wanted("arena_get_fighter_state"):
+            yield "arena_get_fighter_state", {"fighters": num_fighters}, fighter_state, num_fighters
+
+    if not wanted("arena_episode"):
+        return
+    for episode_length in sweep["episode_length"]:
+        num_fighters = sweep["fighters"][len(sweep["fighters"]) // 2]
+
+        def episode(num_fighters=num_fighters, episode_length=episode_length):
+            arena = HeadlessArena(max_steps=episode_length, seed=1)
+            for fighter_id in range(num_fighters):
+                arena.add_fighter(fighter_id)
+            actions = {fighter_id: 8 for fighter_id in range(num_fighters)}  # Idle: nobody dies
+            for _ in range(episode_length):
+                arena.step(actions)
+
+        yield (
+            "arena_episode",
+            {"fighters": num_fighters, "episode_length": episode_length},
+            episode,
+            episode_length,
+        )
+
+
+def batched_cases(sweep: Dict[str, List[int]], wanted: Callable[[str], bool]) -> Iterator[Case]:
+    if not wanted("batched_step"):
+        return
+    from simulation.batched import BatchedArena
+    from simulation.rewards import personality_weights
+
+    num_fighters = 8
+    # One personality per slot, from passive/cautious to aggressive/reckless
+    personalities = np.stack([
+        personality_weights(aggression=a, risk_tolerance=a, positioning=100 - a, targeting=a, endurance=50)
+        for a in np.linspace(0, 100, num_fighters)
+    ])
+    for num_envs in sweep["envs"]:
+        actions = np.random.default_rng(0).integers(0, 10, size=(num_envs, num_fighters))
+        for rewards in ("base", "personalities"):
+            arena = BatchedArena(num_envs, num_fighters, max_steps=10 ** 9, seed=0)
+            if rewards == "personalities":
+                arena.reward_engine.set_weights(personalities)
+
+            def step(arena=arena, actions=actions):
+                arena.step(actions)
+                arena.reset(np.flatnonzero(arena.dones()))
+
+            yield (
+                "batched_step",
+                {"envs": num_envs, "fighters": num_fighters, "rewards": rewards},
+                step,
+                num_envs * num_fighters,
+            )
+
+
+def env_cases(sweep: Dict[str, List[int]], wanted: Callable[[str], bool]) -> Iterator[Case]:
+    if not (wanted("env_step") or wanted("env_get_observation")):
+        return
+    from rl.environment import WrestlingArenaEnv
+
+    rng = np.random.default_rng(0)
+    for num_enemies in sweep["enemies"]:
+        for num_envs in sweep["envs"] if wanted("env_step") else []:
+            envs = []
+            for i in range(num_envs):
+                env = WrestlingArenaEnv({"seed": i, "max_episode_length": 10 ** 9})
+                env.reset()
+                env.set_game_state(_game_state(rng, num_enemies))
+                envs.append(env)
+            actions = rng.integers(0, 10, size=num_envs).tolist()
+
+            def step(envs=envs, actions=actions):
+                for env, action in zip(envs, actions):
+                    env.step(action)
+
+            yield "env_step", {"envs": num_envs, "enemies": num_enemies}, step, num_envs
+
+        if not wanted("env_get_observation"):
+            continue
+        env = WrestlingArenaEnv({"seed": 0})
+        env.reset()
+        env.set_game_state(_game_state(rng, num_enemies))
+        yield "env_get_observation", {"enemies": num_enemies}, env._get_observation, 1
+
+
+def training_cases(sweep: Dict[str, List[int]], wanted: Callable[[str], bool]) -> Iterator[Case]:
+    if not (wanted("rollout_gae") or wanted("trainer_train_step")):
+        return
+    import torch
+
+    from rl.agent import FighterPolicyNetwork
+    from rl.training import RolloutBuffer, Trainer, TrainingConfig
+
+    for episode_length in sweep["episode_length"] if wanted("rollout_gae") else []:
+        state = _fill_buffer_state(episode_length)
+        buffer = RolloutBuffer()
+        buffer.load_state_dict(state)
+        yield (
+            "rollout_gae",
+            {"episode_length": episode_length},
+            buffer.compute_returns_and_advantages,
+            episode_length,
+        )
+
+    torch.manual_seed(0)
+    for episode_length in sweep["episode_length"] if wanted("trainer_train_step") else []:
+        state = _fill_buffer_state(episode_length)
+        trainer = Trainer(FighterPolicyNetwork(), TrainingConfig(), device=torch.device("cpu"))
+
+        def train_step(trainer=trainer, state=state):
+            # Includes refilling the buffer (train_step clears it); cheap next to PPO epochs
+            trainer.buffer.load_state_dict(state)
+            trainer.train_step()
+
+        yield "trainer_train_step", {"episode_length": episode_length}, train_step, episode_length
+
+
+SUITES = {
+    "arena": arena_cases,
+    "batched": batched_cases,
+    "env": env_cases,
+    "training": training_cases,
+}
+
+
+def run(sweep_name: str = "full", name_filter: str = "", min_time: float = 0.2) -> List[Dict[str, Any]]:
+    """Run every case whose name contains `name_filter` (other cases are never built)"""
+    sweep = SWEEPS[sweep_name]
+    wanted = case_filter(name_filter)
+    results = []
+    for suite in SUITES.values():
+        for name, params, fn, ops_per_call in suite(sweep, wanted):
+            result = measure(name, fn, params=params, ops_per_call=ops_per_call, min_time=min_time)
+            logger.info(f"{result['key']}: {result['us_per_op']:.2f} µs/op")
+            results.append(result)
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulator/training throughput benchmarks")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previous --output file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Relative µs/op increase that counts as a regression (default 0.10)",
+    )
+    parser.add_argument("--quick", action="store_true", help="Small sweep for smoke runs")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    results = run("quick" if args.quick else "full", args.filter, args.min_time)
+    print(format_results(results))
+
+    if args.output:
+        write_results(results, args.output, suite="simulator")
+        logger.info(f"Results written to {args.output}")
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row["status"] == "regression"]
+        if regressions:
+            logger.error(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,12 @@
 """Database module"""
-from database.db import get_db_manager, get_db
+from database.db import get_db_manager, get_db, get_read_db, get_async_db
 from database.models import Base, Fighter, Episode, FightFrame, ModelCheckpoint, TrainingMetrics, FighterProfile, TrainingJob
 
 __all__ = [
     "get_db_manager",
     "get_db",
+    "get_read_db",
+    "get_async_db",
     "Base",
     "Fighter",
     "Episode",
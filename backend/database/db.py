@@ -4,52 +4,117 @@ Database connection and session management
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
 import sqlite3
+import time
 
-from config import DATABASE_URL, DB_PATH
-from database.models import Base
+from config import DATABASE_URL, DB_PATH, ensure_data_dirs
+from database.backends import get_backend
+from utils.metrics import instrument_engine, current_request_stats
 
 
 class DatabaseManager:
-    """Manages database connections and sessions"""
-
-    def __init__(self, db_url: str = DATABASE_URL):
-        # Create engine with SQLite optimizations
-        self.engine = create_engine(
-            db_url,
-            connect_args={"check_same_thread": False},
-            echo=False,
-            pool_pre_ping=True,
-        )
-
-        # Enable foreign key constraints
-        @event.listens_for(self.engine, "connect")
-        def set_sqlite_pragma(dbapi_conn, connection_record):
-            cursor = dbapi_conn.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.execute("PRAGMA journal_mode=WAL")  # Write-ahead logging for concurrency
-            cursor.close()
-
-        # Create session factory
+    """
+    Manages database connections and sessions.
+
+    Two engines share the database: the default one for writes, and a
+    read-only one with its own pool for GET routes, so dashboard reads never
+    wait behind frame ingestion for a pooled connection. Dialect-specific
+    setup (pragmas, pool sizes, partitions, COPY) comes from `self.backend`.
+    """
+
+    def __init__(
+        self,
+        db_url: str = DATABASE_URL,
+        pragmas: Optional[Dict[str, Any]] = None,
+        separate_reads: bool = True,
+    ):
+        ensure_data_dirs()
+        self.backend = get_backend(db_url, pragmas=pragmas)
+
+        # The backend may pin the driver (e.g. psycopg2 for PostgreSQL COPY)
+        self.engine = self._create_engine(self.backend.db_url)
+        if separate_reads and self.backend.supports_separate_reads:
+            self.read_engine = self._create_engine(self.backend.db_url, read_only=True)
+        else:
+            self.read_engine = self.engine
+
+        # Create session factories
         self.SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=self.engine,
         )
+        self.ReadSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=self.read_engine,
+        )
+
+        # Async read engine for `async def` routes, created on first use so
+        # training scripts never need the asyncio drivers
+        self._async_read_engine = None
+        self._async_read_session_factory = None
 
         # Initialize database
         self._initialized = False
 
+    def _create_engine(self, db_url: str, read_only: bool = False):
+        engine = create_engine(db_url, echo=False, **self.backend.engine_kwargs(read_only))
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_conn, connection_record):
+            self.backend.on_connect(dbapi_conn, read_only)
+
+        # Per-request query count/time for /metrics
+        instrument_engine(engine)
+        return engine
+
+    @property
+    def async_read_engine(self):
+        """Read-only asyncio engine (aiosqlite / asyncpg) on the same database"""
+        if self._async_read_engine is None:
+            if not self.backend.supports_async:
+                raise RuntimeError(f"{self.backend.name} database {self.backend.db_url!r} has no async engine")
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            engine = create_async_engine(echo=False, **self.backend.async_engine_kwargs())
+
+            @event.listens_for(engine.sync_engine, "connect")
+            def on_connect(dbapi_conn, connection_record):
+                self.backend.on_connect(dbapi_conn, read_only=True)
+
+            instrument_engine(engine.sync_engine)
+            self._async_read_session_factory = async_sessionmaker(
+                engine, autoflush=False, expire_on_commit=False
+            )
+            self._async_read_engine = engine
+        return self._async_read_engine
+
     def init_db(self):
         """Create all tables"""
         if not self._initialized:
-            Base.metadata.create_all(bind=self.engine)
+            self.backend.create_schema(self.engine)
             self._initialized = True
 
     def get_session(self) -> Session:
         """Get a new database session"""
         return self.SessionLocal()
 
+    def get_read_session(self) -> Session:
+        """Get a session on the read-only engine (writes raise an error)"""
+        return self.ReadSessionLocal()
+
+    def get_async_read_session(self):
+        """AsyncSession on the read-only async engine"""
+        if self._async_read_session_factory is None:
+            _ = self.async_read_engine  # Creates the engine and session factory
+        return self._async_read_session_factory()
+
+    def bulk_insert_frames(self, session: Session, rows: List[Dict[str, Any]]) -> int:
+        """Insert many fight frames in `session`'s transaction (COPY on PostgreSQL)"""
+        return self.backend.bulk_insert_frames(session, rows)
+
     @contextmanager
     def session_scope(self):
         """Context manager for database sessions"""
@@ -66,6 +131,14 @@ class DatabaseManager:
     def close(self):
         """Close all connections"""
         self.engine.dispose()
+        if self.read_engine is not self.engine:
+            self.read_engine.dispose()
+
+    async def close_async(self):
+        """Close the async engine's connections (call from the event loop before `close()`)"""
+        if self._async_read_engine is not None:
+            await self._async_read_engine.dispose()
+            self._async_read_engine = None
 
 
 # Global database manager instance
@@ -81,10 +154,35 @@ def get_db_manager() -> DatabaseManager:
     return _db_manager
 
 
+def _session_dependency(db: Session):
+    start = time.perf_counter()
+    try:
+        yield db
+    finally:
+        db.close()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.session_seconds += time.perf_counter() - start
+
+
 def get_db() -> Session:
     """Dependency injection for FastAPI endpoints"""
-    db = get_db_manager().get_session()
+    yield from _session_dependency(get_db_manager().get_session())
+
+
+def get_read_db() -> Session:
+    """Dependency injection for read-only sync endpoints (inference)"""
+    yield from _session_dependency(get_db_manager().get_read_session())
+
+
+async def get_async_db():
+    """Dependency injection for read-only `async def` endpoints (AsyncSession)"""
+    db = get_db_manager().get_async_read_session()
+    start = time.perf_counter()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+        stats = current_request_stats()
+        if stats is not None:
+            stats.session_seconds += time.perf_counter() - start
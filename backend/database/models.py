@@ -53,6 +53,12 @@ class Episode(Base):
     started_at = Column(DateTime, default=datetime.utcnow, index=True)
     ended_at = Column(DateTime, nullable=True)
 
+    # Frame retention (see database/retention.py)
+    is_flagged = Column(Boolean, default=False, index=True)  # Keep full-resolution frames forever
+    frames_downsampled = Column(String(32), nullable=True)  # Policy applied, e.g. "stride:10"
+    archived_at = Column(DateTime, nullable=True)  # Frames moved to archive_path
+    archive_path = Column(String(512), nullable=True)
+
     # Relationship
     fighter = relationship("Fighter", back_populates="episodes")
     fight_frames = relationship("FightFrame", back_populates="episode")
@@ -123,6 +129,13 @@ class ModelCheckpoint(Base):
     avg_reward = Column(Float, default=0.0)
     total_episodes_trained = Column(Integer, default=0)
 
+    # Tournament ratings (written by rl.tournament)
+    elo = Column(Float, default=1000.0)
+    elo_ci = Column(Float, nullable=True)             # 95% CI half-width
+    win_rate_ci_low = Column(Float, nullable=True)
+    win_rate_ci_high = Column(Float, nullable=True)
+    matches_played = Column(Integer, default=0)
+
     # File path to saved weights
     weights_path = Column(String(255), nullable=False)
 
@@ -190,6 +203,11 @@ class FighterProfile(Base):
     total_episodes = Column(Integer, default=0)
     avg_reward = Column(Float, default=0.0)
 
+    # Tournament ratings (written by rl.tournament)
+    elo = Column(Float, default=1000.0)
+    elo_ci = Column(Float, nullable=True)             # 95% CI half-width
+    matches_played = Column(Integer, default=0)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -234,6 +252,9 @@ class TrainingJob(Base):
     final_win_rate = Column(Float, nullable=True)
     error_message = Column(Text, nullable=True)
 
+    # Phase timings and captured profiles (see utils.profiling)
+    profile_report = Column(JSON, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
@@ -0,0 +1,336 @@
+"""
+Fight frame retention.
+
+`fight_frames` gains one row per sampled frame of every match, and nothing
+else ever removes them. A retention pass thins it by episode age:
+
+- newer than `full_resolution_days`, or flagged (`Episode.is_flagged`):
+  untouched
+- older: downsampled once, keeping every `stride`-th frame plus keyframes
+  ("stride") or keyframes only ("keyframes")
+- older than `archive_days`: all frames written to a columnar `.npz` under
+  `ARCHIVE_DIR`, then deleted from the table (`GET /episodes/{id}/frames`
+  reads them back from the archive)
+
+Keyframes are the first and last frame and every frame where something
+happened: health changed, the action changed, or a non-routine reward (hit,
+knockout, edge or ring-out penalty) was received.
+
+Each pass handles at most `max_episodes` episodes and then returns up to
+`vacuum_pages` freed pages to the filesystem, so a pass never holds the
+writer for long. `start_retention_task()` runs passes periodically from the
+app lifespan; `POST /api/retention/run` runs one on demand.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    ARCHIVE_DIR,
+    RETENTION_ARCHIVE_DAYS,
+    RETENTION_DOWNSAMPLE,
+    RETENTION_FULL_RESOLUTION_DAYS,
+    RETENTION_INTERVAL_SECONDS,
+    RETENTION_MAX_EPISODES,
+    RETENTION_STRIDE,
+    RETENTION_VACUUM_PAGES,
+)
+from database.models import Episode, FightFrame
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DOWNSAMPLE_MODES = ("stride", "keyframes")
+# |reward_delta| at or above this is an event (hit +2, knockout +10, penalties
+# -1/-10); the per-tick survival reward (+0.5) is not
+KEYFRAME_REWARD_THRESHOLD = 1.0
+DELETE_CHUNK = 500  # Ids per DELETE ... WHERE id IN (...)
+
+RETENTION_FRAMES_DELETED = REGISTRY.counter(
+    "arena_retention_frames_deleted_total", "Fight frames removed by retention, by reason",
+    ("reason",),
+)
+RETENTION_EPISODES = REGISTRY.counter(
+    "arena_retention_episodes_total", "Episodes processed by retention, by action",
+    ("action",),
+)
+
+
+@dataclass
+class RetentionPolicy:
+    """What a retention pass keeps (defaults from the RETENTION_* settings)"""
+    full_resolution_days: int = RETENTION_FULL_RESOLUTION_DAYS
+    downsample: str = RETENTION_DOWNSAMPLE  # "stride" or "keyframes"
+    stride: int = RETENTION_STRIDE
+    archive_days: int = RETENTION_ARCHIVE_DAYS  # 0 = never archive
+    max_episodes: int = RETENTION_MAX_EPISODES  # Per pass, archive + downsample
+    vacuum_pages: int = RETENTION_VACUUM_PAGES  # Per pass, 0 = skip
+
+    def __post_init__(self):
+        if self.downsample not in DOWNSAMPLE_MODES:
+            raise ValueError(f"Unknown downsample mode {self.downsample!r}; expected one of {DOWNSAMPLE_MODES}")
+        if self.stride < 1:
+            raise ValueError("stride must be >= 1")
+
+    @property
+    def downsample_label(self) -> str:
+        """Value stored in `Episode.frames_downsampled`"""
+        return f"stride:{self.stride}" if self.downsample == "stride" else "keyframes"
+
+
+def keyframe_mask(
+    health: np.ndarray,
+    rewards: np.ndarray,
+    actions: List[Any],
+) -> np.ndarray:
+    """Boolean mask of keyframes for one episode's frames (in frame order)"""
+    n = len(health)
+    mask = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mask
+    mask[0] = mask[-1] = True
+    mask[1:] |= health[1:] != health[:-1]
+    mask |= np.abs(rewards) >= KEYFRAME_REWARD_THRESHOLD
+    for i in range(1, n):
+        if actions[i] != actions[i - 1]:
+            mask[i] = True
+    return mask
+
+
+def frames_to_keep(frame_numbers: np.ndarray, keyframes: np.ndarray, policy: RetentionPolicy) -> np.ndarray:
+    """
+    Mask of frames kept when downsampling under `policy` (frames in frame
+    order). Stride counts stored rows, not frame numbers: clients sample
+    frames (every 6th, numbered 6k+1), so numbers rarely land on multiples.
+    """
+    if policy.downsample == "keyframes":
+        return keyframes
+    return keyframes | (np.arange(len(frame_numbers)) % policy.stride == 0)
+
+
+# ==================== Archive files ====================
+_VECTOR_COLUMNS = ("fighter_position", "fighter_velocity", "action_vector", "observation_vector")
+
+
+def write_archive(filepath: str, frames: List[FightFrame]):
+    """
+    Write an episode's frames column by column to a compressed .npz.
+
+    Fixed-length vector columns become 2-D float arrays; ragged ones and
+    `enemies_state` are stored as JSON strings.
+    """
+    columns: Dict[str, np.ndarray] = {
+        "id": np.array([f.id for f in frames], dtype=np.int64),
+        "episode_id": np.array([f.episode_id for f in frames], dtype=np.int64),
+        "frame_number": np.array([f.frame_number for f in frames], dtype=np.int64),
+        "timestamp": np.array(
+            [f.timestamp.isoformat() if f.timestamp else "" for f in frames], dtype=np.str_
+        ),
+        "fighter_health": np.array([_float(f.fighter_health) for f in frames]),
+        "reward_delta": np.array([_float(f.reward_delta) for f in frames]),
+        "cumulative_reward": np.array([_float(f.cumulative_reward) for f in frames]),
+        "enemies_state": np.array([json.dumps(f.enemies_state) for f in frames], dtype=np.str_),
+    }
+    for name in _VECTOR_COLUMNS:
+        values = [getattr(f, name) for f in frames]
+        lengths = {len(v) if isinstance(v, list) else -1 for v in values}
+        if len(lengths) == 1 and lengths != {-1}:
+            columns[name] = np.array(values, dtype=np.float64).reshape(len(values), lengths.pop())
+        else:
+            columns[name] = np.array([json.dumps(v) for v in values], dtype=np.str_)
+
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, filepath)
+
+
+def read_archive(filepath: str) -> List[Dict[str, Any]]:
+    """Frames from `write_archive`, as dicts with the `FightFrame` column names"""
+    with np.load(filepath) as data:
+        columns = {name: data[name] for name in data.files}
+
+    decoded: Dict[str, list] = {}
+    for name, values in columns.items():
+        if name == "timestamp":
+            decoded[name] = [datetime.fromisoformat(v) if v else None for v in values]
+        elif values.dtype.kind == "U":
+            decoded[name] = [json.loads(v) for v in values]
+        else:
+            decoded[name] = values.tolist()
+    count = len(decoded["id"])
+    return [{name: values[i] for name, values in decoded.items()} for i in range(count)]
+
+
+def _float(value: Optional[float]) -> float:
+    return float("nan") if value is None else float(value)
+
+
+# ==================== Retention pass ====================
+class RetentionEngine:
+    """Applies a `RetentionPolicy` to the database in bounded passes"""
+
+    def __init__(self, db_manager, policy: Optional[RetentionPolicy] = None, archive_dir: str = str(ARCHIVE_DIR)):
+        self.db_manager = db_manager
+        self.policy = policy or RetentionPolicy()
+        self.archive_dir = archive_dir
+        self.last_pass: Optional[Dict[str, Any]] = None
+        self._warned_vacuum = False
+
+    def run_pass(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """One bounded pass: archive, downsample, incremental vacuum, then partition upkeep"""
+        now = now or datetime.utcnow()
+        start = time.perf_counter()
+        stats = {
+            "archived_episodes": 0, "downsampled_episodes": 0, "frames_deleted": 0,
+            "vacuumed": False, "partitions_dropped": [],
+        }
+
+        budget = self.policy.max_episodes
+        if self.policy.archive_days > 0:
+            cutoff = now - timedelta(days=self.policy.archive_days)
+            for episode_id in self._eligible(cutoff, budget):
+                stats["frames_deleted"] += self._archive(episode_id, now)
+                stats["archived_episodes"] += 1
+            budget -= stats["archived_episodes"]
+
+        if budget > 0:
+            cutoff = now - timedelta(days=self.policy.full_resolution_days)
+            for episode_id in self._eligible(cutoff, budget, skip_downsampled=True):
+                stats["frames_deleted"] += self._downsample(episode_id)
+                stats["downsampled_episodes"] += 1
+
+        if self.policy.vacuum_pages > 0 and stats["frames_deleted"] > 0:
+            stats["vacuumed"] = self.db_manager.backend.incremental_vacuum(
+                self.db_manager.engine, self.policy.vacuum_pages
+            )
+            if not stats["vacuumed"] and not self._warned_vacuum:
+                logger.warning("Incremental vacuum unavailable (SQLite: run VACUUM once to enable auto_vacuum)")
+                self._warned_vacuum = True
+
+        # Partitions ahead of `now` exist before frames arrive; months wholly
+        # past the archive cutoff are dropped once their frames are archived
+        drop_before = now - timedelta(days=self.policy.archive_days) if self.policy.archive_days > 0 else None
+        stats["partitions_dropped"] = self.db_manager.backend.maintain_partitions(
+            self.db_manager.engine, now, drop_before
+        )
+
+        stats["seconds"] = time.perf_counter() - start
+        stats["completed_at"] = now.isoformat()
+        stats["policy"] = asdict(self.policy)
+        self.last_pass = stats
+        if stats["archived_episodes"] or stats["downsampled_episodes"]:
+            logger.info(
+                f"Retention: archived {stats['archived_episodes']}, downsampled "
+                f"{stats['downsampled_episodes']} episodes, deleted {stats['frames_deleted']} frames "
+                f"in {stats['seconds']:.2f}s"
+            )
+        return stats
+
+    def _eligible(self, cutoff: datetime, limit: int, skip_downsampled: bool = False) -> List[int]:
+        """Oldest unflagged, unarchived episodes started before `cutoff`"""
+        with self.db_manager.session_scope() as session:
+            query = session.query(Episode.id).filter(
+                Episode.started_at < cutoff,
+                Episode.is_flagged.isnot(True),
+                Episode.archived_at.is_(None),
+            )
+            if skip_downsampled:
+                query = query.filter(Episode.frames_downsampled.is_(None))
+            return [row.id for row in query.order_by(Episode.started_at.asc()).limit(limit)]
+
+    def _archive(self, episode_id: int, now: datetime) -> int:
+        with self.db_manager.session_scope() as session:
+            episode = session.get(Episode, episode_id)
+            frames = (
+                session.query(FightFrame)
+                .filter(FightFrame.episode_id == episode_id)
+                .order_by(FightFrame.frame_number.asc())
+                .all()
+            )
+            path = None
+            if frames:
+                path = os.path.join(self.archive_dir, f"episode_{episode_id}.npz")
+                write_archive(path, frames)
+            deleted = self._delete(session, [f.id for f in frames])
+            episode.archived_at = now
+            episode.archive_path = path
+
+        RETENTION_FRAMES_DELETED.inc(deleted, reason="archived")
+        RETENTION_EPISODES.inc(action="archived")
+        return deleted
+
+    def _downsample(self, episode_id: int) -> int:
+        with self.db_manager.session_scope() as session:
+            rows = (
+                session.query(
+                    FightFrame.id,
+                    FightFrame.frame_number,
+                    FightFrame.fighter_health,
+                    FightFrame.reward_delta,
+                    FightFrame.action_vector,
+                )
+                .filter(FightFrame.episode_id == episode_id)
+                .order_by(FightFrame.frame_number.asc())
+                .all()
+            )
+            deleted = 0
+            if rows:
+                health = np.array([_float(r.fighter_health) for r in rows])
+                rewards = np.nan_to_num(np.array([_float(r.reward_delta) for r in rows]))
+                frame_numbers = np.array([r.frame_number for r in rows])
+                keep = frames_to_keep(
+                    frame_numbers, keyframe_mask(health, rewards, [r.action_vector for r in rows]), self.policy
+                )
+                deleted = self._delete(session, [r.id for r, k in zip(rows, keep) if not k])
+            session.get(Episode, episode_id).frames_downsampled = self.policy.downsample_label
+
+        RETENTION_FRAMES_DELETED.inc(deleted, reason="downsampled")
+        RETENTION_EPISODES.inc(action="downsampled")
+        return deleted
+
+    @staticmethod
+    def _delete(session, frame_ids: List[int]) -> int:
+        for i in range(0, len(frame_ids), DELETE_CHUNK):
+            chunk = frame_ids[i : i + DELETE_CHUNK]
+            session.query(FightFrame).filter(FightFrame.id.in_(chunk)).delete(synchronize_session=False)
+        return len(frame_ids)
+
+
+# Global engine (created with the app's database manager)
+_retention_engine = None
+
+
+def get_retention_engine() -> RetentionEngine:
+    """Get or create the global retention engine"""
+    global _retention_engine
+    if _retention_engine is None:
+        from database.db import get_db_manager
+
+        _retention_engine = RetentionEngine(get_db_manager())
+    return _retention_engine
+
+
+def start_retention_task(interval: float = RETENTION_INTERVAL_SECONDS) -> asyncio.Task:
+    """
+    Run a retention pass every `interval` seconds in a worker thread (the
+    first one right away). Cancel the returned task on shutdown.
+    """
+    engine = get_retention_engine()
+
+    async def loop():
+        while True:
+            try:
+                await asyncio.to_thread(engine.run_pass)
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}")
+            await asyncio.sleep(interval)
+
+    return asyncio.create_task(loop())
@@ -15,9 +15,15 @@ from datetime import datetime
 from rl.environment import WrestlingArenaEnv
 from rl.training import create_training_session, TrainingConfig
 from rl.agent import AgentCheckpoint
-from config import MODELS_DIR
+from rl.checkpointing import AsyncCheckpointWriter
+from rl.export import export_policy_artifacts
+from rl.tournament import Tournament, Competitor, competitors_from_db, write_results
+from rl.pbt import PopulationTrainer, write_metrics
+from rl.distributed import launch, train_worker
+from config import MODELS_DIR, WEIGHT_SYNC_ENABLED, ensure_data_dirs
 from database import get_db_manager
 from database.models import ModelCheckpoint
+from inference.weight_sync import WeightPublisher
 
 # Setup logging
 logging.basicConfig(
@@ -32,6 +38,7 @@ def train_fighter(
     num_training_epochs: int = 10,
     episodes_per_epoch: int = 50,
     training_mode: str = "survival",
+    resume_from: str = None,
 ):
     """
     Train a fighter agent using reinforcement learning.
@@ -41,8 +48,12 @@ def train_fighter(
         num_training_epochs: Number of training epochs
         episodes_per_epoch: Episodes to collect per epoch
         training_mode: Training objective ("survival", "aggression", etc)
+        resume_from: Optional training-state checkpoint to continue from.
+            A resume checkpoint is written after every epoch, so an
+            interrupted run loses at most one epoch of work.
     """
     logger.info(f"🎯 Starting training for fighter {fighter_id} in {training_mode} mode")
+    ensure_data_dirs()
 
     # Create training configuration
     config = TrainingConfig(
@@ -54,60 +65,119 @@ def train_fighter(
         num_epochs=3,
     )
 
-    # Create trainer
+    # Create trainer (checkpoints are written in the background, last 3 periodic kept)
     trainer = create_training_session(fighter_id, config)
+    trainer.checkpoint_writer = AsyncCheckpointWriter(
+        keep_last=3, rotate_glob=str(MODELS_DIR / f"fighter_{fighter_id}_epoch_*.pth")
+    )
+    # New best policies reach running API workers within a poll interval
+    if WEIGHT_SYNC_ENABLED:
+        trainer.weight_publisher = WeightPublisher(fighter_id)
 
     # Create environment
     env = WrestlingArenaEnv()
 
-    # Training loop
-    best_avg_reward = -float("inf")
-
-    for epoch in range(num_training_epochs):
-        logger.info(f"\n📊 Epoch {epoch + 1}/{num_training_epochs}")
-
-        epoch_rewards = []
-
-        # Collect trajectories
-        for episode in range(episodes_per_epoch):
-            stats = trainer.collect_trajectory(env, max_steps=5000)
-            epoch_rewards.append(stats["episode_reward"])
-
-        # Train on collected data
-        metrics = trainer.train_step()
-
-        # Log metrics
-        avg_reward = sum(epoch_rewards) / len(epoch_rewards)
-        logger.info(f"  Avg Reward: {avg_reward:.2f}")
-        logger.info(f"  Policy Loss: {metrics['policy_loss']:.4f}")
-        logger.info(f"  Value Loss: {metrics['value_loss']:.4f}")
-        logger.info(f"  Entropy: {metrics['entropy']:.4f}")
-
-        # Save best model
-        if avg_reward > best_avg_reward:
-            best_avg_reward = avg_reward
-            checkpoint_path = MODELS_DIR / f"fighter_{fighter_id}_best.pth"
-            trainer.save_checkpoint(
-                str(checkpoint_path),
-                metadata={
-                    "fighter_id": fighter_id,
-                    "epoch": epoch,
-                    "avg_reward": avg_reward,
-                    "training_mode": training_mode,
-                },
-            )
-            logger.info(f"  ✅ New best model saved: {checkpoint_path}")
-
-        # Save periodic checkpoint
-        if (epoch + 1) % 5 == 0:
-            checkpoint_path = MODELS_DIR / f"fighter_{fighter_id}_epoch_{epoch}.pth"
-            trainer.save_checkpoint(str(checkpoint_path))
-            logger.info(f"  💾 Checkpoint saved: {checkpoint_path}")
-
-    logger.info(f"\n🏆 Training completed! Best avg reward: {best_avg_reward:.2f}")
+    resume_path = MODELS_DIR / f"fighter_{fighter_id}_resume.pth"
+    if resume_from:
+        trainer.resume(resume_from)
+        logger.info(f"⏩ Resuming from epoch {trainer.iteration + 1}")
+
+    try:
+        # Training loop
+        for epoch in range(trainer.iteration, num_training_epochs):
+            logger.info(f"\n📊 Epoch {epoch + 1}/{num_training_epochs}")
+
+            epoch_rewards = []
+
+            # Captured by the profiler when "training" profiling is armed
+            with trainer.profiled_iteration():
+                # Collect trajectories
+                for episode in range(episodes_per_epoch):
+                    stats = trainer.collect_trajectory(env, max_steps=5000)
+                    epoch_rewards.append(stats["episode_reward"])
+
+                # Train on collected data
+                metrics = trainer.train_step()
+
+            # Log metrics
+            avg_reward = sum(epoch_rewards) / len(epoch_rewards)
+            logger.info(f"  Avg Reward: {avg_reward:.2f}")
+            logger.info(f"  Policy Loss: {metrics['policy_loss']:.4f}")
+            logger.info(f"  Value Loss: {metrics['value_loss']:.4f}")
+            logger.info(f"  Entropy: {metrics['entropy']:.4f}")
+
+            # Save best model
+            if trainer.update_best_reward(avg_reward):
+                checkpoint_path = MODELS_DIR / f"fighter_{fighter_id}_best.pth"
+                trainer.save_checkpoint(
+                    str(checkpoint_path),
+                    metadata={
+                        "fighter_id": fighter_id,
+                        "epoch": epoch,
+                        "avg_reward": avg_reward,
+                        "training_mode": training_mode,
+                    },
+                )
+                logger.info(f"  ✅ New best model saved: {checkpoint_path}")
+                version = trainer.publish_weights(str(checkpoint_path))
+                if version is not None:
+                    logger.info(f"  📡 Published to serving workers as v{version}")
+
+            # Save periodic checkpoint
+            if (epoch + 1) % 5 == 0:
+                checkpoint_path = MODELS_DIR / f"fighter_{fighter_id}_epoch_{epoch}.pth"
+                trainer.save_checkpoint(str(checkpoint_path), rotate=True)
+                logger.info(f"  💾 Checkpoint saved: {checkpoint_path}")
+
+            # Save resumable training state
+            trainer.save_training_state(str(resume_path))
+
+            # Where the epoch's time went (rollout / gae / ppo_update / checkpoint)
+            phases = trainer.phase_timings(reset=True)
+            logger.info("  Phases: " + ", ".join(
+                f"{name} {p['total_s']:.2f}s ({p['share']:.0%})" for name, p in phases.items()
+            ))
+    finally:
+        # Make sure every queued checkpoint is on disk, even if training failed
+        trainer.checkpoint_writer.close()
+        trainer.checkpoint_writer = None
+        if trainer.weight_publisher is not None:
+            trainer.weight_publisher.close()
+
+    logger.info(f"\n🏆 Training completed! Best avg reward: {trainer.best_reward:.2f}")
     return trainer
 
 
+def train_fighter_distributed(
+    fighter_id: int,
+    world_size: int = 4,
+    num_training_epochs: int = 10,
+    episodes_per_epoch: int = 50,
+    lr_scaling: str = "linear",
+):
+    """
+    Data-parallel variant of `train_fighter`: `world_size` learner processes
+    each collect `episodes_per_epoch // world_size` episodes and average
+    gradients every minibatch.
+    """
+    logger.info(f"🎯 Starting distributed training for fighter {fighter_id} on {world_size} processes")
+    ensure_data_dirs()
+
+    output_path = MODELS_DIR / f"fighter_{fighter_id}_distributed.pth"
+    launch(
+        train_worker,
+        world_size,
+        num_training_epochs,
+        max(1, episodes_per_epoch // world_size),
+        TrainingConfig(),
+        lr_scaling,
+        False,
+        str(output_path),
+    )
+    logger.info(f"✅ Distributed training finished: {output_path}")
+    return output_path
+
+
 def evaluate_agent(
     fighter_id: int,
     model_path: str,
@@ -167,7 +237,14 @@ def register_model_in_database(
     avg_reward: float = 0.0,
     training_mode: str = "survival",
 ):
-    """Register a trained model in the database"""
+    """Register a trained model in the database (exporting serving artifacts first)"""
+    try:
+        artifacts = export_policy_artifacts(str(weights_path))
+        logger.info(f"📦 Exported serving artifacts: {', '.join(artifacts.values())}")
+    except Exception as e:
+        # Serving falls back to the eager model, so registration still proceeds
+        logger.warning(f"⚠️ Artifact export failed for {weights_path}: {e}")
+
     try:
         db_manager = get_db_manager()
         session = db_manager.get_session()
@@ -178,7 +255,7 @@ def register_model_in_database(
             training_iteration=training_iteration,
             weights_path=str(weights_path),
             avg_reward=avg_reward,
-            win_rate=0.0,  # Will be updated by evaluation
+            win_rate=0.0,  # Will be updated by rate_fighter_models
             total_episodes_trained=0,
             training_mode=training_mode,
             created_at=datetime.utcnow(),
@@ -195,18 +272,63 @@ def register_model_in_database(
         return None
 
 
-def compare_models(fighter_id: int, model_paths: list):
-    """Compare performance of multiple model versions"""
+def compare_models(fighter_id: int, model_paths: list, games_per_pair: int = 20):
+    """Compare performance of multiple model versions head-to-head"""
     logger.info(f"\n🏁 Comparing models for fighter {fighter_id}")
 
-    for i, path in enumerate(model_paths):
-        logger.info(f"\nModel {i + 1}: {path}")
-        evaluate_agent(fighter_id, path, num_episodes=5)
+    competitors = [
+        Competitor(key=f"model:{i + 1}", weights_path=str(path))
+        for i, path in enumerate(model_paths)
+    ]
+    ratings = Tournament(competitors, games_per_pair=games_per_pair).run()
+
+    for rating in sorted(ratings, key=lambda r: r.elo, reverse=True):
+        low, high = rating.win_rate_ci
+        logger.info(
+            f"  {rating.competitor.weights_path}: Elo {rating.elo:.0f} ± {rating.elo_ci:.0f}, "
+            f"win rate {rating.win_rate:.1%} [{low:.1%}, {high:.1%}]"
+        )
+    return ratings
+
+
+def rate_fighter_models(fighter_id: int, games_per_pair: int = 20, format: str = "round_robin"):
+    """Run a tournament over a fighter's checkpoints and profiles and store win rates / Elo"""
+    db_manager = get_db_manager()
+    with db_manager.session_scope() as session:
+        competitors = competitors_from_db(session, fighter_id)
+        if len(competitors) < 2:
+            logger.warning(f"⚠️ Need at least two models on disk to rate fighter {fighter_id}")
+            return []
+
+        ratings = Tournament(competitors, games_per_pair=games_per_pair).run(format=format)
+        write_results(session, ratings)
+
+    logger.info(f"✅ Rated {len(ratings)} models for fighter {fighter_id}")
+    return ratings
+
+
+def tune_hyperparameters(fighter_id: int, population_size: int = 16, rounds: int = 12, max_workers: int = None):
+    """Population-based search over TrainingConfig; stores every member's metrics and the best policy"""
+    logger.info(f"\n🧬 Tuning hyperparameters for fighter {fighter_id} ({population_size} members)")
+    ensure_data_dirs()
+
+    search = PopulationTrainer(population_size=population_size, rounds=rounds, max_workers=max_workers)
+    try:
+        best = search.run()
+        with get_db_manager().session_scope() as session:
+            write_metrics(session, fighter_id, search.history, session_id=f"pbt_{datetime.now():%Y%m%d_%H%M%S}")
+        best_path = search.export_best(str(MODELS_DIR / f"fighter_{fighter_id}_pbt.pth"), {"fighter_id": fighter_id})
+    finally:
+        search.cleanup()
+
+    logger.info(f"✅ Best member {best.member_id} (score {best.score:.2f}) saved to {best_path}")
+    logger.info(f"  Config: {best.config}")
+    return best
 
 
 if __name__ == "__main__":
     # Ensure models directory exists
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    ensure_data_dirs()
 
     # Example: Train a fighter
     logger.info("=" * 60)
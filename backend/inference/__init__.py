@@ -0,0 +1,21 @@
+"""Lightweight model-serving runtime (no training dependencies)"""
+from inference.runtime import PolicyRuntime, PolicyCache, get_policy_cache, artifact_path, load_policy, resolve_policy_file
+from inference.numpy_policy import NumpyPolicy
+from inference.warmup import get_serving_state, start_warmup
+from inference.weight_sync import PublishedPolicy, WeightPublisher, WeightSubscriber, get_weight_subscriber
+
+__all__ = [
+    "PolicyRuntime",
+    "NumpyPolicy",
+    "load_policy",
+    "resolve_policy_file",
+    "PolicyCache",
+    "get_policy_cache",
+    "artifact_path",
+    "get_serving_state",
+    "start_warmup",
+    "PublishedPolicy",
+    "WeightPublisher",
+    "WeightSubscriber",
+    "get_weight_subscriber",
+]
@@ -0,0 +1,126 @@
+"""
+Pure-NumPy policy evaluator.
+
+`FighterPolicyNetwork` is a small MLP, so for single observations the torch
+dispatch overhead costs more than the arithmetic. This evaluator runs the same
+network from weights exported by `rl.export.export_numpy_weights`, without
+importing torch.
+
+Layout of the exported weights (all contiguous float32, stored (in, out) so
+the forward pass is `x @ W + b`):
+- trunk_w{i}, trunk_b{i}: shared feature layers (ReLU after each)
+- head_w1, head_b1: policy and value first layers fused side by side
+- head_w2, head_b2: block-diagonal second layer producing
+  [action_logits..., value] in one matmul
+"""
+import io
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from utils.metrics import record_inference
+
+NUMPY_SUFFIX = ".npz"
+
+
+class NumpyPolicy:
+    """Fused float32 MLP matching FighterPolicyNetwork's forward pass"""
+
+    backend = "numpy"
+
+    def __init__(
+        self,
+        trunk: List[Tuple[np.ndarray, np.ndarray]],
+        head_w1: np.ndarray,
+        head_b1: np.ndarray,
+        head_w2: np.ndarray,
+        head_b2: np.ndarray,
+        source_path: str = None,
+    ):
+        self.trunk = [
+            (np.ascontiguousarray(w, dtype=np.float32), np.ascontiguousarray(b, dtype=np.float32))
+            for w, b in trunk
+        ]
+        self.head_w1 = np.ascontiguousarray(head_w1, dtype=np.float32)
+        self.head_b1 = np.ascontiguousarray(head_b1, dtype=np.float32)
+        self.head_w2 = np.ascontiguousarray(head_w2, dtype=np.float32)
+        self.head_b2 = np.ascontiguousarray(head_b2, dtype=np.float32)
+        self.source_path = source_path
+
+        self.observation_size = self.trunk[0][0].shape[0]
+        self.action_size = self.head_w2.shape[1] - 1
+
+    @classmethod
+    def load(cls, filepath: str) -> "NumpyPolicy":
+        """Load weights written by `rl.export.export_numpy_weights`"""
+        with np.load(filepath) as data:
+            return cls.from_arrays(data, source_path=filepath)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, source_path: str = None) -> "NumpyPolicy":
+        """Load weights from an in-memory .npz (e.g. a pushed weight blob)"""
+        with np.load(io.BytesIO(blob)) as data:
+            return cls.from_arrays(data, source_path=source_path)
+
+    @classmethod
+    def from_arrays(cls, data, source_path: str = None) -> "NumpyPolicy":
+        """Build from the array mapping produced by `rl.export.extract_numpy_weights`"""
+        num_trunk = int(data["num_trunk_layers"])
+        trunk = [(data[f"trunk_w{i}"], data[f"trunk_b{i}"]) for i in range(num_trunk)]
+        return cls(
+            trunk,
+            data["head_w1"],
+            data["head_b1"],
+            data["head_w2"],
+            data["head_b2"],
+            source_path=source_path,
+        )
+
+    def forward(self, observations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw forward pass.
+
+        Args:
+            observations: array of shape (30,) or (batch_size, 30)
+
+        Returns:
+            (action_logits, values) with a leading batch dimension only if the
+            input had one
+        """
+        x = np.asarray(observations, dtype=np.float32)
+        for w, b in self.trunk:
+            x = x @ w
+            x += b
+            np.maximum(x, 0.0, out=x)
+
+        x = x @ self.head_w1
+        x += self.head_b1
+        np.maximum(x, 0.0, out=x)
+
+        out = x @ self.head_w2
+        out += self.head_b2
+        return out[..., : self.action_size], out[..., self.action_size]
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        z = logits - logits.max(axis=-1, keepdims=True)
+        np.exp(z, out=z)
+        z /= z.sum(axis=-1, keepdims=True)
+        return z
+
+    def evaluate_batch(self, observations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Evaluate (batch_size, 30) observations -> (action_probs, values)"""
+        start = time.perf_counter()
+        logits, values = self.forward(observations)
+        probs = self._softmax(logits)
+        record_inference(self.backend, len(logits), time.perf_counter() - start)
+        return probs, values
+
+    def evaluate(self, observation) -> Tuple[np.ndarray, float]:
+        """Evaluate a single observation of shape (30,)"""
+        start = time.perf_counter()
+        logits, value = self.forward(observation)
+        probs = self._softmax(logits)
+        record_inference(self.backend, 1, time.perf_counter() - start)
+        return probs, float(value)
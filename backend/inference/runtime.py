@@ -0,0 +1,225 @@
+"""
+Lean policy runtime for serving.
+
+Loads the artifacts exported next to a registered checkpoint (see `rl.export`)
+and evaluates them without importing the training stack (`rl.training`,
+optimizers, gymnasium):
+- "numpy": pure-NumPy evaluator, torch is never imported
+- "torchscript": frozen TorchScript module
+- "int8": dynamically quantized TorchScript module (opt-in per request)
+Falls back to rebuilding the Python `FighterPolicyNetwork` when no
+artifact exists yet or the artifacts are older than the `.pth`.
+"""
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Tuple, Optional
+
+import numpy as np
+
+from config import INFERENCE_BACKEND, INFERENCE_QUANTIZED
+from inference.numpy_policy import NumpyPolicy, NUMPY_SUFFIX
+from utils.metrics import INFERENCE_CACHE, record_inference
+
+logger = logging.getLogger(__name__)
+
+TORCHSCRIPT_SUFFIX = ".ts.pt"
+ONNX_SUFFIX = ".onnx"
+INT8_TORCHSCRIPT_SUFFIX = ".int8.ts.pt"
+INT8_REPORT_SUFFIX = ".int8.json"
+
+
+def artifact_path(weights_path: str, suffix: str) -> str:
+    """Path of an exported artifact living next to a `.pth` checkpoint"""
+    path = Path(weights_path)
+    return str(path.with_name(path.stem + suffix))
+
+
+def fresh_artifact(weights_path: str, suffix: str) -> Optional[str]:
+    """
+    Path of an exported artifact, or None if it is missing or older than the
+    checkpoint (the `.pth` was rewritten without re-exporting)
+    """
+    path = artifact_path(weights_path, suffix)
+    if not os.path.exists(path):
+        return None
+    if os.path.exists(weights_path) and os.path.getmtime(path) < os.path.getmtime(weights_path):
+        logger.info(f"{path} is older than {weights_path}, ignoring it")
+        return None
+    return path
+
+
+def resolve_policy_file(weights_path: str, backend: str = "auto", quantized: bool = False) -> Tuple[str, str]:
+    """
+    The file `load_policy` serves for a checkpoint.
+
+    Returns:
+        (kind, path) with kind "int8", "numpy", "torchscript" or "eager"
+    """
+    if quantized:
+        int8_path = fresh_artifact(weights_path, INT8_TORCHSCRIPT_SUFFIX)
+        if int8_path:
+            return "int8", int8_path
+        logger.info(f"No up-to-date int8 artifact for {weights_path}, serving fp32")
+
+    if backend in ("auto", "numpy"):
+        npz_path = fresh_artifact(weights_path, NUMPY_SUFFIX)
+        if npz_path:
+            return "numpy", npz_path
+        if backend == "numpy":
+            logger.info(f"No up-to-date NumPy weights for {weights_path}, using torch runtime")
+
+    ts_path = fresh_artifact(weights_path, TORCHSCRIPT_SUFFIX)
+    if ts_path:
+        return "torchscript", ts_path
+    return "eager", weights_path
+
+
+def load_policy(weights_path: str, backend: str = "auto", quantized: bool = False):
+    """
+    Load the serving policy for a checkpoint.
+
+    Exported artifacts older than the `.pth` are skipped, so a checkpoint
+    rewritten in place (e.g. a new best model) is served as written.
+
+    Args:
+        weights_path: path to the registered `.pth` checkpoint
+        backend: "numpy", "torchscript" or "auto" (numpy if exported, else torch)
+        quantized: serve the int8 variant if it was exported (overrides backend)
+
+    Returns:
+        NumpyPolicy or PolicyRuntime (same evaluate/evaluate_batch interface)
+    """
+    kind, path = resolve_policy_file(weights_path, backend, quantized)
+    if kind == "int8":
+        return PolicyRuntime.load_quantized(path)
+    if kind == "numpy":
+        return NumpyPolicy.load(path)
+    return PolicyRuntime.load(weights_path)
+
+
+class PolicyRuntime:
+    """A loaded, inference-only torch policy: observation(s) in, (probs, value) out"""
+
+    def __init__(self, module, backend: str, source_path: str):
+        self.module = module
+        self.backend = backend
+        self.source_path = source_path
+
+    @classmethod
+    def load(cls, weights_path: str) -> "PolicyRuntime":
+        """Load the TorchScript artifact for a checkpoint"""
+        import torch
+
+        ts_path = fresh_artifact(weights_path, TORCHSCRIPT_SUFFIX)
+        if ts_path:
+            module = torch.jit.load(ts_path, map_location="cpu")
+            module.eval()
+            return cls(module, "torchscript", ts_path)
+
+        # No exported artifact yet (registered before export existed, or rewritten since)
+        from rl.agent import AgentCheckpoint
+
+        logger.info(f"No up-to-date TorchScript artifact for {weights_path}, loading eager model")
+        return cls(AgentCheckpoint.load(weights_path), "eager", weights_path)
+
+    @classmethod
+    def load_quantized(cls, int8_path: str) -> "PolicyRuntime":
+        """Load an int8 TorchScript artifact"""
+        import torch
+
+        module = torch.jit.load(int8_path, map_location="cpu")
+        module.eval()
+        return cls(module, "int8", int8_path)
+
+    def evaluate_batch(self, observations: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate a batch of observations.
+
+        Args:
+            observations: array of shape (batch_size, 30)
+
+        Returns:
+            (action_probs, values) with shapes (batch_size, 10) and (batch_size,)
+        """
+        import torch
+
+        start = time.perf_counter()
+        obs_tensor = torch.from_numpy(np.ascontiguousarray(observations, dtype=np.float32))
+        with torch.inference_mode():
+            logits, values = self.module(obs_tensor)
+            probs = torch.softmax(logits, dim=-1)
+        record_inference(self.backend, len(obs_tensor), time.perf_counter() - start)
+        return probs.numpy(), values.reshape(-1).numpy()
+
+    def evaluate(self, observation) -> Tuple[np.ndarray, float]:
+        """Evaluate a single observation of shape (30,)"""
+        probs, values = self.evaluate_batch(np.asarray(observation, dtype=np.float32)[None, :])
+        return probs[0], float(values[0])
+
+
+class PolicyCache:
+    """
+    Process-wide cache of loaded policies keyed by checkpoint path.
+
+    Entries are invalidated when the checkpoint (or its artifact) changes on
+    disk, so a re-registered model is picked up without a restart. fp32 and
+    int8 variants of the same checkpoint are cached separately.
+    """
+
+    def __init__(self, backend: str = INFERENCE_BACKEND):
+        self.backend = backend
+        self._entries: Dict[Tuple[str, bool], Tuple[float, PolicyRuntime]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime(weights_path: str) -> Optional[float]:
+        mtimes = [
+            os.path.getmtime(p)
+            for p in (
+                weights_path,
+                artifact_path(weights_path, TORCHSCRIPT_SUFFIX),
+                artifact_path(weights_path, NUMPY_SUFFIX),
+                artifact_path(weights_path, INT8_TORCHSCRIPT_SUFFIX),
+            )
+            if os.path.exists(p)
+        ]
+        return max(mtimes) if mtimes else None
+
+    def get(self, weights_path: str, quantized: bool = INFERENCE_QUANTIZED) -> Optional[PolicyRuntime]:
+        """Get a loaded policy, or None if the checkpoint doesn't exist"""
+        mtime = self._mtime(weights_path)
+        if mtime is None:
+            INFERENCE_CACHE.inc(result="missing")
+            return None
+
+        key = (weights_path, quantized)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                INFERENCE_CACHE.inc(result="hit")
+                return entry[1]
+
+        INFERENCE_CACHE.inc(result="miss")
+        runtime = load_policy(weights_path, self.backend, quantized=quantized)
+        with self._lock:
+            self._entries[key] = (mtime, runtime)
+        return runtime
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global policy cache instance
+_policy_cache = None
+
+
+def get_policy_cache() -> PolicyCache:
+    """Get or create the global policy cache"""
+    global _policy_cache
+    if _policy_cache is None:
+        _policy_cache = PolicyCache()
+    return _policy_cache
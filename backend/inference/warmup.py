@@ -0,0 +1,128 @@
+"""
+Startup preloading for the serving path.
+
+The first inference request for a checkpoint used to pay for importing torch,
+loading the artifact and the first (slow) forward pass. `start_warmup()` does
+that in a background thread when the app starts: it loads the policies the
+inference route will ask for (each fighter's best checkpoint and every
+profile model) into the policy cache and runs dummy forward passes. The
+`/ready` endpoint reports ready only once this has finished, so a load
+balancer can hold traffic off a cold worker while CRUD routes already work.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import INFERENCE_QUANTIZED, PRELOAD_MAX_MODELS
+from inference.runtime import get_policy_cache
+
+logger = logging.getLogger(__name__)
+
+WARMUP_PASSES = 3  # TorchScript optimizes the graph over the first couple of runs
+OBSERVATION_SIZE = 30
+
+
+class ServingState:
+    """Readiness of the model-serving path"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.warmup_seconds: Optional[float] = None
+        self.models: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, str]] = []
+
+    def mark_ready(self):
+        self.finished_at = datetime.utcnow()
+        self.ready = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "warmup_seconds": self.warmup_seconds,
+            "models_loaded": len(self.models),
+            "models": self.models,
+            "errors": self.errors,
+        }
+
+
+_serving_state = ServingState()
+
+
+def get_serving_state() -> ServingState:
+    return _serving_state
+
+
+def serving_model_paths(session, limit: int = PRELOAD_MAX_MODELS) -> List[str]:
+    """Weights paths the inference route resolves to: best checkpoint per fighter, then profiles"""
+    from database.models import Fighter, FighterProfile, ModelCheckpoint
+
+    paths = []
+    for (fighter_id,) in session.query(Fighter.id).order_by(Fighter.id).all():
+        best = session.query(ModelCheckpoint.weights_path).filter(
+            ModelCheckpoint.fighter_id == fighter_id
+        ).order_by(ModelCheckpoint.win_rate.desc()).first()
+        if best is not None:
+            paths.append(best[0])
+
+    for (model_path,) in session.query(FighterProfile.model_path).filter(
+        FighterProfile.model_path.isnot(None)
+    ).all():
+        paths.append(model_path)
+
+    # De-duplicate, keep order
+    return list(dict.fromkeys(paths))[:limit]
+
+
+def warm_up(db_manager, quantized: bool = INFERENCE_QUANTIZED, limit: int = PRELOAD_MAX_MODELS) -> ServingState:
+    """Load and warm the serving policies (blocking)"""
+    state = _serving_state
+    state.started_at = datetime.utcnow()
+    start = time.perf_counter()
+
+    try:
+        with db_manager.session_scope() as session:
+            paths = serving_model_paths(session, limit)
+    except Exception as e:
+        logger.warning(f"Could not list models to preload: {e}")
+        state.errors.append({"path": "", "error": str(e)})
+        paths = []
+
+    cache = get_policy_cache()
+    dummy = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+    for path in paths:
+        model_start = time.perf_counter()
+        try:
+            policy = cache.get(path, quantized=quantized)
+            if policy is None:
+                continue  # Registered but not on disk (e.g. simulated training jobs)
+            for _ in range(WARMUP_PASSES):
+                policy.evaluate(dummy)
+        except Exception as e:
+            logger.warning(f"Preloading {path} failed: {e}")
+            state.errors.append({"path": path, "error": str(e)})
+            continue
+        state.models.append({
+            "path": path,
+            "backend": policy.backend,
+            "load_ms": (time.perf_counter() - model_start) * 1000.0,
+        })
+
+    state.warmup_seconds = time.perf_counter() - start
+    state.mark_ready()
+    logger.info(f"✅ Serving warm-up done: {len(state.models)} models in {state.warmup_seconds:.2f}s")
+    return state
+
+
+def start_warmup(db_manager) -> threading.Thread:
+    """Run `warm_up` in a background thread so startup isn't blocked"""
+    thread = threading.Thread(target=warm_up, args=(db_manager,), name="serving-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,478 @@
+"""
+Push-based policy distribution from a learner to serving workers.
+
+A learner publishes versioned weight blobs (the `NumpyPolicy` layout as an
+uncompressed .npz, plus version, publish time and the checkpoint it was
+saved as, if any) on a channel per fighter profile. Serving workers watch the channels they have been asked for and swap
+new versions in from a background thread, so the inference route never reads
+the disk or restarts to pick up a fresh policy.
+
+Transports (`WEIGHT_SYNC_TRANSPORT`):
+- "shm": a POSIX shared memory segment per channel guarded by a seqlock
+  (header: magic, sequence, version, length). Workers check the version
+  field on each poll and copy the blob only when it changed.
+- "file": `<WEIGHT_SYNC_DIR>/<channel>.npz`, replaced atomically. Workers
+  watch its mtime.
+- "auto" (default): the learner writes both. Workers read shared memory
+  and use the file when they can't attach (learner gone, other host mount,
+  no /dev/shm) or it holds a newer version (learner restarted).
+
+A pushed policy is served instead of the registered checkpoint only while
+it is the newer of the two (`PublishedPolicy.supersedes`). Workers watch at
+most `WEIGHT_SYNC_MAX_WATCHES` channels, dropping the least recently used.
+
+A swap replaces a single `PublishedPolicy` reference. A request or batch
+that already fetched its policy finishes on that version, and the next one
+sees the new version.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    WEIGHT_SYNC_DIR,
+    WEIGHT_SYNC_MAX_WATCHES,
+    WEIGHT_SYNC_POLL_SECONDS,
+    WEIGHT_SYNC_SHM_BYTES,
+    WEIGHT_SYNC_TRANSPORT,
+)
+from inference.numpy_policy import NumpyPolicy
+from utils.metrics import WEIGHT_SYNC_LAG, WEIGHT_SYNC_PUBLISHES, WEIGHT_SYNC_SWAPS
+
+logger = logging.getLogger(__name__)
+
+TRANSPORTS = ("auto", "shm", "file")
+DEFAULT_PROFILE = "default"
+
+# Shared memory header: magic, seqlock sequence (odd while writing), version, payload length
+SHM_MAGIC = b"ARENAWS1"
+SHM_HEADER = struct.Struct("<8sQQQ")
+SEQ_OFFSET = 8
+SEQLOCK_RETRIES = 100
+
+
+class PublishedPolicy(NamedTuple):
+    """A pushed policy as served: swapped in and out as one reference"""
+    policy: NumpyPolicy
+    version: int
+    published_at: float  # Learner's time.time() at publish
+    source: str  # "shm" or "file"
+    checkpoint_path: Optional[str] = None  # Checkpoint the learner saved these weights as
+    checkpoint_mtime: Optional[float] = None  # Its mtime when they were published
+
+    def supersedes(self, weights_path: Optional[str]) -> bool:
+        """Whether to serve this policy instead of the registered checkpoint at `weights_path`"""
+        if not weights_path:
+            return True
+        try:
+            mtime = os.path.getmtime(weights_path)
+        except OSError:
+            return True  # Registered but not on disk
+        same_file = (
+            self.checkpoint_path is not None
+            and os.path.abspath(self.checkpoint_path) == os.path.abspath(weights_path)
+        )
+        if same_file and self.checkpoint_mtime is not None:
+            # Pushed from this checkpoint: stale once the file is rewritten
+            return mtime <= self.checkpoint_mtime
+        return self.published_at >= mtime
+
+
+def channel_name(fighter_id: int, profile_name: str = DEFAULT_PROFILE) -> str:
+    """Channel (and file stem) for a fighter profile"""
+    profile = re.sub(r"[^A-Za-z0-9_-]", "_", profile_name or DEFAULT_PROFILE)
+    return f"fighter_{fighter_id}_{profile}"
+
+
+def _shm_name(channel: str) -> str:
+    # POSIX shared memory names are short on some platforms (31 chars on macOS)
+    return "arena_ws_" + hashlib.sha1(channel.encode()).hexdigest()[:16]
+
+
+def encode_blob(
+    arrays: Dict[str, np.ndarray],
+    version: int,
+    published_at: float,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_mtime: Optional[float] = None,
+) -> bytes:
+    meta = {"__version__": np.array(version), "__published_at__": np.array(published_at)}
+    if checkpoint_path is not None:
+        meta["__checkpoint_path__"] = np.array(checkpoint_path)
+    if checkpoint_mtime is not None:
+        meta["__checkpoint_mtime__"] = np.array(checkpoint_mtime)
+    buffer = io.BytesIO()
+    np.savez(buffer, **meta, **arrays)
+    return buffer.getvalue()
+
+
+def decode_blob(blob: bytes, source: str, channel: str) -> PublishedPolicy:
+    """The `PublishedPolicy` in a blob read from `source` ("shm" or "file")"""
+    with np.load(io.BytesIO(blob)) as data:
+        policy = NumpyPolicy.from_arrays(data, source_path=f"{source}:{channel}")
+        return PublishedPolicy(
+            policy,
+            int(data["__version__"]),
+            float(data["__published_at__"]),
+            source,
+            str(data["__checkpoint_path__"]) if "__checkpoint_path__" in data else None,
+            float(data["__checkpoint_mtime__"]) if "__checkpoint_mtime__" in data else None,
+        )
+
+
+def _blob_version(blob: bytes) -> int:
+    with np.load(io.BytesIO(blob)) as data:
+        return int(data["__version__"])
+
+
+def _write_file_atomic(filepath: str, blob: bytes):
+    """Temp file + fsync + rename (torch-free counterpart of rl.checkpointing.atomic_write)"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filepath)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _attach_segment(name: str) -> Optional[shared_memory.SharedMemory]:
+    """Attach to an existing segment without taking ownership (None if absent)"""
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return None
+    # Attaching registers the segment with this process's resource tracker,
+    # which would unlink it at exit; only the publisher owns it
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+
+def _segment_version(buf) -> Optional[int]:
+    magic, seq, version, _ = SHM_HEADER.unpack_from(buf, 0)
+    if magic != SHM_MAGIC:
+        return None
+    return version
+
+
+def _read_segment(buf) -> Optional[Tuple[int, bytes]]:
+    """Seqlock read: (version, blob), or None if the segment is empty or kept changing"""
+    for _ in range(SEQLOCK_RETRIES):
+        magic, seq, version, length = SHM_HEADER.unpack_from(buf, 0)
+        if magic != SHM_MAGIC or length == 0:
+            return None
+        if seq & 1:
+            time.sleep(0)  # Writer in progress
+            continue
+        blob = bytes(buf[SHM_HEADER.size:SHM_HEADER.size + length])
+        if struct.unpack_from("<Q", buf, SEQ_OFFSET)[0] == seq:
+            return version, blob
+    return None
+
+
+def _write_segment(buf, version: int, blob: bytes):
+    if SHM_HEADER.size + len(blob) > len(buf):
+        raise ValueError(f"Weight blob of {len(blob)} bytes exceeds the {len(buf)}-byte segment")
+    magic, seq, _, _ = SHM_HEADER.unpack_from(buf, 0)
+    if magic != SHM_MAGIC:
+        seq = 0
+    seq += seq & 1  # Recover from a writer that died mid-write
+    struct.pack_into("<Q", buf, SEQ_OFFSET, seq + 1)
+    buf[SHM_HEADER.size:SHM_HEADER.size + len(blob)] = blob
+    SHM_HEADER.pack_into(buf, 0, SHM_MAGIC, seq + 1, version, len(blob))
+    struct.pack_into("<Q", buf, SEQ_OFFSET, seq + 2)
+
+
+class WeightPublisher:
+    """
+    Learner side of a channel: publishes successive policy versions.
+
+    Versions continue from whatever the channel already holds, so a
+    restarted learner never publishes a version workers consider stale.
+    The shared memory segment is owned by this process and unlinked on
+    `close()` (or at exit); workers already attached keep their mapping and
+    the file stays for late workers.
+    """
+
+    def __init__(
+        self,
+        fighter_id: int,
+        profile_name: str = DEFAULT_PROFILE,
+        transport: str = WEIGHT_SYNC_TRANSPORT,
+        directory: str = WEIGHT_SYNC_DIR,
+        shm_bytes: int = WEIGHT_SYNC_SHM_BYTES,
+    ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown weight sync transport {transport!r}; expected one of {TRANSPORTS}")
+        self.channel = channel_name(fighter_id, profile_name)
+        self.transport = transport
+        self.file_path = os.path.join(str(directory), f"{self.channel}.npz")
+        self.segment: Optional[shared_memory.SharedMemory] = None
+
+        if transport in ("auto", "shm"):
+            name = _shm_name(self.channel)
+            try:
+                self.segment = shared_memory.SharedMemory(name=name, create=True, size=shm_bytes)
+            except FileExistsError:
+                # Left behind by a learner that died; take it over
+                self.segment = shared_memory.SharedMemory(name=name)
+            except OSError as e:
+                if transport == "shm":
+                    raise
+                logger.warning(f"Shared memory unavailable for {self.channel} ({e}); publishing to file only")
+
+        self.version = self._current_version()
+        self._lock = threading.Lock()
+
+    def _current_version(self) -> int:
+        versions = [0]
+        if self.segment is not None:
+            versions.append(_segment_version(self.segment.buf) or 0)
+        if self.transport != "shm" and os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "rb") as f:
+                    versions.append(_blob_version(f.read()))
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable weight file {self.file_path}: {e}")
+        return max(versions)
+
+    def publish(self, weights, checkpoint_path: Optional[str] = None) -> int:
+        """
+        Publish a new version.
+
+        Args:
+            weights: a `FighterPolicyNetwork` or the array mapping of
+                `rl.export.extract_numpy_weights`
+            checkpoint_path: checkpoint these weights were saved as, if any.
+                Workers stop serving the push once that file is rewritten.
+
+        Returns:
+            The published version number
+        """
+        if not isinstance(weights, dict):
+            from rl.export import extract_numpy_weights
+
+            weights = extract_numpy_weights(weights)
+
+        with self._lock:
+            version = self.version + 1
+            checkpoint_mtime = None
+            if checkpoint_path is not None and os.path.exists(checkpoint_path):
+                checkpoint_mtime = os.path.getmtime(checkpoint_path)
+            blob = encode_blob(weights, version, time.time(), checkpoint_path, checkpoint_mtime)
+            if self.segment is not None:
+                try:
+                    _write_segment(self.segment.buf, version, blob)
+                    WEIGHT_SYNC_PUBLISHES.inc(transport="shm")
+                except ValueError as e:
+                    if self.transport == "shm":
+                        raise
+                    logger.warning(f"{e}; publishing {self.channel} v{version} to file only")
+            if self.transport != "shm":
+                _write_file_atomic(self.file_path, blob)
+                WEIGHT_SYNC_PUBLISHES.inc(transport="file")
+            self.version = version
+
+        logger.info(f"Published {self.channel} v{version} ({len(blob) / 1024:.0f} KiB)")
+        return version
+
+    def close(self, unlink: bool = True):
+        if self.segment is None:
+            return
+        self.segment.close()
+        if unlink:
+            self.segment.unlink()
+        self.segment = None
+
+
+class _Watch:
+    """Per-channel subscriber state"""
+
+    def __init__(self, channel: str, file_path: str):
+        self.channel = channel
+        self.shm_name = _shm_name(channel)
+        self.file_path = file_path
+        self.segment: Optional[shared_memory.SharedMemory] = None
+        self.file_mtime_ns: Optional[int] = None
+        self.current: Optional[PublishedPolicy] = None
+
+    @property
+    def version(self) -> int:
+        return self.current.version if self.current is not None else 0
+
+    def close(self):
+        if self.segment is not None:
+            try:
+                self.segment.close()
+            except BufferError:
+                pass  # Mid-read by the poll thread; unmapped when collected
+            self.segment = None
+
+
+class WeightSubscriber:
+    """
+    Serving side: the latest pushed policy per channel.
+
+    `get()` is a dict lookup. A channel is watched from the first time it is
+    asked for (that first call loads it synchronously). From then on a
+    background thread (`start()`) checks it every `poll_seconds`. Past
+    `max_watches` channels, the least recently asked for is dropped.
+    """
+
+    def __init__(
+        self,
+        directory: str = WEIGHT_SYNC_DIR,
+        poll_seconds: float = WEIGHT_SYNC_POLL_SECONDS,
+        transport: str = WEIGHT_SYNC_TRANSPORT,
+        max_watches: int = WEIGHT_SYNC_MAX_WATCHES,
+    ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown weight sync transport {transport!r}; expected one of {TRANSPORTS}")
+        self.directory = str(directory)
+        self.poll_seconds = poll_seconds
+        self.transport = transport
+        self.max_watches = max_watches
+        self._watches: "OrderedDict[str, _Watch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self, fighter_id: int, profile_name: str = DEFAULT_PROFILE) -> Optional[PublishedPolicy]:
+        """Latest published policy for a fighter profile, or None if nothing was pushed"""
+        channel = channel_name(fighter_id, profile_name)
+        watch = self._watches.get(channel)
+        if watch is None:
+            with self._lock:
+                watch = self._watches.get(channel)
+                if watch is None:
+                    watch = _Watch(channel, os.path.join(self.directory, f"{channel}.npz"))
+                    self._refresh(watch)
+                    self._watches[channel] = watch
+                    while len(self._watches) > self.max_watches:
+                        _, evicted = self._watches.popitem(last=False)
+                        evicted.close()
+                    return watch.current
+        try:
+            self._watches.move_to_end(channel)
+        except KeyError:
+            pass  # Evicted meanwhile; still fine to serve this once
+        return watch.current
+
+    def poll(self) -> int:
+        """Check every watched channel once; returns the number of swaps"""
+        swaps = 0
+        for watch in list(self._watches.values()):
+            try:
+                swaps += self._refresh(watch)
+            except Exception as e:
+                logger.warning(f"Weight sync poll failed for {watch.channel}: {e}")
+        return swaps
+
+    def _refresh(self, watch: _Watch) -> int:
+        swaps = 0
+        if self.transport in ("auto", "shm"):
+            if watch.segment is None:
+                watch.segment = _attach_segment(watch.shm_name)
+            if watch.segment is not None:
+                version = _segment_version(watch.segment.buf)
+                if version is not None and version > watch.version:
+                    read = _read_segment(watch.segment.buf)
+                    if read is not None:
+                        swaps += self._swap(watch, read[1], "shm")
+
+        if self.transport in ("auto", "file"):
+            try:
+                mtime_ns = os.stat(watch.file_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime_ns = None
+            if mtime_ns is not None and mtime_ns != watch.file_mtime_ns:
+                watch.file_mtime_ns = mtime_ns
+                with open(watch.file_path, "rb") as f:
+                    blob = f.read()
+                if _blob_version(blob) > watch.version:
+                    swaps += self._swap(watch, blob, "file")
+                    # Shared memory is behind the file: our mapping is of a
+                    # segment a dead learner left, so re-attach next poll
+                    watch.close()
+        return swaps
+
+    def _swap(self, watch: _Watch, blob: bytes, source: str) -> int:
+        published = decode_blob(blob, source, watch.channel)
+        if published.version <= watch.version:
+            return 0
+        watch.current = published
+        WEIGHT_SYNC_SWAPS.inc(source=source)
+        WEIGHT_SYNC_LAG.observe(max(time.time() - published.published_at, 0.0), source=source)
+        logger.info(f"Swapped in {watch.channel} v{published.version} from {source}")
+        return 1
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll()
+
+    def start(self) -> threading.Thread:
+        """Poll watched channels in a background thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weight-sync", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1.0)
+            self._thread = None
+        with self._lock:
+            for watch in self._watches.values():
+                watch.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "transport": self.transport,
+            "poll_seconds": self.poll_seconds,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "max_watches": self.max_watches,
+            "channels": {
+                channel: {
+                    "version": watch.version,
+                    "source": watch.current.source if watch.current else None,
+                    "published_at": watch.current.published_at if watch.current else None,
+                    "checkpoint_path": watch.current.checkpoint_path if watch.current else None,
+                    "shm_attached": watch.segment is not None,
+                }
+                for channel, watch in list(self._watches.items())
+            },
+        }
+
+
+# Global subscriber instance
+_weight_subscriber = None
+
+
+def get_weight_subscriber() -> WeightSubscriber:
+    """Get or create the global weight subscriber"""
+    global _weight_subscriber
+    if _weight_subscriber is None:
+        _weight_subscriber = WeightSubscriber()
+    return _weight_subscriber
@@ -2,14 +2,21 @@
 Main FastAPI application for the wrestling arena backend.
 Connects the game frontend with the RL training system.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 from datetime import datetime
 
-from database import get_db_manager
+from sqlalchemy import func
+
+from config import PRELOAD_MODELS, RETENTION_ENABLED, WEIGHT_SYNC_ENABLED, ensure_data_dirs
+from database import get_db_manager, TrainingJob
+from database.retention import start_retention_task
 from api import router
+from api.middleware import CompressionMiddleware, MetricsMiddleware
+from inference import get_serving_state, get_weight_subscriber, start_warmup
+from utils.metrics import REGISTRY, CONTENT_TYPE, TRAINING_JOBS
 
 # Setup logging
 logging.basicConfig(
@@ -24,13 +31,32 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Manage app lifecycle: startup and shutdown events"""
     # Startup
+    ensure_data_dirs()
     db_manager = get_db_manager()
     db_manager.init_db()
     logger.info("✅ Database initialized")
 
+    # Load + warm serving policies off the startup path; /ready flips when done
+    if PRELOAD_MODELS:
+        start_warmup(db_manager)
+    else:
+        get_serving_state().mark_ready()
+
+    # Thin old fight frames in the background (bounded work per pass)
+    retention_task = start_retention_task() if RETENTION_ENABLED else None
+
+    # Swap in policies pushed by a learner as new versions appear
+    if WEIGHT_SYNC_ENABLED:
+        get_weight_subscriber().start()
+
     yield
 
     # Shutdown
+    if WEIGHT_SYNC_ENABLED:
+        get_weight_subscriber().stop()
+    if retention_task is not None:
+        retention_task.cancel()
+    await db_manager.close_async()
     db_manager.close()
     logger.info("Database connection closed")
 
@@ -53,6 +79,14 @@ app.add_middleware(
 )
 
 
+# gzip/zstd request and response bodies (inside the metrics middleware, so
+# the recorded body sizes are what went over the wire)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route request metrics (served at /metrics)
+app.add_middleware(MetricsMiddleware)
+
+
 # Include API routes
 app.include_router(router, prefix="/api")
 
@@ -90,6 +124,42 @@ async def health_root():
         }
 
 
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness probe: 503 until serving policies are loaded and warmed"""
+    state = get_serving_state()
+    if not state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if state.ready else "warming_up", **state.to_dict()}
+
+
+def _update_training_queue_depth():
+    """Refresh training job counts from the database on each scrape"""
+    try:
+        with get_db_manager().session_scope() as session:
+            counts = dict(
+                session.query(TrainingJob.status, func.count(TrainingJob.id))
+                .group_by(TrainingJob.status)
+                .all()
+            )
+    except Exception as e:
+        logger.warning(f"Could not read training job counts: {e}")
+        return
+    for job_status in ("pending", "in_progress", "completed", "failed"):
+        TRAINING_JOBS.set(counts.pop(job_status, 0), status=job_status)
+    for job_status, count in counts.items():
+        TRAINING_JOBS.set(count, status=job_status or "unknown")
+
+
+REGISTRY.add_collect_hook(_update_training_queue_depth)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     from config import HOST, PORT, DEBUG
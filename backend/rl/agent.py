@@ -3,9 +3,11 @@ Neural network agent for fighting strategy learning
 """
 import torch
 import torch.nn as nn
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Any
 import numpy as np
 
+from rl.checkpointing import atomic_save
+
 
 class FighterPolicyNetwork(nn.Module):
     """
@@ -130,13 +132,9 @@ class AgentCheckpoint:
     """Manages saving and loading agent checkpoints"""
 
     @staticmethod
-    def save(
-        model: FighterPolicyNetwork,
-        filepath: str,
-        metadata: dict = None,
-    ):
-        """Save model checkpoint"""
-        checkpoint = {
+    def build(model: FighterPolicyNetwork, metadata: dict = None) -> Dict[str, Any]:
+        """Build the checkpoint dict for a model (without writing it)"""
+        return {
             "model_state_dict": model.state_dict(),
             "model_config": {
                 "observation_size": model.observation_size,
@@ -145,7 +143,15 @@ class AgentCheckpoint:
             },
             "metadata": metadata or {},
         }
-        torch.save(checkpoint, filepath)
+
+    @staticmethod
+    def save(
+        model: FighterPolicyNetwork,
+        filepath: str,
+        metadata: dict = None,
+    ):
+        """Save model checkpoint (atomically: temp file + rename)"""
+        atomic_save(AgentCheckpoint.build(model, metadata), filepath)
 
     @staticmethod
     def load(filepath: str, device: torch.device = torch.device("cpu")) -> FighterPolicyNetwork:
@@ -163,3 +169,31 @@ class AgentCheckpoint:
         model.eval()
 
         return model
+
+    @staticmethod
+    def build_training_state(state: Dict[str, Any]) -> Dict[str, Any]:
+        """Tag a trainer state dict as a training-state checkpoint"""
+        checkpoint = dict(state)
+        checkpoint["format"] = "training_state"
+        return checkpoint
+
+    @staticmethod
+    def save_training_state(state: Dict[str, Any], filepath: str):
+        """
+        Save a full training-state checkpoint.
+
+        Unlike `save`, the state holds everything needed to continue a run:
+        model and optimizer state dicts, trainer config, iteration counter,
+        best reward and the RNG states (see `Trainer.get_training_state`).
+        """
+        atomic_save(AgentCheckpoint.build_training_state(state), filepath)
+
+    @staticmethod
+    def load_training_state(filepath: str, device: torch.device = torch.device("cpu")) -> Dict[str, Any]:
+        """Load a full training-state checkpoint saved by `save_training_state`"""
+        # RNG states contain numpy arrays and Python tuples, so the restricted
+        # weights-only unpickler can't be used here.
+        checkpoint = torch.load(filepath, map_location=device, weights_only=False)
+        if checkpoint.get("format") != "training_state":
+            raise ValueError(f"{filepath} is not a training-state checkpoint")
+        return checkpoint
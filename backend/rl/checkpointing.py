@@ -0,0 +1,178 @@
+"""
+Atomic, non-blocking checkpoint writing.
+
+Checkpoints are snapshotted in memory on the caller's thread, serialized on a
+background thread, written to a temporary file in the target directory and
+moved into place with `os.replace`. Readers (e.g. the inference route) only
+ever see a complete old file or a complete new file.
+"""
+import os
+import glob
+import tempfile
+import threading
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_state(obj: Any) -> Any:
+    """
+    Deep-copy a (nested) checkpoint structure, moving tensors to CPU.
+
+    The copy is detached from the live model/optimizer, so training can keep
+    mutating parameters while the snapshot is being serialized.
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot_state(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [snapshot_state(value) for value in obj]
+    if isinstance(obj, tuple):
+        return tuple(snapshot_state(value) for value in obj)
+    return obj
+
+
+def atomic_write(filepath: str, write_fn: Callable[[str], Any]):
+    """
+    Write a file atomically: `write_fn(tmp_path)` fills a temp file in the
+    target directory, which is fsynced and renamed over `filepath`.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filepath)}.", suffix=".tmp", dir=directory
+    )
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_save(obj: Any, filepath: str):
+    """torch.save `obj` to `filepath` atomically"""
+    atomic_write(filepath, lambda tmp_path: torch.save(obj, tmp_path))
+
+
+class AsyncCheckpointWriter:
+    """
+    Background checkpoint writer.
+
+    `write()` snapshots the checkpoint and returns immediately; a single
+    worker thread performs the atomic writes. Pending writes to the same path
+    are coalesced (latest wins), so a slow disk never makes the queue grow.
+
+    Rotation: the last `keep_last` distinct rotated paths are kept, older
+    ones are deleted. Fixed-name files such as the best model or the resume
+    state are written with `rotate=False` and never deleted. Pass
+    `rotate_glob` (e.g. ".../fighter_1_epoch_*.pth") to include rotated files
+    left on disk by an earlier run, oldest first by mtime, so a resumed run
+    keeps pruning them.
+    """
+
+    def __init__(self, keep_last: int = 3, rotate_glob: Optional[str] = None):
+        self.keep_last = keep_last
+
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._recent = deque()
+        if rotate_glob:
+            self._recent.extend(sorted(glob.glob(rotate_glob), key=os.path.getmtime))
+        self._cond = threading.Condition()
+        self._busy = False
+        self._writing: Optional[str] = None
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="checkpoint-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, checkpoint: Dict[str, Any], filepath: str, rotate: bool = True):
+        """Queue a checkpoint for writing (non-blocking apart from the memory snapshot)"""
+        self._raise_pending_error()
+        snapshot = snapshot_state(checkpoint)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Checkpoint writer is closed")
+            filepath = str(filepath)
+            self._pending.pop(filepath, None)
+            self._pending[filepath] = {"checkpoint": snapshot, "rotate": rotate}
+            self._cond.notify()
+
+    def flush(self):
+        """Block until every queued checkpoint is on disk"""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+        self._raise_pending_error()
+
+    def wait(self, filepath: str):
+        """Block until the checkpoint queued for `filepath` (if any) is on disk"""
+        filepath = str(filepath)
+        with self._cond:
+            while filepath in self._pending or self._writing == filepath:
+                self._cond.wait()
+        self._raise_pending_error()
+
+    def close(self):
+        """Flush outstanding writes and stop the worker thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_pending_error()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Background checkpoint write failed") from error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                filepath, job = self._pending.popitem(last=False)
+                self._busy = True
+                self._writing = filepath
+
+            try:
+                atomic_save(job["checkpoint"], filepath)
+                if job["rotate"]:
+                    self._rotate(filepath)
+            except BaseException as e:
+                logger.error(f"Checkpoint write to {filepath} failed: {e}")
+                self._error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._writing = None
+                    self._cond.notify_all()
+
+    def _rotate(self, filepath: str):
+        """Delete rotated checkpoints older than the last `keep_last`"""
+        if filepath in self._recent:
+            self._recent.remove(filepath)
+        self._recent.append(filepath)
+
+        while len(self._recent) > self.keep_last:
+            stale = self._recent.popleft()
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
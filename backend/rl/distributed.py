@@ -0,0 +1,212 @@
+"""
+Data-parallel PPO across processes.
+
+Each learner process (rank) collects its own rollout shard into its own
+`RolloutBuffer`. All ranks run the same PPO update, and the gradients of
+every minibatch are averaged with an all-reduce before the optimizer step.
+Ranks start from rank 0's weights and apply identical averaged gradients,
+so the model replicas stay in sync without exchanging weights.
+
+Uses `torch.distributed` with the gloo backend (CPU). On one machine,
+`launch()` spawns the ranks. Across nodes, start the same script with
+`torchrun` and call `setup()` with the default `env://` rendezvous.
+
+Scaling (`scaled_config`):
+- default: every rank uses `batch_size`, so the global batch is
+  `batch_size * world_size`. The learning rate is scaled by `lr_scaling`
+  ("linear": x world_size, "sqrt": x sqrt(world_size), "none").
+- `global_batch=True`: `batch_size` is the global batch, split across
+  ranks, and the learning rate is left as configured.
+"""
+import math
+import socket
+import logging
+from dataclasses import replace
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from rl.agent import FighterPolicyNetwork
+from rl.environment import WrestlingArenaEnv
+from rl.training import Trainer, TrainingConfig
+from simulation.seeding import SeedTree
+
+logger = logging.getLogger(__name__)
+
+LR_SCALING = ("linear", "sqrt", "none")
+
+
+def scaled_config(
+    config: TrainingConfig,
+    world_size: int,
+    lr_scaling: str = "linear",
+    global_batch: bool = False,
+) -> TrainingConfig:
+    """Per-rank TrainingConfig for `world_size` learners (see module docstring)"""
+    if lr_scaling not in LR_SCALING:
+        raise ValueError(f"Unknown lr_scaling {lr_scaling!r}; expected one of {LR_SCALING}")
+    if global_batch:
+        return replace(config, batch_size=max(1, math.ceil(config.batch_size / world_size)))
+    factor = {"linear": world_size, "sqrt": math.sqrt(world_size), "none": 1.0}[lr_scaling]
+    return replace(config, learning_rate=config.learning_rate * factor)
+
+
+class DistributedTrainer(Trainer):
+    """
+    `Trainer` for one rank of a data-parallel run.
+
+    Requires an initialized default process group (`setup()` / `launch()`).
+    Only rank 0 writes checkpoints and publishes weights.
+    """
+
+    def __init__(self, model: FighterPolicyNetwork, config: TrainingConfig = None, **kwargs):
+        kwargs.setdefault("device", torch.device("cpu"))
+        super().__init__(model, config, **kwargs)
+        self.rank = dist.get_rank()
+        self.world_size = dist.get_world_size()
+        self._sync_parameters()
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+    def _sync_parameters(self):
+        """Start every replica from rank 0's weights"""
+        with torch.no_grad():
+            for tensor in self.model.state_dict().values():
+                dist.broadcast(tensor, src=0)
+
+    def _num_batches(self) -> int:
+        """
+        Minibatches per epoch, agreed across ranks: every rank must join
+        every all-reduce, so all ranks run as many minibatches as the
+        smallest shard has. Each epoch reshuffles, so the leftover samples
+        of larger shards are still used across epochs.
+        """
+        count = torch.tensor([super()._num_batches()], dtype=torch.int64)
+        dist.all_reduce(count, op=dist.ReduceOp.MIN)
+        return int(count.item())
+
+    def _apply_gradients(self):
+        """Average gradients across ranks (one flat all-reduce), then clip and step"""
+        params = [p for p in self.model.parameters() if p.requires_grad]
+        for p in params:
+            if p.grad is None:
+                p.grad = torch.zeros_like(p)
+        flat = torch.cat([p.grad.reshape(-1) for p in params])
+        dist.all_reduce(flat)
+        flat /= self.world_size
+        offset = 0
+        for p in params:
+            n = p.numel()
+            p.grad.copy_(flat[offset:offset + n].view_as(p.grad))
+            offset += n
+        super()._apply_gradients()
+
+    def train_step(self) -> Dict[str, float]:
+        """PPO update on every rank's shard; metrics are averaged over ranks"""
+        metrics = super().train_step()
+        values = torch.tensor([metrics[key] for key in sorted(metrics)], dtype=torch.float64)
+        dist.all_reduce(values)
+        values /= self.world_size
+        return {key: float(value) for key, value in zip(sorted(metrics), values)}
+
+    def all_mean(self, value: float) -> float:
+        """Mean of a per-rank scalar (e.g. average episode reward) over all ranks"""
+        tensor = torch.tensor([value], dtype=torch.float64)
+        dist.all_reduce(tensor)
+        return float(tensor.item()) / self.world_size
+
+    def save_checkpoint(self, filepath: str, metadata: dict = None, rotate: bool = False):
+        if self.is_main:
+            super().save_checkpoint(filepath, metadata, rotate)
+
+    def save_training_state(self, filepath: str):
+        if self.is_main:
+            super().save_training_state(filepath)
+
+    def publish_weights(self, checkpoint_path: str = None) -> Optional[int]:
+        return super().publish_weights(checkpoint_path) if self.is_main else None
+
+
+def setup(rank: int = None, world_size: int = None, init_method: str = "env://"):
+    """
+    Join the gloo process group. With `env://` (torchrun) the rank, world
+    size and master address come from the environment.
+    """
+    kwargs = {} if rank is None else {"rank": rank, "world_size": world_size}
+    dist.init_process_group("gloo", init_method=init_method, **kwargs)
+    logger.info(f"Rank {dist.get_rank()}/{dist.get_world_size()} joined the process group")
+
+
+def cleanup():
+    if dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_rank(rank: int, fn: Callable, world_size: int, init_method: str, args: tuple):
+    torch.set_num_threads(1)  # One core per rank
+    setup(rank, world_size, init_method)
+    try:
+        fn(rank, world_size, *args)
+    finally:
+        cleanup()
+
+
+def launch(fn: Callable, world_size: int, *args: Any, port: int = None):
+    """
+    Run `fn(rank, world_size, *args)` in `world_size` local processes, each
+    already in the process group. `fn` must be importable (module level).
+    """
+    init_method = f"tcp://127.0.0.1:{port or _free_port()}"
+    mp.spawn(_run_rank, args=(fn, world_size, init_method, args), nprocs=world_size, join=True)
+
+
+def train_worker(
+    rank: int,
+    world_size: int,
+    num_iterations: int = 10,
+    episodes_per_iteration: int = 50,
+    config: TrainingConfig = None,
+    lr_scaling: str = "linear",
+    global_batch: bool = False,
+    output_path: str = None,
+    seed: int = 0,
+):
+    """
+    One rank of a data-parallel run on `WrestlingArenaEnv`
+    (`episodes_per_iteration` is per rank). Rank 0 saves the final model to
+    `output_path`.
+    """
+    seeds = SeedTree(seed).derive("rank", rank)
+    torch.manual_seed(seeds.derive("torch").int_seed())
+    np.random.seed(seeds.derive("numpy").int_seed() % 2**32)
+
+    config = scaled_config(config or TrainingConfig(), world_size, lr_scaling, global_batch)
+    trainer = DistributedTrainer(FighterPolicyNetwork(), config)
+    env = WrestlingArenaEnv({"seed": seeds.derive("env").int_seed()})
+
+    for iteration in range(num_iterations):
+        rewards = [
+            trainer.collect_trajectory(env, max_steps=5000)["episode_reward"]
+            for _ in range(episodes_per_iteration)
+        ]
+        metrics = trainer.train_step()
+        avg_reward = trainer.all_mean(float(np.mean(rewards)))
+        if trainer.is_main:
+            logger.info(
+                f"Iteration {iteration + 1}/{num_iterations}: avg reward {avg_reward:.2f}, "
+                f"policy loss {metrics['policy_loss']:.4f} ({world_size} ranks)"
+            )
+
+    if output_path:
+        trainer.save_checkpoint(output_path, {"world_size": world_size, "iterations": num_iterations})
@@ -1,12 +1,23 @@
 """
 PufferLib environment wrapper for the wrestling arena
 """
+import math
+
 import numpy as np
 from typing import Dict, List, Tuple, Any
 import gymnasium as gym
 from gymnasium import spaces
 
 from config import AGENT_CONFIG, ARENA_CONFIG
+from simulation.rewards import ENV_REWARD_WEIGHTS, NUM_TERMS, TERM_INDEX, profile_weights, weights_from_dict
+
+SURVIVAL = TERM_INDEX["survival"]
+DAMAGE_TAKEN = TERM_INDEX["damage_taken"]
+ATTACK_ATTEMPTS = TERM_INDEX["attack_attempts"]
+NEAR_EDGE = TERM_INDEX["near_edge"]
+CENTER_DISTANCE = TERM_INDEX["center_distance"]
+MOVEMENT = TERM_INDEX["movement"]
+KNOCKED_OUT = TERM_INDEX["knocked_out"]
 
 
 class WrestlingArenaEnv(gym.Env):
@@ -25,6 +36,11 @@ class WrestlingArenaEnv(gym.Env):
 
     Action Space:
     - 8 directions (WASD + diagonals) + idle + attack = 10 actions
+
+    Rewards are shaped by `simulation.rewards` (`ENV_REWARD_WEIGHTS` by
+    default). Config keys:
+    - "personality": traits dict or FighterProfile -> `profile_weights`
+    - "reward_weights": a weight vector, or {term: weight} overrides
     """
 
     metadata = {"render_modes": ["human", "rgb_array"], "render_fps": 60}
@@ -37,6 +53,10 @@ class WrestlingArenaEnv(gym.Env):
         self.ring_size = self.config.get("ring_size", ARENA_CONFIG["ring_size"])
         self.max_episode_length = self.config.get("max_episode_length", 5000)
 
+        # Seed for the first reset (e.g. SeedTree(...).derive("env", i).int_seed());
+        # afterwards the env keeps its own generator (self.np_random)
+        self._initial_seed = self.config.get("seed")
+
         # Observation space: 30-dimensional vector
         self.observation_space = spaces.Box(
             low=-np.inf,
@@ -60,12 +80,29 @@ class WrestlingArenaEnv(gym.Env):
         # Reward tracking
         self.cumulative_reward = 0.0
         self.last_health = 100.0
+        self.reward_weights = self._reward_weights()
+        self._reward_terms = np.zeros(NUM_TERMS)
+
+    def _reward_weights(self) -> np.ndarray:
+        weights = ENV_REWARD_WEIGHTS
+        if self.config.get("personality") is not None:
+            weights = profile_weights(self.config["personality"], base=ENV_REWARD_WEIGHTS)
+        custom = self.config.get("reward_weights")
+        if isinstance(custom, dict):
+            weights = weights_from_dict(custom, base=weights)
+        elif custom is not None:
+            weights = np.asarray(custom, dtype=np.float64)
+        if weights.shape != (NUM_TERMS,):
+            raise ValueError(f"Reward weights need {NUM_TERMS} terms, got shape {weights.shape}")
+        return weights
 
     def reset(self, *, seed=None, options=None):
         """
         Reset the environment for a new episode.
         In real usage, this would be called with game state from the arena.
         """
+        if seed is None and self._initial_seed is not None:
+            seed, self._initial_seed = self._initial_seed, None
         super().reset(seed=seed)
 
         # Initialize fighter state
@@ -107,7 +144,7 @@ class WrestlingArenaEnv(gym.Env):
         move_action, attack_action = self._decode_action(action)
 
         # Calculate reward for this step
-        reward = self._calculate_reward(attack_action)
+        reward = self._calculate_reward(move_action, attack_action)
 
         # Check termination conditions
         terminated = not self.fighter_state["alive"]
@@ -184,42 +221,32 @@ class WrestlingArenaEnv(gym.Env):
 
         return move, attack
 
-    def _calculate_reward(self, attack_action: bool) -> float:
+    def _calculate_reward(self, move_action: Tuple[float, float], attack_action: bool) -> float:
         """
-        Calculate reward for this step.
+        Calculate reward for this step from the reward terms and weights.
 
-        Reward structure:
-        - +2: Successful attack on opponent
+        Default weights (`ENV_REWARD_WEIGHTS`):
         - +1: Each frame survived
-        - -1: Taking damage
-        - -3: Getting knocked to edge (risky position)
-        - -5: Knocked out of ring (died)
+        - +0.5: Attack attempt (hits would be confirmed by arena)
+        - -1 per health point: Taking damage
+        - -1: Within 5 units of the ring edge (risky position)
+        - -10: Knocked out (died)
         """
-        reward = 1.0  # Survival reward
-
-        # Penalize damage taken
-        health_delta = self.fighter_state["health"] - self.last_health
-        if health_delta < 0:
-            reward += health_delta  # Negative reward for taking damage
-
-        # Reward for attacking (would be confirmed by arena)
-        if attack_action:
-            reward += 0.5  # Attempt bonus
-
-        # Penalize being near edge
-        pos = self.fighter_state["position"]
-        distance_to_edge = min(
-            abs(pos[0]) - (self.ring_size / 2 - 5),
-            abs(pos[1]) - (self.ring_size / 2 - 5),
-        )
-        if distance_to_edge > 0:
-            reward -= 1.0
-
-        # Check if knocked out
-        if not self.fighter_state["alive"]:
-            reward -= 10.0
-
-        return reward
+        # Single fighter: plain Python scalars + one dot product (the array
+        # machinery of RewardEngine costs more than it saves at this size)
+        terms = self._reward_terms
+        x, z = float(self.fighter_state["position"][0]), float(self.fighter_state["position"][1])
+        half = self.ring_size / 2
+
+        terms[SURVIVAL] = 1.0
+        terms[DAMAGE_TAKEN] = max(self.last_health - self.fighter_state["health"], 0.0)
+        terms[ATTACK_ATTEMPTS] = attack_action
+        terms[NEAR_EDGE] = abs(x) > half - 5 or abs(z) > half - 5
+        terms[CENTER_DISTANCE] = math.hypot(x, z) / half
+        terms[MOVEMENT] = move_action != (0.0, 0.0)
+        terms[KNOCKED_OUT] = not self.fighter_state["alive"]
+
+        return float(terms @ self.reward_weights)
 
     def _get_info(self) -> Dict[str, Any]:
         """Get additional info for debugging/logging"""
@@ -0,0 +1,285 @@
+"""
+Export trained policies to serving artifacts.
+
+Every registered checkpoint gets a frozen, traced TorchScript module, a
+NumPy weight file for the torch-free evaluator, an int8 dynamically quantized
+TorchScript variant with its accuracy report (and an ONNX graph when the
+exporter is available) written next to its `.pth` file.
+The serving side loads these with `inference.runtime` and never has to import
+the training code.
+"""
+import io
+import json
+import logging
+from typing import Any, Dict, Iterable
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from rl.agent import FighterPolicyNetwork, AgentCheckpoint
+from rl.checkpointing import atomic_write
+from rl.self_play import sample_actions
+from simulation.arena import HeadlessArena
+from simulation.seeding import SeedTree
+from inference.runtime import (
+    artifact_path,
+    TORCHSCRIPT_SUFFIX,
+    ONNX_SUFFIX,
+    INT8_TORCHSCRIPT_SUFFIX,
+    INT8_REPORT_SUFFIX,
+)
+from inference.numpy_policy import NUMPY_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+
+def _example_input(model: FighterPolicyNetwork) -> torch.Tensor:
+    return torch.zeros(1, model.observation_size, dtype=torch.float32)
+
+
+def export_torchscript(model: FighterPolicyNetwork, filepath: str) -> str:
+    """Trace and freeze the policy, then save it as TorchScript"""
+    model = model.cpu().eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, _example_input(model))
+        frozen = torch.jit.freeze(traced)
+
+    atomic_write(filepath, lambda tmp: torch.jit.save(frozen, tmp))
+    return filepath
+
+
+def export_onnx(model: FighterPolicyNetwork, filepath: str) -> str:
+    """Export the policy as an ONNX graph with a dynamic batch dimension"""
+    model = model.cpu().eval()
+
+    def write(tmp_path):
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                _example_input(model),
+                tmp_path,
+                input_names=["observation"],
+                output_names=["action_logits", "value"],
+                dynamic_axes={
+                    "observation": {0: "batch"},
+                    "action_logits": {0: "batch"},
+                    "value": {0: "batch"},
+                },
+            )
+
+    atomic_write(filepath, write)
+    return filepath
+
+
+def extract_numpy_weights(model: FighterPolicyNetwork) -> Dict[str, np.ndarray]:
+    """
+    Convert a policy into the fused float32 layout used by `NumpyPolicy`.
+
+    Weights are transposed to (in, out); the two head input layers are
+    concatenated and the two head output layers are packed block-diagonally.
+    """
+    def linears(seq: nn.Sequential):
+        return [m for m in seq if isinstance(m, nn.Linear)]
+
+    def wb(layer: nn.Linear):
+        w = layer.weight.detach().cpu().numpy().T
+        b = layer.bias.detach().cpu().numpy()
+        return np.ascontiguousarray(w, dtype=np.float32), np.ascontiguousarray(b, dtype=np.float32)
+
+    arrays = {}
+    trunk = linears(model.feature_layers)
+    arrays["num_trunk_layers"] = np.array(len(trunk))
+    for i, layer in enumerate(trunk):
+        arrays[f"trunk_w{i}"], arrays[f"trunk_b{i}"] = wb(layer)
+
+    policy_1, policy_2 = linears(model.policy_head)
+    value_1, value_2 = linears(model.value_head)
+
+    pw1, pb1 = wb(policy_1)
+    vw1, vb1 = wb(value_1)
+    arrays["head_w1"] = np.ascontiguousarray(np.concatenate([pw1, vw1], axis=1))
+    arrays["head_b1"] = np.ascontiguousarray(np.concatenate([pb1, vb1]))
+
+    pw2, pb2 = wb(policy_2)
+    vw2, vb2 = wb(value_2)
+    head_w2 = np.zeros((pw2.shape[0] + vw2.shape[0], pw2.shape[1] + 1), dtype=np.float32)
+    head_w2[: pw2.shape[0], : pw2.shape[1]] = pw2
+    head_w2[pw2.shape[0] :, pw2.shape[1] :] = vw2
+    arrays["head_w2"] = head_w2
+    arrays["head_b2"] = np.concatenate([pb2, vb2]).astype(np.float32)
+
+    return arrays
+
+
+def export_numpy_weights(model: FighterPolicyNetwork, filepath: str) -> str:
+    """Write the NumPy evaluator weights as an uncompressed .npz"""
+    arrays = extract_numpy_weights(model)
+
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+
+    atomic_write(filepath, write)
+    return filepath
+
+
+def quantize_policy(model: FighterPolicyNetwork) -> nn.Module:
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations quantized on the fly)"""
+    model = model.cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def _serialized_size(module: nn.Module) -> int:
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def rollout_observations(
+    model: FighterPolicyNetwork,
+    num_samples: int = 4096,
+    num_fighters: int = 4,
+    max_steps: int = 500,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Observations the policy actually sees: `HeadlessArena` self-play with
+    every fighter sampling from `model`, until `num_samples` are collected
+    """
+    seeds = SeedTree(seed)
+    rng = seeds.derive("actions").generator()
+    arena = HeadlessArena(max_steps=max_steps, seed=seeds.derive("arena").int_seed())
+    model = model.cpu().eval()
+
+    observations = []
+    collected = 0
+    while collected < num_samples:
+        arena.reset()
+        for fighter_id in range(num_fighters):
+            arena.add_fighter(fighter_id)
+        while not arena.is_done() and collected < num_samples:
+            acting = [f for f in range(num_fighters) if arena.fighters[f].alive]
+            batch = np.stack([arena.get_observation(f) for f in acting]).astype(np.float32)
+            with torch.no_grad():
+                probs = torch.softmax(model(torch.from_numpy(batch))[0], dim=-1).numpy()
+            actions = sample_actions(probs, rng)
+            arena.step(dict(zip(acting, actions.tolist())))
+            observations.append(batch)
+            collected += len(batch)
+    return np.concatenate(observations)[:num_samples]
+
+
+def quantization_report(
+    fp32_model: FighterPolicyNetwork,
+    int8_model: nn.Module,
+    observations: np.ndarray = None,
+    num_samples: int = 4096,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Compare an int8 policy against its fp32 source.
+
+    Args:
+        observations: evaluation inputs of shape (N, 30); defaults to
+            `num_samples` observations from `HeadlessArena` self-play rollouts
+            of the fp32 policy (`rollout_observations`)
+
+    Returns:
+        Dict with greedy action-agreement rate, value errors, model sizes and
+        `observation_source` ("headless_arena_rollouts" or "caller")
+    """
+    source = "caller"
+    if observations is None:
+        observations = rollout_observations(fp32_model, num_samples=num_samples, seed=seed)
+        source = "headless_arena_rollouts"
+
+    obs_tensor = torch.from_numpy(np.ascontiguousarray(observations, dtype=np.float32))
+    with torch.no_grad():
+        fp32_logits, fp32_values = fp32_model.cpu().eval()(obs_tensor)
+        int8_logits, int8_values = int8_model(obs_tensor)
+
+    agreement = (fp32_logits.argmax(dim=-1) == int8_logits.argmax(dim=-1)).float().mean()
+    value_error = (fp32_values - int8_values).abs()
+    prob_error = (torch.softmax(fp32_logits, -1) - torch.softmax(int8_logits, -1)).abs()
+
+    return {
+        "num_samples": int(obs_tensor.shape[0]),
+        "observation_source": source,
+        "action_agreement": float(agreement),
+        "value_mae": float(value_error.mean()),
+        "value_max_error": float(value_error.max()),
+        "action_prob_max_error": float(prob_error.max()),
+        "size_bytes_fp32": _serialized_size(fp32_model),
+        "size_bytes_int8": _serialized_size(int8_model),
+    }
+
+
+def export_quantized(model: FighterPolicyNetwork, filepath: str, report_path: str = None) -> str:
+    """Quantize, trace and freeze the policy; optionally write its accuracy report as JSON"""
+    quantized = quantize_policy(model)
+    with torch.no_grad():
+        traced = torch.jit.trace(quantized, _example_input(model))
+        frozen = torch.jit.freeze(traced)
+
+    atomic_write(filepath, lambda tmp: torch.jit.save(frozen, tmp))
+
+    if report_path:
+        report = quantization_report(model, quantized)
+
+        def write(tmp_path):
+            with open(tmp_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+        atomic_write(report_path, write)
+        logger.info(
+            f"int8 policy: {report['action_agreement']:.2%} action agreement, "
+            f"value MAE {report['value_mae']:.4f}"
+        )
+    return filepath
+
+
+def export_policy_artifacts(
+    weights_path: str,
+    formats: Iterable[str] = ("torchscript", "numpy", "int8", "onnx"),
+) -> Dict[str, str]:
+    """
+    Export serving artifacts next to a `.pth` checkpoint.
+
+    TorchScript and NumPy failures propagate (serving depends on them); the
+    int8 variant and ONNX are optional and skipped with a warning on failure
+    (e.g. no quantized engine on this CPU, or no ONNX exporter).
+
+    Returns:
+        Dict mapping format name to the written artifact path
+    """
+    model = AgentCheckpoint.load(weights_path)
+    written = {}
+
+    if "torchscript" in formats:
+        written["torchscript"] = export_torchscript(
+            model, artifact_path(weights_path, TORCHSCRIPT_SUFFIX)
+        )
+
+    if "numpy" in formats:
+        written["numpy"] = export_numpy_weights(
+            model, artifact_path(weights_path, NUMPY_SUFFIX)
+        )
+
+    if "int8" in formats:
+        try:
+            written["int8"] = export_quantized(
+                model,
+                artifact_path(weights_path, INT8_TORCHSCRIPT_SUFFIX),
+                report_path=artifact_path(weights_path, INT8_REPORT_SUFFIX),
+            )
+        except Exception as e:
+            logger.warning(f"int8 export skipped for {weights_path}: {e}")
+
+    if "onnx" in formats:
+        try:
+            written["onnx"] = export_onnx(model, artifact_path(weights_path, ONNX_SUFFIX))
+        except Exception as e:
+            logger.warning(f"ONNX export skipped for {weights_path}: {e}")
+
+    return written
@@ -0,0 +1,316 @@
+"""
+Multi-personality training in one batched run.
+
+Instead of one `TrainingJob` per `FighterProfile`, several personalities
+share a single `BatchedArena`. Every slot is a learner, and slots are dealt
+round-robin to the personalities, so each personality fights all the others.
+Each slot's rewards are shaped by its personality's weight vector (see
+`simulation.rewards`) and land in that personality's rollout buffer.
+
+Two model layouts:
+- "separate": one `FighterPolicyNetwork` + `Trainer` (optimizer, buffer)
+  per personality; one batched forward pass per personality per tick
+- "conditioned": one shared network whose input is the observation plus the
+  personality's five traits (scaled to 0-1); one forward pass per tick and
+  one PPO update over all personalities' experience
+
+Simulation and action selection are paid once for all personalities, so
+the extra cost per personality is mostly its PPO update. A conditioned
+policy folds into a plain 30-input `FighterPolicyNetwork` per personality
+(the trait inputs become a first-layer bias), so the checkpoints work with
+the existing serving and export code.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from rl.agent import AgentCheckpoint, FighterPolicyNetwork
+from rl.training import RolloutBuffer, Trainer, TrainingConfig
+from simulation.batched import BatchedArena, OBSERVATION_SIZE
+from simulation.rewards import PERSONALITY_TRAITS, profile_weights
+from simulation.seeding import SeedTree
+from utils.profiling import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+MODES = ("separate", "conditioned")
+NUM_TRAITS = len(PERSONALITY_TRAITS)
+
+
+@dataclass
+class Personality:
+    """A named reward weighting plus its traits (the conditioning input)"""
+    name: str
+    reward_weights: np.ndarray  # (T,) see simulation.rewards.REWARD_TERMS
+    traits: np.ndarray  # (NUM_TRAITS,) in [0, 1], PERSONALITY_TRAITS order
+
+    @classmethod
+    def from_profile(cls, profile: Any, name: Optional[str] = None) -> "Personality":
+        """From a FighterProfile / TrainingJob row or a dict of traits"""
+        get = profile.get if isinstance(profile, dict) else lambda key: getattr(profile, key, None)
+        traits = np.array(
+            [50.0 if get(trait) is None else get(trait) for trait in PERSONALITY_TRAITS], dtype=np.float32
+        )
+        return cls(
+            name=name or get("profile_name") or "default",
+            reward_weights=profile_weights(profile),
+            traits=np.clip(traits / 100.0, 0.0, 1.0),
+        )
+
+
+def fold_conditioning(model: FighterPolicyNetwork, traits: np.ndarray) -> FighterPolicyNetwork:
+    """
+    Specialize a conditioned network to one personality.
+
+    The first layer computes W_obs @ obs + W_traits @ traits + b; with fixed
+    traits that is a plain layer with bias b + W_traits @ traits, so the
+    result is a standard 30-input network with identical outputs.
+    """
+    folded = FighterPolicyNetwork(
+        observation_size=model.observation_size - NUM_TRAITS,
+        hidden_size=model.hidden_size,
+        num_hidden_layers=sum(isinstance(m, torch.nn.Linear) for m in model.feature_layers),
+        action_size=model.action_size,
+    )
+    state = {key: value.detach().clone().cpu() for key, value in model.state_dict().items()}
+    first_weight = state["feature_layers.0.weight"]
+    traits_t = torch.as_tensor(traits, dtype=first_weight.dtype)
+    state["feature_layers.0.bias"] = state["feature_layers.0.bias"] + first_weight[:, -NUM_TRAITS:] @ traits_t
+    state["feature_layers.0.weight"] = first_weight[:, :-NUM_TRAITS].contiguous()
+    folded.load_state_dict(state)
+    folded.eval()
+    return folded
+
+
+class MultiPersonalityTrainer:
+    """
+    Trains several personalities together on one batched arena.
+
+    Usage:
+        trainer = MultiPersonalityTrainer.from_profiles(profiles, mode="conditioned")
+        for _ in range(iterations):
+            trainer.collect(num_steps=256)
+            metrics = trainer.update()
+        trainer.save_checkpoints(MODELS_DIR, fighter_id)
+    """
+
+    def __init__(
+        self,
+        personalities: Sequence[Personality],
+        mode: str = "separate",
+        config: TrainingConfig = None,
+        num_arenas: int = 16,
+        num_fighters: int = 8,
+        max_steps: int = 5000,
+        seed: Optional[int] = None,
+        device: torch.device = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+        if not personalities:
+            raise ValueError("At least one personality is required")
+        names = [p.name for p in personalities]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Personality names must be unique, got {names}")
+
+        self.personalities = list(personalities)
+        self.mode = mode
+        self.config = config or TrainingConfig()
+        self.seeds = SeedTree(seed)
+        self.arena = BatchedArena(
+            num_arenas,
+            num_fighters,
+            max_steps=max_steps,
+            seed=self.seeds.derive("arena").int_seed(),
+        )
+        self.phase_timer = PhaseTimer()
+
+        # Slot -> personality index, dealt round-robin over (arena, slot)
+        K = len(self.personalities)
+        self.slot_personality = (np.arange(num_arenas * num_fighters) % K).reshape(num_arenas, num_fighters)
+        self.arena.reward_engine.set_weights(
+            np.stack([p.reward_weights for p in self.personalities])[self.slot_personality]
+        )
+        self._traits = np.stack([p.traits for p in self.personalities]).astype(np.float32)
+
+        if mode == "separate":
+            self.trainers = [
+                Trainer(FighterPolicyNetwork(observation_size=OBSERVATION_SIZE), self.config, device=device)
+                for _ in self.personalities
+            ]
+            self.buffers = [trainer.buffer for trainer in self.trainers]
+        else:
+            model = FighterPolicyNetwork(observation_size=OBSERVATION_SIZE + NUM_TRAITS)
+            self.trainers = [Trainer(model, self.config, device=device)]
+            self.buffers = [RolloutBuffer() for _ in self.personalities]
+        self.device = self.trainers[0].device
+
+        # In-progress trajectories, one list per (arena, slot)
+        self._trajectories = [[[] for _ in range(num_fighters)] for _ in range(num_arenas)]
+
+    @classmethod
+    def from_profiles(cls, profiles: Sequence[Any], **kwargs) -> "MultiPersonalityTrainer":
+        """One personality per FighterProfile / TrainingJob (named by profile_name)"""
+        return cls([Personality.from_profile(profile) for profile in profiles], **kwargs)
+
+    def _sample(self, model: FighterPolicyNetwork, inputs: np.ndarray):
+        with torch.no_grad():
+            logits, values = model(torch.from_numpy(inputs).to(self.device))
+            probs = torch.softmax(logits, dim=-1)
+            actions = torch.multinomial(probs, num_samples=1).squeeze(1)
+            log_probs = torch.log(probs.gather(1, actions.unsqueeze(1)).squeeze(1))
+        return actions.cpu().numpy(), log_probs.cpu().numpy(), values.squeeze(1).cpu().numpy()
+
+    def _policy_inputs(self, observations: np.ndarray) -> np.ndarray:
+        """Per-slot network inputs, (E, F, obs) or (E, F, obs + traits) when conditioned"""
+        if self.mode == "separate":
+            return observations
+        return np.concatenate([observations, self._traits[self.slot_personality]], axis=-1)
+
+    def _select_actions(self, inputs: np.ndarray, alive: np.ndarray):
+        """Actions, log-probs and values for every slot (idle / 0 for dead slots)"""
+        actions = np.full(alive.shape, 8, dtype=np.int64)
+        log_probs = np.zeros(alive.shape, dtype=np.float32)
+        values = np.zeros(alive.shape, dtype=np.float32)
+
+        if self.mode == "conditioned":
+            groups = [(self.trainers[0].model, alive)]
+        else:
+            groups = [
+                (trainer.model, alive & (self.slot_personality == k))
+                for k, trainer in enumerate(self.trainers)
+            ]
+        for model, mask in groups:
+            if mask.any():
+                actions[mask], log_probs[mask], values[mask] = self._sample(model, inputs[mask])
+        return actions, log_probs, values
+
+    def _flush(self, arena_id: int, slot: int):
+        """Move a finished trajectory into its personality's buffer"""
+        trajectory = self._trajectories[arena_id][slot]
+        buffer = self.buffers[self.slot_personality[arena_id, slot]]
+        for i, (obs, action, reward, value, log_prob) in enumerate(trajectory):
+            buffer.add(obs=obs, action=action, reward=reward, value=value, log_prob=log_prob, done=i == len(trajectory) - 1)
+        self._trajectories[arena_id][slot] = []
+
+    def collect(self, num_steps: int) -> Dict[str, Dict[str, float]]:
+        """
+        Run every arena for `num_steps` ticks; finished trajectories go to
+        their personality's buffer, unfinished ones carry over.
+
+        Returns:
+            {personality name: {"episodes", "avg_episode_reward", "survived"}}
+        """
+        K = len(self.personalities)
+        episode_rewards: List[List[float]] = [[] for _ in range(K)]
+        survived = np.zeros(K, dtype=np.int64)
+
+        def finish(arena_id, slot):
+            episode_rewards[self.slot_personality[arena_id, slot]].append(
+                float(self.arena.cumulative_rewards[arena_id, slot])
+            )
+            self._flush(arena_id, slot)
+
+        with self.phase_timer.phase("rollout"):
+            for _ in range(num_steps):
+                inputs = self._policy_inputs(self.arena.get_observations())
+                recording = self.arena.alive.copy()
+
+                actions, log_probs, values = self._select_actions(inputs, recording)
+                self.arena.step(actions)
+                rewards = self.arena.rewards
+
+                for arena_id, slot in zip(*np.nonzero(recording)):
+                    self._trajectories[arena_id][slot].append((
+                        inputs[arena_id, slot],
+                        int(actions[arena_id, slot]),
+                        float(rewards[arena_id, slot]),
+                        float(values[arena_id, slot]),
+                        float(log_probs[arena_id, slot]),
+                    ))
+
+                # Deaths end that slot's trajectory
+                for arena_id, slot in zip(*np.nonzero(recording & ~self.arena.alive)):
+                    finish(arena_id, slot)
+
+                done_arenas = np.flatnonzero(self.arena.dones())
+                for arena_id in done_arenas:
+                    for slot in np.flatnonzero(self.arena.alive[arena_id]):
+                        survived[self.slot_personality[arena_id, slot]] += 1
+                        finish(arena_id, slot)
+                if len(done_arenas):
+                    self.arena.reset(done_arenas)
+
+        return {
+            p.name: {
+                "episodes": len(episode_rewards[k]),
+                "avg_episode_reward": float(np.mean(episode_rewards[k])) if episode_rewards[k] else 0.0,
+                "survived": int(survived[k]),
+            }
+            for k, p in enumerate(self.personalities)
+        }
+
+    def update(self) -> Dict[str, Dict[str, float]]:
+        """
+        One PPO update for every personality with collected experience.
+
+        Returns:
+            {personality name: training metrics}; in conditioned mode every
+            personality reports the shared update's metrics
+        """
+        with self.phase_timer.phase("update"):
+            if self.mode == "separate":
+                return {
+                    p.name: trainer.train_step()
+                    for p, trainer in zip(self.personalities, self.trainers)
+                    if len(trainer.buffer.rewards)
+                }
+
+            trained = [p.name for p, buffer in zip(self.personalities, self.buffers) if len(buffer.rewards)]
+            if not trained:
+                return {}
+            shared = self.trainers[0]
+            # Whole trajectories, so GAE still stops at each personality's episode ends
+            for buffer in self.buffers:
+                state = buffer.state_dict()
+                for key, values in state.items():
+                    getattr(shared.buffer, key).extend(values)
+                buffer.clear()
+            metrics = shared.train_step()
+            return {name: metrics for name in trained}
+
+    def personality_model(self, name: str) -> FighterPolicyNetwork:
+        """The personality's policy as a standard 30-input network"""
+        k = [p.name for p in self.personalities].index(name)
+        if self.mode == "separate":
+            return self.trainers[k].model
+        return fold_conditioning(self.trainers[0].model, self._traits[k])
+
+    def save_checkpoints(self, directory: str, fighter_id: int, metadata: dict = None) -> Dict[str, str]:
+        """
+        Write one `.pth` per personality (`fighter_<id>_<name>.pth`).
+
+        Returns:
+            {personality name: path}, e.g. for `FighterProfile.model_path`
+        """
+        paths = {}
+        for p in self.personalities:
+            path = os.path.join(str(directory), f"fighter_{fighter_id}_{p.name}.pth")
+            AgentCheckpoint.save(
+                self.personality_model(p.name),
+                path,
+                {**(metadata or {}), "fighter_id": fighter_id, "profile_name": p.name, "training_mode": self.mode},
+            )
+            paths[p.name] = path
+        logger.info(f"Saved {len(paths)} personality checkpoints to {directory}")
+        return paths
+
+    def phase_timings(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        summary = self.phase_timer.summary()
+        if reset:
+            self.phase_timer.reset()
+        return summary
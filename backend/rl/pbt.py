@@ -0,0 +1,378 @@
+"""
+Population-based hyperparameter search.
+
+Trains a population of `Trainer` members on `HeadlessArena` self-play in
+parallel worker processes, in rounds of `iterations_per_round` PPO
+iterations:
+
+- exploit / explore: after each round the bottom `exploit_fraction` of the
+  running members copy the weights, optimizer and buffer of a random member
+  from the top fraction, then perturb that member's hyperparameters
+- successive halving: every `rounds_per_rung` rounds only the best
+  1/`eta` of the running members keep training (never fewer than
+  `min_population`). The rest are stopped and use no more compute.
+
+Members live as training-state files (`Trainer.save_training_state`) in a
+work directory, so workers only exchange paths and small result records.
+Each member's per-round score is kept in `history` and can be stored as
+`TrainingMetrics` rows with `write_metrics`.
+"""
+import os
+import math
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from rl.agent import AgentCheckpoint, FighterPolicyNetwork
+from rl.training import Trainer, TrainingConfig
+from simulation.arena import HeadlessArena
+from simulation.seeding import SeedTree
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HyperParam:
+    """Search range of one `TrainingConfig` field"""
+    low: float
+    high: float
+    log: bool = False  # Sample and perturb on a log scale
+
+    def sample(self, rng: np.random.Generator) -> float:
+        if self.log:
+            return float(math.exp(rng.uniform(math.log(self.low), math.log(self.high))))
+        return float(rng.uniform(self.low, self.high))
+
+    def perturb(self, value: float, rng: np.random.Generator, factors: Tuple[float, ...] = (0.8, 1.2)) -> float:
+        """Scale by a random factor (log params) or shift by the same fraction of the range"""
+        factor = float(rng.choice(factors))
+        if self.log:
+            value = value * factor
+        else:
+            value = value + (factor - 1.0) * (self.high - self.low)
+        return float(np.clip(value, self.low, self.high))
+
+
+DEFAULT_SEARCH_SPACE = {
+    "learning_rate": HyperParam(1e-5, 3e-3, log=True),
+    "gamma": HyperParam(0.9, 0.999),
+    "gae_lambda": HyperParam(0.8, 1.0),
+    "entropy_coef": HyperParam(1e-4, 0.1, log=True),
+    "clip_range": HyperParam(0.05, 0.4),
+}
+
+
+@dataclass
+class MemberSpec:
+    """One round of training for one member (picklable, sent to worker processes)"""
+    member_id: int
+    config: Dict[str, Any]  # TrainingConfig fields
+    state_path: Optional[str]  # Training state to continue from (None: fresh network)
+    out_path: str
+    seed: int
+    iterations: int = 4
+    episodes_per_iteration: int = 8
+    num_fighters: int = 4
+    max_steps: int = 500
+
+
+@dataclass
+class MemberResult:
+    member_id: int
+    score: float  # Mean episode return over the round's last iteration
+    win_rate: float  # Share of the last iteration's fighters alive at the end
+    avg_episode_length: float
+    iteration: int  # Trainer iterations completed in total
+    metrics: Dict[str, float]  # Last train_step metrics
+
+
+@dataclass
+class Member:
+    """A member of the population"""
+    member_id: int
+    config: TrainingConfig
+    state_path: Optional[str] = None
+    score: float = -float("inf")
+    iteration: int = 0
+    active: bool = True
+    stopped_round: Optional[int] = None
+    lineage: List[Tuple[int, int]] = field(default_factory=list)  # (round, parent member) per exploit
+
+
+def _play_episode(trainer: Trainer, arena: HeadlessArena, num_fighters: int) -> Tuple[float, int, int]:
+    """
+    One self-play episode: every fighter is controlled by the trainer's model
+    and every fighter's trajectory goes into the trainer's buffer.
+
+    Returns:
+        (mean fighter return, episode length, survivors)
+    """
+    arena.reset()
+    for fighter_id in range(num_fighters):
+        arena.add_fighter(fighter_id, is_agent=True)
+    trajectories = {fighter_id: [] for fighter_id in range(num_fighters)}
+
+    while not arena.is_done():
+        acting = [f for f in range(num_fighters) if arena.fighters[f].alive]
+        observations = np.stack([arena.get_observation(f) for f in acting])
+        with torch.no_grad():
+            logits, values = trainer.model(torch.from_numpy(observations).to(trainer.device))
+            probs = torch.softmax(logits, dim=-1)
+            actions = torch.multinomial(probs, num_samples=1).squeeze(1)
+            log_probs = torch.log(probs.gather(1, actions.unsqueeze(1)).squeeze(1))
+        actions = actions.cpu().numpy()
+        arena.step(dict(zip(acting, actions.tolist())))
+        for i, fighter_id in enumerate(acting):
+            trajectories[fighter_id].append((
+                observations[i],
+                int(actions[i]),
+                float(arena.fighters[fighter_id].reward),
+                float(values[i, 0]),
+                float(log_probs[i]),
+            ))
+
+    returns = []
+    for trajectory in trajectories.values():
+        for i, (obs, action, reward, value, log_prob) in enumerate(trajectory):
+            trainer.buffer.add(obs=obs, action=action, reward=reward, value=value, log_prob=log_prob, done=i == len(trajectory) - 1)
+        returns.append(sum(step[2] for step in trajectory))
+    return float(np.mean(returns)), arena.step_count, len(arena.get_winners())
+
+
+def train_member(spec: MemberSpec) -> MemberResult:
+    """Run one round for one member in a worker process"""
+    torch.set_num_threads(1)  # One process per member; avoid oversubscribing cores
+    config = TrainingConfig(**spec.config)
+    trainer = Trainer(FighterPolicyNetwork(), config, device=torch.device("cpu"))
+    if spec.state_path:
+        trainer.resume(spec.state_path)
+        # Keep the copied weights and optimizer moments but use this member's hyperparameters
+        trainer.config = config
+        for group in trainer.optimizer.param_groups:
+            group["lr"] = config.learning_rate
+
+    # Copies of a parent must not replay its random streams
+    seeds = SeedTree(spec.seed)
+    torch.manual_seed(seeds.derive("torch").int_seed())
+    np.random.seed(seeds.derive("numpy").int_seed() % 2**32)
+    arena = HeadlessArena(max_steps=spec.max_steps, seed=seeds.derive("arena").int_seed())
+
+    metrics: Dict[str, float] = {}
+    for _ in range(spec.iterations):
+        returns, lengths, survivors = [], [], 0
+        for _ in range(spec.episodes_per_iteration):
+            episode_return, length, alive = _play_episode(trainer, arena, spec.num_fighters)
+            returns.append(episode_return)
+            lengths.append(length)
+            survivors += alive
+        metrics = trainer.train_step()
+
+    trainer.save_training_state(spec.out_path)
+    return MemberResult(
+        member_id=spec.member_id,
+        score=float(np.mean(returns)),
+        win_rate=survivors / (spec.episodes_per_iteration * spec.num_fighters),
+        avg_episode_length=float(np.mean(lengths)),
+        iteration=trainer.iteration,
+        metrics=metrics,
+    )
+
+
+class PopulationTrainer:
+    """
+    Population-based training with successive halving.
+
+    Usage:
+        search = PopulationTrainer(population_size=16, rounds=12, max_workers=8)
+        best = search.run()
+        print(best.config, best.score)
+        search.export_best("models/fighter_1_pbt.pth")
+    """
+
+    def __init__(
+        self,
+        population_size: int = 16,
+        rounds: int = 12,
+        iterations_per_round: int = 4,
+        episodes_per_iteration: int = 8,
+        num_fighters: int = 4,
+        max_steps: int = 500,
+        search_space: Dict[str, HyperParam] = None,
+        base_config: TrainingConfig = None,
+        exploit_fraction: float = 0.25,
+        eta: int = 2,
+        rounds_per_rung: int = 3,
+        min_population: int = 4,
+        max_workers: int = None,
+        workdir: str = None,
+        seed: int = 0,
+    ):
+        if population_size < 2:
+            raise ValueError("A population needs at least two members")
+        base_fields = asdict(base_config or TrainingConfig())
+        self.search_space = search_space or DEFAULT_SEARCH_SPACE
+        unknown = set(self.search_space) - set(base_fields)
+        if unknown:
+            raise ValueError(f"Search space has unknown TrainingConfig fields: {sorted(unknown)}")
+
+        self.rounds = rounds
+        self.iterations_per_round = iterations_per_round
+        self.episodes_per_iteration = episodes_per_iteration
+        self.num_fighters = num_fighters
+        self.max_steps = max_steps
+        self.exploit_fraction = exploit_fraction
+        self.eta = eta
+        self.rounds_per_rung = rounds_per_rung
+        self.min_population = min_population
+        self.max_workers = max_workers or os.cpu_count()
+        self.workdir = workdir or tempfile.mkdtemp(prefix="arena-pbt-")
+        os.makedirs(self.workdir, exist_ok=True)
+        self.seeds = SeedTree(seed)
+        self.rng = self.seeds.derive("pbt").generator()
+
+        self.members = [
+            Member(
+                member_id=i,
+                config=TrainingConfig(**{
+                    **base_fields,
+                    **{name: param.sample(self.rng) for name, param in self.search_space.items()},
+                }),
+            )
+            for i in range(population_size)
+        ]
+        # One record per member per round it trained (see write_metrics)
+        self.history: List[Dict[str, Any]] = []
+
+    @property
+    def active_members(self) -> List[Member]:
+        return [m for m in self.members if m.active]
+
+    def _state_path(self, member: Member) -> str:
+        return os.path.join(self.workdir, f"member_{member.member_id}.pth")
+
+    def _spec(self, member: Member, round_index: int) -> MemberSpec:
+        return MemberSpec(
+            member_id=member.member_id,
+            config=asdict(member.config),
+            state_path=member.state_path,
+            out_path=self._state_path(member),
+            seed=self.seeds.derive("member", member.member_id, round_index).int_seed(),
+            iterations=self.iterations_per_round,
+            episodes_per_iteration=self.episodes_per_iteration,
+            num_fighters=self.num_fighters,
+            max_steps=self.max_steps,
+        )
+
+    def _record(self, member: Member, result: MemberResult, round_index: int):
+        member.score = result.score
+        member.iteration = result.iteration
+        self.history.append({
+            "member_id": member.member_id,
+            "round": round_index,
+            "iteration": result.iteration,
+            "score": result.score,
+            "win_rate": result.win_rate,
+            "avg_episode_length": result.avg_episode_length,
+            "loss": result.metrics.get("policy_loss", 0.0) + result.metrics.get("value_loss", 0.0),
+            "entropy": result.metrics.get("entropy"),
+            "config": asdict(member.config),
+        })
+
+    def _exploit_and_explore(self, round_index: int):
+        """Bottom members take over a top member's state with perturbed hyperparameters"""
+        ranked = sorted(self.active_members, key=lambda m: m.score, reverse=True)
+        cutoff = max(1, int(len(ranked) * self.exploit_fraction))
+        if len(ranked) < 2 * cutoff:
+            return
+        top, bottom = ranked[:cutoff], ranked[-cutoff:]
+        for member in bottom:
+            parent = top[int(self.rng.integers(len(top)))]
+            shutil.copyfile(parent.state_path, member.state_path)
+            member.config = replace(parent.config, **{
+                name: param.perturb(getattr(parent.config, name), self.rng)
+                for name, param in self.search_space.items()
+            })
+            member.lineage.append((round_index, parent.member_id))
+            logger.debug(f"Round {round_index}: member {member.member_id} <- member {parent.member_id}")
+
+    def _halve(self, round_index: int):
+        """Successive halving: stop all but the best 1/eta of the running members"""
+        active = self.active_members
+        keep = max(self.min_population, math.ceil(len(active) / self.eta))
+        if keep >= len(active):
+            return
+        ranked = sorted(active, key=lambda m: m.score, reverse=True)
+        for member in ranked[keep:]:
+            member.active = False
+            member.stopped_round = round_index
+        logger.info(f"Round {round_index}: stopped {len(ranked) - keep} members, {keep} still training")
+
+    def run(self) -> Member:
+        """Train every round and return the best member"""
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for round_index in range(self.rounds):
+                active = self.active_members
+                results = executor.map(train_member, [self._spec(m, round_index) for m in active])
+                for member, result in zip(active, results):
+                    member.state_path = self._state_path(member)
+                    self._record(member, result, round_index)
+
+                best = max(active, key=lambda m: m.score)
+                logger.info(
+                    f"Round {round_index + 1}/{self.rounds}: best member {best.member_id} "
+                    f"score {best.score:.2f} ({len(active)} training)"
+                )
+
+                if round_index == self.rounds - 1:
+                    break
+                if (round_index + 1) % self.rounds_per_rung == 0:
+                    self._halve(round_index)
+                self._exploit_and_explore(round_index)
+
+        return self.best()
+
+    def best(self) -> Member:
+        return max(self.active_members, key=lambda m: m.score)
+
+    def export_best(self, filepath: str, metadata: dict = None) -> str:
+        """Save the best member's policy as a regular model checkpoint"""
+        best = self.best()
+        trainer = Trainer(FighterPolicyNetwork(), best.config, device=torch.device("cpu"))
+        trainer.resume(best.state_path)
+        AgentCheckpoint.save(trainer.model, filepath, {
+            **(metadata or {}),
+            "pbt_member": best.member_id,
+            "pbt_score": best.score,
+            "training_config": asdict(best.config),
+        })
+        return filepath
+
+    def cleanup(self):
+        """Delete the work directory (member training states)"""
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def write_metrics(session, fighter_id: int, history: List[Dict[str, Any]], session_id: str = "pbt"):
+    """Store every member's per-round record as training_metrics rows (one session per member)"""
+    from database.models import TrainingMetrics
+
+    session.bulk_insert_mappings(TrainingMetrics, [
+        {
+            "fighter_id": fighter_id,
+            "training_session_id": f"{session_id}/member_{record['member_id']}",
+            "iteration_number": record["iteration"],
+            "avg_reward_last_100": record["score"],
+            "win_rate_last_100": record["win_rate"],
+            "avg_episode_length": record["avg_episode_length"],
+            "loss": record["loss"],
+            "policy_entropy": record["entropy"],
+        }
+        for record in history
+    ])
+    session.commit()
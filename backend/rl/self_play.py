@@ -0,0 +1,362 @@
+"""
+Self-play league.
+
+Fills the non-learner slots of a `BatchedArena` with past policies drawn from
+the `ModelCheckpoint` table, so training experience comes from fights against
+real opponents instead of an empty ring.
+
+- `OpponentPool` keeps checkpoint metadata and Elo ratings for every known
+  opponent, but only a bounded number of loaded policies (LRU eviction).
+  Opponents are sampled by a mix of recency and Elo.
+- `SelfPlayOrchestrator` steps all arenas together; each tick runs one
+  batched forward pass per distinct policy (the learner, plus each sampled
+  opponent) and feeds complete learner episodes into the trainer's buffer.
+"""
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import torch
+
+from inference import load_policy
+from simulation.batched import BatchedArena
+from simulation.rewards import ARENA_REWARD_WEIGHTS
+from simulation.seeding import SeedTree
+from rl.training import Trainer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ELO = 1000.0
+ELO_K = 32.0
+
+# Slot markers in SelfPlayOrchestrator.slot_policies (opponents use checkpoint ids >= 0)
+LEARNER = -1
+MIRROR = -2  # Opponent driven by the current learner weights (pool is empty)
+
+
+def expected_score(rating_a: float, rating_b: float) -> float:
+    """Probability that A beats B under the Elo model"""
+    return 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0))
+
+
+def update_elo(rating_a: float, rating_b: float, score_a: float, k: float = ELO_K):
+    """
+    Apply one Elo update.
+
+    Args:
+        score_a: 1.0 win for A, 0.5 draw, 0.0 loss
+
+    Returns:
+        (new_rating_a, new_rating_b)
+    """
+    delta = k * (score_a - expected_score(rating_a, rating_b))
+    return rating_a + delta, rating_b - delta
+
+
+def sample_actions(probs: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Sample one action per row of a (N, num_actions) probability matrix"""
+    u = rng.random((probs.shape[0], 1))
+    actions = (np.cumsum(probs, axis=1) < u).sum(axis=1)
+    return np.minimum(actions, probs.shape[1] - 1)
+
+
+@dataclass
+class PoolEntry:
+    """An opponent known to the pool"""
+    checkpoint_id: int
+    weights_path: str
+    model_version: int = 0
+    elo: float = DEFAULT_ELO
+    games: int = 0
+
+
+class OpponentPool:
+    """
+    Bounded pool of past policies.
+
+    All entries stay known (cheap metadata); at most `max_loaded` policies are
+    resident in memory at once, least recently used evicted first.
+
+    Sampling probability mixes two softmax distributions:
+    - recency: newest model_version highest, decaying with rank / `recency_tau`
+    - strength: Elo scaled by `elo_temperature`
+    weighted by `recency_weight` (1.0 = recency only, 0.0 = Elo only).
+    """
+
+    def __init__(
+        self,
+        max_loaded: int = 8,
+        recency_weight: float = 0.5,
+        recency_tau: float = 5.0,
+        elo_temperature: float = 200.0,
+        quantized: bool = False,
+    ):
+        self.max_loaded = max_loaded
+        self.recency_weight = recency_weight
+        self.recency_tau = recency_tau
+        self.elo_temperature = elo_temperature
+        self.quantized = quantized
+
+        self.entries: Dict[int, PoolEntry] = {}
+        self._loaded: "OrderedDict[int, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: PoolEntry):
+        """Add or replace an opponent"""
+        self.entries[entry.checkpoint_id] = entry
+        self._loaded.pop(entry.checkpoint_id, None)
+
+    def add_checkpoint(self, checkpoint) -> PoolEntry:
+        """Add a `ModelCheckpoint` row"""
+        entry = PoolEntry(
+            checkpoint_id=checkpoint.id,
+            weights_path=checkpoint.weights_path,
+            model_version=checkpoint.model_version,
+            elo=checkpoint.elo if checkpoint.elo is not None else DEFAULT_ELO,
+        )
+        self.add(entry)
+        return entry
+
+    def load_from_db(self, session, fighter_id: int = None, limit: int = None) -> int:
+        """Add the newest checkpoints (optionally for one fighter). Returns the count added."""
+        from database.models import ModelCheckpoint
+
+        query = session.query(ModelCheckpoint)
+        if fighter_id is not None:
+            query = query.filter(ModelCheckpoint.fighter_id == fighter_id)
+        query = query.order_by(ModelCheckpoint.model_version.desc(), ModelCheckpoint.id.desc())
+        if limit:
+            query = query.limit(limit)
+
+        checkpoints = query.all()
+        for checkpoint in checkpoints:
+            self.add_checkpoint(checkpoint)
+        return len(checkpoints)
+
+    def get_policy(self, checkpoint_id: int):
+        """Get a loaded policy, loading (and evicting the LRU policy) if needed"""
+        if checkpoint_id in self._loaded:
+            self._loaded.move_to_end(checkpoint_id)
+            return self._loaded[checkpoint_id]
+
+        entry = self.entries[checkpoint_id]
+        policy = load_policy(entry.weights_path, quantized=self.quantized)
+        self._loaded[checkpoint_id] = policy
+        while len(self._loaded) > self.max_loaded:
+            evicted, _ = self._loaded.popitem(last=False)
+            logger.debug(f"Evicted opponent policy {evicted} from pool")
+        return policy
+
+    def sampling_probs(self) -> np.ndarray:
+        """Sampling distribution over `self.entries` (in insertion order)"""
+        entries = list(self.entries.values())
+        versions = np.array([e.model_version for e in entries], dtype=np.float64)
+        elos = np.array([e.elo for e in entries], dtype=np.float64)
+
+        # Rank 0 = newest
+        ranks = np.argsort(np.argsort(-versions, kind="stable"), kind="stable")
+        recency = np.exp(-ranks / self.recency_tau)
+        recency /= recency.sum()
+
+        strength = np.exp((elos - elos.max()) / self.elo_temperature)
+        strength /= strength.sum()
+
+        return self.recency_weight * recency + (1.0 - self.recency_weight) * strength
+
+    def sample(self, n: int, rng: np.random.Generator) -> List[int]:
+        """Sample `n` opponent checkpoint ids (with replacement)"""
+        ids = list(self.entries.keys())
+        choices = rng.choice(len(ids), size=n, p=self.sampling_probs())
+        return [ids[i] for i in choices]
+
+
+class SelfPlayOrchestrator:
+    """
+    Collects learner experience in batched self-play royales.
+
+    Slots 0..learner_slots-1 of every arena are driven by the trainer's model
+    and recorded; the remaining slots get opponents sampled from the pool at
+    each arena reset (or mirror the learner if the pool is empty).
+
+    `reward_weights` shapes the learner slots' rewards (e.g.
+    `simulation.rewards.profile_weights(profile)` to train a personality);
+    opponents keep the base arena rewards, which are never recorded.
+    """
+
+    def __init__(
+        self,
+        trainer: Trainer,
+        pool: OpponentPool,
+        num_arenas: int = 16,
+        num_fighters: int = 8,
+        learner_slots: int = 1,
+        max_steps: int = 5000,
+        seed: Optional[int] = None,
+        reward_weights: np.ndarray = ARENA_REWARD_WEIGHTS,
+    ):
+        self.trainer = trainer
+        self.pool = pool
+        self.learner_slots = learner_slots
+        self.seeds = SeedTree(seed)
+        self.rng = self.seeds.derive("opponents").generator()
+        self.arena = BatchedArena(
+            num_arenas,
+            num_fighters,
+            max_steps=max_steps,
+            seed=self.seeds.derive("arena").int_seed(),
+        )
+        self.arena.reward_engine.set_weights(reward_weights, slots=np.arange(learner_slots))
+
+        self.learner_elo = DEFAULT_ELO
+        self.slot_policies = np.full((num_arenas, num_fighters), MIRROR, dtype=np.int64)
+        self.slot_policies[:, :learner_slots] = LEARNER
+        self._assign_opponents(np.arange(num_arenas))
+
+        # In-progress learner trajectories, one list per (arena, learner slot)
+        self._trajectories = [
+            [[] for _ in range(learner_slots)] for _ in range(num_arenas)
+        ]
+
+    def _assign_opponents(self, arena_ids: np.ndarray):
+        n_opponents = self.arena.num_fighters - self.learner_slots
+        for arena_id in arena_ids:
+            if len(self.pool):
+                self.slot_policies[arena_id, self.learner_slots:] = self.pool.sample(n_opponents, self.rng)
+            else:
+                self.slot_policies[arena_id, self.learner_slots:] = MIRROR
+
+    def _learner_forward(self, observations: np.ndarray):
+        """One batched forward pass of the learner; returns actions, log-probs, values"""
+        model = self.trainer.model
+        with torch.no_grad():
+            obs_tensor = torch.from_numpy(observations).to(self.trainer.device)
+            logits, values = model(obs_tensor)
+            probs = torch.softmax(logits, dim=-1)
+            actions = torch.multinomial(probs, num_samples=1).squeeze(1)
+            log_probs = torch.log(probs.gather(1, actions.unsqueeze(1)).squeeze(1))
+        return actions.cpu().numpy(), log_probs.cpu().numpy(), values.squeeze(1).cpu().numpy()
+
+    def _select_actions(self, observations: np.ndarray):
+        """Actions for every slot: one grouped forward pass per distinct policy"""
+        alive = self.arena.alive
+        actions = np.full(alive.shape, 8, dtype=np.int64)  # Idle for dead slots
+
+        # Learner and mirror slots share the learner's forward pass
+        torch_mask = alive & (self.slot_policies < 0)
+        learner_out = None
+        if torch_mask.any():
+            acts, log_probs, values = self._learner_forward(observations[torch_mask])
+            actions[torch_mask] = acts
+            learner_out = (torch_mask, log_probs, values)
+
+        opponent_mask = alive & (self.slot_policies >= 0)
+        for checkpoint_id in np.unique(self.slot_policies[opponent_mask]):
+            mask = opponent_mask & (self.slot_policies == checkpoint_id)
+            policy = self.pool.get_policy(int(checkpoint_id))
+            probs, _ = policy.evaluate_batch(observations[mask])
+            actions[mask] = sample_actions(probs, self.rng)
+
+        return actions, learner_out
+
+    def _flush(self, arena_id: int, slot: int):
+        """Move a finished learner trajectory into the trainer's rollout buffer"""
+        trajectory = self._trajectories[arena_id][slot]
+        for i, (obs, action, reward, value, log_prob) in enumerate(trajectory):
+            self.trainer.buffer.add(
+                obs=obs,
+                action=action,
+                reward=reward,
+                value=value,
+                log_prob=log_prob,
+                done=i == len(trajectory) - 1,
+            )
+        self._trajectories[arena_id][slot] = []
+
+    def _record_results(self, arena_id: int) -> bool:
+        """Update Elo for one finished arena. Returns True if a learner survived."""
+        alive = self.arena.alive[arena_id]
+        learner_alive = alive[: self.learner_slots].any()
+
+        for slot in range(self.learner_slots, self.arena.num_fighters):
+            checkpoint_id = int(self.slot_policies[arena_id, slot])
+            if checkpoint_id < 0:
+                continue
+            if learner_alive == alive[slot]:
+                score = 0.5
+            else:
+                score = 1.0 if learner_alive else 0.0
+
+            entry = self.pool.entries[checkpoint_id]
+            self.learner_elo, entry.elo = update_elo(self.learner_elo, entry.elo, score)
+            entry.games += 1
+
+        return bool(learner_alive)
+
+    def collect(self, num_steps: int) -> Dict[str, Any]:
+        """
+        Run every arena for `num_steps` ticks.
+
+        Finished learner episodes are added to `trainer.buffer`; episodes
+        still running carry over to the next call.
+
+        Returns:
+            Dict with learner episode count, finished arenas, learner win rate,
+            mean learner episode reward and learner Elo
+        """
+        L = self.learner_slots
+        episode_rewards = []
+        finished = 0
+        wins = 0
+
+        for _ in range(num_steps):
+            observations = self.arena.get_observations()
+            recording = self.arena.alive[:, :L].copy()
+
+            actions, learner_out = self._select_actions(observations)
+            self.arena.step(actions)
+            rewards = self.arena.rewards
+
+            if learner_out is not None:
+                torch_mask, log_probs, values = learner_out
+                # Row order of torch_mask selections, restricted to learner slots
+                row_of = -np.ones(torch_mask.shape, dtype=np.int64)
+                row_of[torch_mask] = np.arange(torch_mask.sum())
+                for arena_id, slot in zip(*np.nonzero(recording)):
+                    row = row_of[arena_id, slot]
+                    self._trajectories[arena_id][slot].append((
+                        observations[arena_id, slot],
+                        int(actions[arena_id, slot]),
+                        float(rewards[arena_id, slot]),
+                        float(values[row]),
+                        float(log_probs[row]),
+                    ))
+
+            # Learner deaths end that learner's trajectory
+            for arena_id, slot in zip(*np.nonzero(recording & ~self.arena.alive[:, :L])):
+                episode_rewards.append(float(self.arena.cumulative_rewards[arena_id, slot]))
+                self._flush(arena_id, slot)
+
+            done_arenas = np.flatnonzero(self.arena.dones())
+            for arena_id in done_arenas:
+                for slot in range(L):
+                    if self._trajectories[arena_id][slot]:
+                        episode_rewards.append(float(self.arena.cumulative_rewards[arena_id, slot]))
+                        self._flush(arena_id, slot)
+                wins += self._record_results(arena_id)
+
+            finished += len(done_arenas)
+            if len(done_arenas):
+                self.arena.reset(done_arenas)
+                self._assign_opponents(done_arenas)
+
+        return {
+            "episodes": len(episode_rewards),
+            "arenas_finished": finished,
+            "learner_win_rate": wins / max(finished, 1),
+            "avg_episode_reward": float(np.mean(episode_rewards)) if episode_rewards else 0.0,
+            "learner_elo": self.learner_elo,
+        }
@@ -0,0 +1,454 @@
+"""
+Parallel tournament evaluation.
+
+Plays round-robin or Swiss matches between checkpoints and personality
+profiles on `HeadlessArena` across a process pool, then computes win rates
+(Wilson 95% intervals) and Elo ratings (Bradley-Terry fit, bootstrap 95%
+intervals) and writes them back to the database in bulk.
+
+Every match seed is derived from the tournament seed and the pairing
+(`SeedTree`), so a match is fully determined by (seed, policies). Results can
+therefore be cached across tournaments, and any match can be recorded as a
+replay and re-simulated exactly.
+"""
+import os
+import math
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, MutableMapping
+
+import numpy as np
+
+from inference import load_policy, resolve_policy_file
+from simulation.arena import HeadlessArena
+from simulation.replay import MatchReplay, ReplayRecorder
+from simulation.seeding import SeedTree
+from rl.self_play import sample_actions, DEFAULT_ELO
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Competitor:
+    """A policy entered in the tournament"""
+    key: str
+    weights_path: str
+    checkpoint_id: Optional[int] = None
+    profile_id: Optional[int] = None
+
+
+@dataclass
+class MatchSpec:
+    """One match to play (picklable, sent to worker processes)"""
+    a: int  # Competitor indices
+    b: int
+    a_path: str
+    b_path: str
+    seed: int
+    fighters_per_side: int = 1
+    max_steps: int = 2000
+    ring_size: float = 100.0
+    greedy: bool = False
+    record_replay: bool = False
+
+
+@dataclass
+class MatchResult:
+    a: int
+    b: int
+    score_a: float  # 1.0 win, 0.5 draw, 0.0 loss
+    steps: int
+    replay: Optional[MatchReplay] = None
+
+
+@dataclass
+class CompetitorRating:
+    """Aggregated tournament result for one competitor"""
+    competitor: Competitor
+    matches: int
+    wins: int
+    draws: int
+    losses: int
+    win_rate: float
+    win_rate_ci: Tuple[float, float]
+    elo: float
+    elo_ci: float  # 95% half-width
+
+
+# Per-process policy cache for worker processes
+_worker_policies = {}
+
+
+def _get_policy(weights_path: str):
+    policy = _worker_policies.get(weights_path)
+    if policy is None:
+        policy = load_policy(weights_path)
+        _worker_policies[weights_path] = policy
+    return policy
+
+
+def play_match(spec: MatchSpec) -> MatchResult:
+    """
+    Play one match on a HeadlessArena.
+
+    Side A controls fighters 0..k-1, side B controls k..2k-1. The side with
+    more survivors wins; ties are broken by remaining total health, then drawn.
+    Arena and action sampling use separate streams derived from `spec.seed`.
+    """
+    seeds = SeedTree(spec.seed)
+    rng = seeds.derive("actions").generator()
+    k = spec.fighters_per_side
+
+    arena = HeadlessArena(
+        ring_size=spec.ring_size,
+        max_steps=spec.max_steps,
+        seed=seeds.derive("arena").int_seed(),
+    )
+    sides = [list(range(k)), list(range(k, 2 * k))]
+    for fighter_id in sides[0] + sides[1]:
+        arena.add_fighter(fighter_id)
+    recorder = ReplayRecorder(arena) if spec.record_replay else None
+    step = recorder.step if recorder else arena.step
+    policies = [_get_policy(spec.a_path), _get_policy(spec.b_path)]
+
+    def side_alive(side):
+        return [f for f in sides[side] if arena.fighters[f].alive]
+
+    while not arena.is_done() and side_alive(0) and side_alive(1):
+        actions = {}
+        for side, policy in enumerate(policies):
+            fighter_ids = side_alive(side)
+            observations = np.stack([arena.get_observation(f) for f in fighter_ids])
+            probs, _ = policy.evaluate_batch(observations)
+            chosen = probs.argmax(axis=1) if spec.greedy else sample_actions(probs, rng)
+            actions.update(zip(fighter_ids, chosen.tolist()))
+        step(actions)
+
+    survivors = [len(side_alive(0)), len(side_alive(1))]
+    health = [
+        sum(max(arena.fighters[f].health, 0.0) for f in side_alive(side)) for side in (0, 1)
+    ]
+    if survivors[0] != survivors[1]:
+        score_a = 1.0 if survivors[0] > survivors[1] else 0.0
+    elif health[0] != health[1]:
+        score_a = 1.0 if health[0] > health[1] else 0.0
+    else:
+        score_a = 0.5
+
+    replay = recorder.finish({"a_path": spec.a_path, "b_path": spec.b_path}) if recorder else None
+    return MatchResult(a=spec.a, b=spec.b, score_a=score_a, steps=arena.step_count, replay=replay)
+
+
+def wilson_interval(successes: float, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a proportion (draws may count as half successes)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1.0 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def fit_elo(
+    num_competitors: int,
+    results: List[MatchResult],
+    prior_draws: float = 1.0,
+    iterations: int = 200,
+) -> np.ndarray:
+    """
+    Fit Elo ratings with a Bradley-Terry model (MM algorithm).
+
+    `prior_draws` virtual draws are added between every pair that met, which
+    keeps undefeated or winless competitors finite. Ratings are centered on
+    DEFAULT_ELO.
+    """
+    n = num_competitors
+    wins = np.zeros((n, n))
+    for r in results:
+        wins[r.a, r.b] += r.score_a
+        wins[r.b, r.a] += 1.0 - r.score_a
+
+    games = wins + wins.T
+    met = games > 0
+    wins += met * (prior_draws / 2.0)
+    games = wins + wins.T
+
+    strength = np.ones(n)
+    total_wins = wins.sum(axis=1)
+    for _ in range(iterations):
+        denom = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        updated = np.where(denom > 0, total_wins / np.maximum(denom, 1e-12), strength)
+        updated = np.maximum(updated, 1e-12)
+        updated /= np.exp(np.log(updated).mean())
+        if np.allclose(updated, strength, rtol=1e-9, atol=0):
+            strength = updated
+            break
+        strength = updated
+
+    return DEFAULT_ELO + 400.0 * np.log10(strength)
+
+
+class Tournament:
+    """
+    Round-robin or Swiss tournament between competitors.
+
+    Matches run in a process pool (`max_workers` processes, default CPU count).
+    Every match gets its own seed derived from the tournament seed, the round
+    and the pairing, so a tournament is reproducible regardless of worker
+    scheduling. Pass a `cache` mapping (e.g. a dict kept across runs) to skip
+    matches already played with the same seed and policy weights.
+    """
+
+    def __init__(
+        self,
+        competitors: List[Competitor],
+        games_per_pair: int = 10,
+        fighters_per_side: int = 1,
+        max_steps: int = 2000,
+        max_workers: int = None,
+        seed: int = 0,
+        n_bootstrap: int = 200,
+        cache: Optional[MutableMapping] = None,
+        record_replays: bool = False,
+    ):
+        if len(competitors) < 2:
+            raise ValueError("A tournament needs at least two competitors")
+
+        self.competitors = competitors
+        self.games_per_pair = games_per_pair
+        self.fighters_per_side = fighters_per_side
+        self.max_steps = max_steps
+        self.max_workers = max_workers or os.cpu_count()
+        self.n_bootstrap = n_bootstrap
+        self.cache = cache
+        self.record_replays = record_replays
+        self.seeds = SeedTree(seed)
+        self.rng = self.seeds.derive("tournament").generator()
+
+        self.results: List[MatchResult] = []
+        self._policy_hashes: Dict[str, str] = {}
+
+    def _policy_hash(self, weights_path: str) -> str:
+        """Content hash of the file `play_match` actually loads (cache key component)"""
+        if weights_path not in self._policy_hashes:
+            _, served_path = resolve_policy_file(weights_path)
+            with open(served_path, "rb") as f:
+                self._policy_hashes[weights_path] = hashlib.sha1(f.read()).hexdigest()
+        return self._policy_hashes[weights_path]
+
+    def _cache_key(self, spec: MatchSpec) -> tuple:
+        return (
+            spec.seed,
+            self._policy_hash(spec.a_path),
+            self._policy_hash(spec.b_path),
+            spec.fighters_per_side,
+            spec.max_steps,
+            spec.ring_size,
+            spec.greedy,
+        )
+
+    def _specs(self, pairs: List[Tuple[int, int]], round_index: int = 0) -> List[MatchSpec]:
+        specs = []
+        for a, b in pairs:
+            for game in range(self.games_per_pair):
+                # Alternate sides so neither competitor always gets the same spawn slots
+                first, second = (a, b) if game % 2 == 0 else (b, a)
+                seed = self.seeds.derive(
+                    "match",
+                    round_index,
+                    self.competitors[first].key,
+                    self.competitors[second].key,
+                    game,
+                ).int_seed()
+                specs.append(MatchSpec(
+                    a=first,
+                    b=second,
+                    a_path=self.competitors[first].weights_path,
+                    b_path=self.competitors[second].weights_path,
+                    seed=seed,
+                    fighters_per_side=self.fighters_per_side,
+                    max_steps=self.max_steps,
+                    record_replay=self.record_replays,
+                ))
+        return specs
+
+    def _play(
+        self,
+        pairs: List[Tuple[int, int]],
+        executor: ProcessPoolExecutor,
+        round_index: int = 0,
+    ) -> List[MatchResult]:
+        specs = self._specs(pairs, round_index)
+        results: List[Optional[MatchResult]] = [None] * len(specs)
+
+        pending = []
+        for i, spec in enumerate(specs):
+            cached = self.cache.get(self._cache_key(spec)) if self.cache is not None else None
+            if cached is not None and (cached.replay is not None or not spec.record_replay):
+                # Cached results keep their own indices; remap to this tournament's
+                results[i] = MatchResult(spec.a, spec.b, cached.score_a, cached.steps, cached.replay)
+            else:
+                pending.append(i)
+
+        if pending:
+            chunksize = max(1, len(pending) // (self.max_workers * 4))
+            played = executor.map(play_match, [specs[i] for i in pending], chunksize=chunksize)
+            for i, result in zip(pending, played):
+                results[i] = result
+                if self.cache is not None:
+                    self.cache[self._cache_key(specs[i])] = result
+
+        logger.debug(f"Played {len(pending)} matches, {len(specs) - len(pending)} from cache")
+        self.results.extend(results)
+        return results
+
+    def round_robin_pairings(self) -> List[Tuple[int, int]]:
+        n = len(self.competitors)
+        return [(a, b) for a in range(n) for b in range(a + 1, n)]
+
+    def swiss_pairings(self, played: set) -> List[Tuple[int, int]]:
+        """Pair competitors with similar scores, avoiding rematches where possible"""
+        n = len(self.competitors)
+        scores = np.zeros(n)
+        for r in self.results:
+            scores[r.a] += r.score_a
+            scores[r.b] += 1.0 - r.score_a
+
+        # Random tie-break, then highest score first
+        order = list(np.lexsort((self.rng.random(n), -scores)))
+        pairs = []
+        while len(order) > 1:
+            a = order.pop(0)
+            partner = next((b for b in order if (min(a, b), max(a, b)) not in played), order[0])
+            order.remove(partner)
+            pairs.append((a, partner))
+        return pairs
+
+    def run(self, format: str = "round_robin", rounds: int = None) -> List[CompetitorRating]:
+        """
+        Play the tournament and compute ratings.
+
+        Args:
+            format: "round_robin" (every pair meets) or "swiss"
+            rounds: Swiss rounds (default ceil(log2(n)) + 1)
+        """
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            if format == "round_robin":
+                self._play(self.round_robin_pairings(), executor)
+            elif format == "swiss":
+                rounds = rounds or math.ceil(math.log2(len(self.competitors))) + 1
+                played = set()
+                for round_index in range(rounds):
+                    pairs = self.swiss_pairings(played)
+                    played.update((min(a, b), max(a, b)) for a, b in pairs)
+                    self._play(pairs, executor, round_index)
+            else:
+                raise ValueError(f"Unknown tournament format: {format}")
+
+        logger.info(f"Tournament finished: {len(self.results)} matches")
+        return self.ratings()
+
+    def ratings(self) -> List[CompetitorRating]:
+        """Win rates and Elo (with bootstrap confidence intervals) from played matches"""
+        n = len(self.competitors)
+        elo = fit_elo(n, self.results)
+
+        boot = np.empty((self.n_bootstrap, n))
+        for i in range(self.n_bootstrap):
+            sample = self.rng.integers(len(self.results), size=len(self.results))
+            boot[i] = fit_elo(n, [self.results[j] for j in sample])
+        elo_ci = 1.96 * boot.std(axis=0)
+
+        ratings = []
+        for idx, competitor in enumerate(self.competitors):
+            wins = draws = losses = 0
+            for r in self.results:
+                if idx not in (r.a, r.b):
+                    continue
+                score = r.score_a if r.a == idx else 1.0 - r.score_a
+                wins += score == 1.0
+                draws += score == 0.5
+                losses += score == 0.0
+
+            matches = wins + draws + losses
+            points = wins + 0.5 * draws
+            ratings.append(CompetitorRating(
+                competitor=competitor,
+                matches=matches,
+                wins=wins,
+                draws=draws,
+                losses=losses,
+                win_rate=points / matches if matches else 0.0,
+                win_rate_ci=wilson_interval(points, matches),
+                elo=float(elo[idx]),
+                elo_ci=float(elo_ci[idx]),
+            ))
+        return ratings
+
+
+def competitors_from_db(session, fighter_id: int = None, include_profiles: bool = True) -> List[Competitor]:
+    """Collect checkpoints (and profiles) whose weights exist on disk"""
+    from database.models import ModelCheckpoint, FighterProfile
+
+    competitors = []
+    query = session.query(ModelCheckpoint)
+    if fighter_id is not None:
+        query = query.filter(ModelCheckpoint.fighter_id == fighter_id)
+    for checkpoint in query.all():
+        if os.path.exists(checkpoint.weights_path):
+            competitors.append(Competitor(
+                key=f"checkpoint:{checkpoint.id}",
+                weights_path=checkpoint.weights_path,
+                checkpoint_id=checkpoint.id,
+            ))
+
+    if include_profiles:
+        query = session.query(FighterProfile)
+        if fighter_id is not None:
+            query = query.filter(FighterProfile.fighter_id == fighter_id)
+        for profile in query.all():
+            if os.path.exists(profile.model_path):
+                competitors.append(Competitor(
+                    key=f"profile:{profile.id}",
+                    weights_path=profile.model_path,
+                    profile_id=profile.id,
+                ))
+
+    return competitors
+
+
+def write_results(session, ratings: List[CompetitorRating]):
+    """Write win rates and Elo back to model_checkpoints / fighter_profiles in bulk"""
+    from database.models import ModelCheckpoint, FighterProfile
+
+    checkpoint_rows = []
+    profile_rows = []
+    for rating in ratings:
+        competitor = rating.competitor
+        if competitor.checkpoint_id is not None:
+            checkpoint_rows.append({
+                "id": competitor.checkpoint_id,
+                "win_rate": rating.win_rate,
+                "win_rate_ci_low": rating.win_rate_ci[0],
+                "win_rate_ci_high": rating.win_rate_ci[1],
+                "elo": rating.elo,
+                "elo_ci": rating.elo_ci,
+                "matches_played": rating.matches,
+            })
+        if competitor.profile_id is not None:
+            profile_rows.append({
+                "id": competitor.profile_id,
+                "win_rate": rating.win_rate,
+                "elo": rating.elo,
+                "elo_ci": rating.elo_ci,
+                "matches_played": rating.matches,
+            })
+
+    if checkpoint_rows:
+        session.bulk_update_mappings(ModelCheckpoint, checkpoint_rows)
+    if profile_rows:
+        session.bulk_update_mappings(FighterProfile, profile_rows)
+    session.commit()
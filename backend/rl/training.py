@@ -5,12 +5,18 @@ import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from typing import Dict, List, Tuple, Any
-from dataclasses import dataclass
+import math
+import random
+from typing import Dict, List, Optional, Tuple, Any
+from dataclasses import dataclass, asdict
 import logging
+from contextlib import contextmanager
+from itertools import islice
 
 from rl.agent import FighterPolicyNetwork, AgentCheckpoint
+from rl.checkpointing import AsyncCheckpointWriter
 from rl.environment import WrestlingArenaEnv
+from utils.profiling import PhaseTimer, get_profiler
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +28,7 @@ class TrainingConfig:
     gamma: float = 0.99  # Discount factor
     gae_lambda: float = 0.95  # GAE lambda for advantage estimation
     entropy_coef: float = 0.01  # Entropy bonus to encourage exploration
+    clip_range: float = 0.2  # PPO ratio clipping
     value_loss_coef: float = 0.5  # Value function weight
     max_grad_norm: float = 0.5  # Gradient clipping
     num_epochs: int = 3  # PPO epochs per batch
@@ -111,6 +118,27 @@ class RolloutBuffer:
                 ),
             }
 
+    def state_dict(self) -> Dict[str, list]:
+        """Get pending transitions (used by full training-state checkpoints)"""
+        return {
+            "observations": list(self.observations),
+            "actions": list(self.actions),
+            "rewards": list(self.rewards),
+            "values": list(self.values),
+            "log_probs": list(self.log_probs),
+            "dones": list(self.dones),
+        }
+
+    def load_state_dict(self, state: Dict[str, list]):
+        """Restore pending transitions saved by `state_dict`"""
+        self.clear()
+        self.observations.extend(state["observations"])
+        self.actions.extend(state["actions"])
+        self.rewards.extend(state["rewards"])
+        self.values.extend(state["values"])
+        self.log_probs.extend(state["log_probs"])
+        self.dones.extend(state["dones"])
+
     def clear(self):
         """Clear the buffer"""
         self.observations.clear()
@@ -133,9 +161,18 @@ class Trainer:
         model: FighterPolicyNetwork,
         config: TrainingConfig = None,
         device: torch.device = None,
+        checkpoint_writer: AsyncCheckpointWriter = None,
+        weight_publisher=None,
+        job_id: Optional[int] = None,
     ):
         self.model = model
         self.config = config or TrainingConfig()
+        # Optional background writer; when unset, checkpoints are written synchronously
+        self.checkpoint_writer = checkpoint_writer
+        # Optional inference.WeightPublisher pushing fresh policies to serving workers
+        self.weight_publisher = weight_publisher
+        # TrainingJob this trainer runs; profiling armed for another job skips it
+        self.job_id = job_id
         self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
         self.model.to(self.device)
@@ -143,6 +180,13 @@ class Trainer:
         self.optimizer = optim.Adam(self.model.parameters(), lr=self.config.learning_rate)
         self.buffer = RolloutBuffer()
 
+        # Progress counters (persisted in training-state checkpoints)
+        self.iteration = 0
+        self.best_reward = -float("inf")
+
+        # Wall time per phase: rollout, gae, ppo_update, checkpoint, publish
+        self.phase_timer = PhaseTimer()
+
         logger.info(f"Trainer initialized on device: {self.device}")
 
     def collect_trajectory(
@@ -156,46 +200,47 @@ class Trainer:
         Returns:
             Dict with episode statistics
         """
-        obs, _ = env.reset()
-        episode_reward = 0.0
-        episode_length = 0
-
-        for step in range(max_steps):
-            # Get action and value from model
-            with torch.no_grad():
-                obs_tensor = torch.from_numpy(obs).float().unsqueeze(0).to(self.device)
-                action_logits, value = self.model(obs_tensor)
-
-                # Sample action from policy
-                probs = torch.softmax(action_logits, dim=-1)
-                action = torch.multinomial(probs, num_samples=1).item()
-                log_prob = torch.log(probs[0, action]).item()
-
-            # Step environment
-            next_obs, reward, terminated, truncated, info = env.step(action)
-            done = terminated or truncated
-
-            # Store in buffer
-            self.buffer.add(
-                obs=obs,
-                action=action,
-                reward=reward,
-                value=value.squeeze().item(),
-                log_prob=log_prob,
-                done=done,
-            )
-
-            episode_reward += reward
-            episode_length += 1
-            obs = next_obs
-
-            if done:
-                break
-
-        return {
-            "episode_reward": episode_reward,
-            "episode_length": episode_length,
-        }
+        with self.phase_timer.phase("rollout"):
+            obs, _ = env.reset()
+            episode_reward = 0.0
+            episode_length = 0
+
+            for step in range(max_steps):
+                # Get action and value from model
+                with torch.no_grad():
+                    obs_tensor = torch.from_numpy(obs).float().unsqueeze(0).to(self.device)
+                    action_logits, value = self.model(obs_tensor)
+
+                    # Sample action from policy
+                    probs = torch.softmax(action_logits, dim=-1)
+                    action = torch.multinomial(probs, num_samples=1).item()
+                    log_prob = torch.log(probs[0, action]).item()
+
+                # Step environment
+                next_obs, reward, terminated, truncated, info = env.step(action)
+                done = terminated or truncated
+
+                # Store in buffer
+                self.buffer.add(
+                    obs=obs,
+                    action=action,
+                    reward=reward,
+                    value=value.squeeze().item(),
+                    log_prob=log_prob,
+                    done=done,
+                )
+
+                episode_reward += reward
+                episode_length += 1
+                obs = next_obs
+
+                if done:
+                    break
+
+            return {
+                "episode_reward": episode_reward,
+                "episode_length": episode_length,
+            }
 
     def train_step(self) -> Dict[str, float]:
         """
@@ -205,10 +250,11 @@ class Trainer:
             Dict with training metrics
         """
         # Compute advantages
-        self.buffer.compute_returns_and_advantages(
-            gamma=self.config.gamma,
-            gae_lambda=self.config.gae_lambda,
-        )
+        with self.phase_timer.phase("gae"):
+            self.buffer.compute_returns_and_advantages(
+                gamma=self.config.gamma,
+                gae_lambda=self.config.gae_lambda,
+            )
 
         # Normalize advantages
         advantages = np.array(self.buffer.advantages)
@@ -221,15 +267,18 @@ class Trainer:
         }
 
         # Train for N epochs on batches
-        for epoch in range(self.config.num_epochs):
-            for batch in self.buffer.get_batch(self.config.batch_size):
-                self._train_batch(batch, advantages, metrics)
+        num_batches = self._num_batches()
+        with self.phase_timer.phase("ppo_update"):
+            for epoch in range(self.config.num_epochs):
+                for batch in islice(self.buffer.get_batch(self.config.batch_size), num_batches):
+                    self._train_batch(batch, advantages, metrics)
 
         # Normalize metrics
         for key in metrics:
-            metrics[key] /= (self.config.num_epochs * len(list(self.buffer.get_batch(self.config.batch_size))))
+            metrics[key] /= (self.config.num_epochs * num_batches)
 
         self.buffer.clear()
+        self.iteration += 1
         return metrics
 
     def _train_batch(self, batch: Dict, advantages: np.ndarray, metrics: Dict):
@@ -254,7 +303,7 @@ class Trainer:
         # Policy loss (PPO)
         ratio = torch.exp(log_probs - old_log_probs)
         surr1 = ratio * advantages_t
-        surr2 = torch.clamp(ratio, 1 - 0.2, 1 + 0.2) * advantages_t
+        surr2 = torch.clamp(ratio, 1 - self.config.clip_range, 1 + self.config.clip_range) * advantages_t
         policy_loss = -torch.min(surr1, surr2).mean()
 
         # Value loss
@@ -273,24 +322,164 @@ class Trainer:
         # Backprop
         self.optimizer.zero_grad()
         total_loss.backward()
-        nn.utils.clip_grad_norm_(self.model.parameters(), self.config.max_grad_norm)
-        self.optimizer.step()
+        self._apply_gradients()
 
         # Track metrics
         metrics["policy_loss"] += policy_loss.item()
         metrics["value_loss"] += value_loss.item()
         metrics["entropy"] += entropy.item()
 
-    def save_checkpoint(self, filepath: str, metadata: dict = None):
-        """Save model checkpoint"""
-        AgentCheckpoint.save(self.model, filepath, metadata)
-        logger.info(f"Model saved to {filepath}")
+    def _num_batches(self) -> int:
+        """Minibatches per PPO epoch"""
+        return math.ceil(len(self.buffer.observations) / self.config.batch_size)
+
+    def _apply_gradients(self):
+        """Clip and apply the gradients of one minibatch"""
+        nn.utils.clip_grad_norm_(self.model.parameters(), self.config.max_grad_norm)
+        self.optimizer.step()
+
+    def save_checkpoint(self, filepath: str, metadata: dict = None, rotate: bool = False):
+        """
+        Save model checkpoint.
+
+        With a checkpoint writer attached the write happens in the background;
+        `rotate=True` lets the writer prune it to its last-K window.
+        """
+        with self.phase_timer.phase("checkpoint"):
+            if self.checkpoint_writer is not None:
+                self.checkpoint_writer.write(
+                    AgentCheckpoint.build(self.model, metadata), filepath, rotate=rotate
+                )
+                logger.info(f"Model checkpoint queued for {filepath}")
+            else:
+                AgentCheckpoint.save(self.model, filepath, metadata)
+                logger.info(f"Model saved to {filepath}")
+
+    def publish_weights(self, checkpoint_path: str = None) -> Optional[int]:
+        """
+        Push the current policy to serving workers; returns its version (None
+        without a publisher). Pass `checkpoint_path` when the same weights were
+        just saved there, so workers switch back once that file is rewritten.
+        A background write to that path is waited for first, so the push
+        records the mtime of the file as written.
+        """
+        if self.weight_publisher is None:
+            return None
+        with self.phase_timer.phase("publish"):
+            if checkpoint_path is not None and self.checkpoint_writer is not None:
+                self.checkpoint_writer.wait(checkpoint_path)
+            return self.weight_publisher.publish(self.model, checkpoint_path=checkpoint_path)
+
+    def phase_timings(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        """Time spent per phase since the last reset (see `PhaseTimer.summary`)"""
+        summary = self.phase_timer.summary()
+        if reset:
+            self.phase_timer.reset()
+        return summary
+
+    @contextmanager
+    def profile(self, mode: str = "cprofile"):
+        """
+        Profile everything inside the block:
+
+            with trainer.profile() as report:
+                trainer.train_step()
+            print(report["text"])
+
+        `mode` is "cprofile" or "torch" (torch.profiler op table).
+        """
+        with get_profiler().capture(mode) as report:
+            yield report
+
+    def profiled_iteration(self):
+        """
+        Wrap one training iteration (rollouts + update) so it is captured
+        when "training" profiling has been armed (API or PROFILE_TRAINING),
+        either for every job or for this trainer's `job_id`.
+        """
+        return get_profiler().maybe_profile("training", key=self.job_id)
 
     def load_checkpoint(self, filepath: str):
         """Load model from checkpoint"""
         self.model = AgentCheckpoint.load(filepath, self.device)
         logger.info(f"Model loaded from {filepath}")
 
+    def update_best_reward(self, avg_reward: float) -> bool:
+        """Track the best average reward seen so far. Returns True on a new best."""
+        if avg_reward > self.best_reward:
+            self.best_reward = avg_reward
+            return True
+        return False
+
+    def get_training_state(self) -> Dict[str, Any]:
+        """
+        Capture everything needed to continue training exactly where it stopped:
+        model, optimizer, config, pending rollouts, counters and RNG states.
+        """
+        return {
+            "model_state_dict": self.model.state_dict(),
+            "model_config": {
+                "observation_size": self.model.observation_size,
+                "hidden_size": self.model.hidden_size,
+                "action_size": self.model.action_size,
+            },
+            "optimizer_state_dict": self.optimizer.state_dict(),
+            "training_config": asdict(self.config),
+            "buffer": self.buffer.state_dict(),
+            "iteration": self.iteration,
+            "best_reward": self.best_reward,
+            "rng_state": {
+                "python": random.getstate(),
+                "numpy": np.random.get_state(),
+                "torch": torch.get_rng_state(),
+                "torch_cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else [],
+            },
+        }
+
+    def save_training_state(self, filepath: str):
+        """Save a resumable training-state checkpoint"""
+        with self.phase_timer.phase("checkpoint"):
+            if self.checkpoint_writer is not None:
+                self.checkpoint_writer.write(
+                    AgentCheckpoint.build_training_state(self.get_training_state()),
+                    filepath,
+                    rotate=False,
+                )
+            else:
+                AgentCheckpoint.save_training_state(self.get_training_state(), filepath)
+        logger.info(f"Training state saved to {filepath} (iteration {self.iteration})")
+
+    def resume(self, filepath: str):
+        """
+        Resume training from a checkpoint written by `save_training_state`.
+
+        Restores model and optimizer state, config, counters, pending rollouts
+        and the Python/NumPy/torch RNG streams, so the run continues as if it
+        had never been interrupted.
+        """
+        state = AgentCheckpoint.load_training_state(filepath, self.device)
+
+        self.config = TrainingConfig(**state["training_config"])
+        self.model.load_state_dict(state["model_state_dict"])
+        self.model.to(self.device)
+        self.model.train()
+
+        self.optimizer = optim.Adam(self.model.parameters(), lr=self.config.learning_rate)
+        self.optimizer.load_state_dict(state["optimizer_state_dict"])
+
+        self.buffer.load_state_dict(state["buffer"])
+        self.iteration = state["iteration"]
+        self.best_reward = state["best_reward"]
+
+        rng_state = state["rng_state"]
+        random.setstate(rng_state["python"])
+        np.random.set_state(rng_state["numpy"])
+        torch.set_rng_state(rng_state["torch"].cpu())
+        if rng_state["torch_cuda"] and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all([s.cpu() for s in rng_state["torch_cuda"]])
+
+        logger.info(f"Training resumed from {filepath} at iteration {self.iteration}")
+
 
 def create_training_session(fighter_id: int, config: TrainingConfig = None) -> Trainer:
     """
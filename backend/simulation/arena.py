@@ -19,17 +19,31 @@ class FighterState:
     cumulative_reward: float = 0.0
 
 
+# Per-fighter layout of HeadlessArena.snapshot() buffers
+SNAPSHOT_FIELDS = (
+    "id", "is_agent", "pos_x", "pos_z", "vel_x", "vel_z",
+    "health", "alive", "reward", "cumulative_reward",
+)
+SNAPSHOT_HEADER = 2  # [step_count, num_fighters]
+
+
 class HeadlessArena:
     """
     Simplified arena simulation without graphics.
     Used for fast training of RL agents.
+
+    All randomness comes from the arena's own generator (`self.rng`), seeded
+    from `seed`, so a run is reproducible from its seed and action stream.
     """
 
-    def __init__(self, ring_size: float = 100.0, max_steps: int = 5000):
+    def __init__(self, ring_size: float = 100.0, max_steps: int = 5000, seed: Optional[int] = None):
         self.ring_size = ring_size
         self.max_steps = max_steps
         self.step_count = 0
 
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
         self.fighters: Dict[int, FighterState] = {}
         self.agent_ids = []  # IDs of agents being trained
 
@@ -37,7 +51,7 @@ class HeadlessArena:
         """Add a fighter to the arena"""
         self.fighters[fighter_id] = FighterState(
             id=fighter_id,
-            position=np.array([np.random.uniform(-20, 20), np.random.uniform(-20, 20)]),
+            position=self.rng.uniform(-20, 20, size=2),
             velocity=np.zeros(2),
         )
         if is_agent:
@@ -200,6 +214,35 @@ class HeadlessArena:
             "enemies": enemies,
         }
 
+    def get_observation(self, fighter_id: int) -> np.ndarray:
+        """
+        Get the 30-dim policy input for a fighter.
+
+        Same layout as `WrestlingArenaEnv._get_observation`: own position,
+        health, velocity, then the 5 nearest visible enemies as
+        [distance, rel_x, rel_z, health, threat_level].
+        """
+        obs = np.zeros(30, dtype=np.float32)
+        state = self.get_fighter_state(fighter_id)
+        if state is None:
+            return obs
+
+        half_size = self.ring_size / 2
+        obs[0:2] = state["position"] / half_size
+        obs[2] = state["health"] / 100.0
+        obs[3:5] = state["velocity"]
+
+        for i, enemy in enumerate(state["enemies"][:5]):
+            base_idx = 5 + (i * 5)
+            rel_pos = enemy["position"] - state["position"]
+            obs[base_idx + 0] = enemy["distance"] / half_size
+            obs[base_idx + 1] = rel_pos[0] / half_size
+            obs[base_idx + 2] = rel_pos[1] / half_size
+            obs[base_idx + 3] = enemy["health"] / 100.0
+            obs[base_idx + 4] = (1.0 / (1.0 + enemy["distance"] / 10.0) + enemy["health"] / 100.0) / 2.0
+
+        return obs
+
     def get_winners(self) -> List[int]:
         """Get list of surviving fighters (winners)"""
         return [f.id for f in self.fighters.values() if f.alive]
@@ -227,7 +270,61 @@ class HeadlessArena:
             },
         }
 
-    def reset(self):
-        """Reset arena for new episode"""
+    def snapshot(self) -> np.ndarray:
+        """
+        Capture the whole simulation state as one contiguous float64 buffer.
+
+        Layout: [step_count, num_fighters] followed by one row of
+        SNAPSHOT_FIELDS per fighter (in insertion order). The arena generator
+        is not included: it is only used when spawning fighters, so a restored
+        branch evolves purely from the actions it is given.
+        """
+        n = len(self.fighters)
+        width = len(SNAPSHOT_FIELDS)
+        buf = np.empty(SNAPSHOT_HEADER + n * width, dtype=np.float64)
+        buf[0] = self.step_count
+        buf[1] = n
+
+        rows = buf[SNAPSHOT_HEADER:].reshape(n, width)
+        agent_ids = set(self.agent_ids)
+        for row, f in zip(rows, self.fighters.values()):
+            row[0] = f.id
+            row[1] = f.id in agent_ids
+            row[2:4] = f.position
+            row[4:6] = f.velocity
+            row[6] = f.health
+            row[7] = f.alive
+            row[8] = f.reward
+            row[9] = f.cumulative_reward
+        return buf
+
+    def restore(self, snapshot: np.ndarray):
+        """Restore the state captured by `snapshot()` (the buffer is not modified)"""
+        width = len(SNAPSHOT_FIELDS)
+        self.step_count = int(snapshot[0])
+        n = int(snapshot[1])
+        rows = snapshot[SNAPSHOT_HEADER : SNAPSHOT_HEADER + n * width].reshape(n, width)
+
+        self.fighters = {}
+        self.agent_ids = []
+        for row in rows:
+            fighter_id = int(row[0])
+            self.fighters[fighter_id] = FighterState(
+                id=fighter_id,
+                position=row[2:4].copy(),
+                velocity=row[4:6].copy(),
+                health=float(row[6]),
+                alive=bool(row[7]),
+                reward=float(row[8]),
+                cumulative_reward=float(row[9]),
+            )
+            if row[1]:
+                self.agent_ids.append(fighter_id)
+
+    def reset(self, seed: Optional[int] = None):
+        """Reset arena for new episode (optionally reseeding its generator)"""
         self.fighters.clear()
         self.step_count = 0
+        if seed is not None:
+            self.seed = seed
+            self.rng = np.random.default_rng(seed)
@@ -0,0 +1,320 @@
+"""
+Batched headless arena.
+
+Runs many independent arenas with a fixed number of fighter slots as NumPy
+arrays, so one `step()` advances every fighter in every arena with a handful
+of vectorized operations. Mechanics follow `HeadlessArena` (movement, ring
+clamping, attack range/damage, knockouts, visibility) with two differences:
+- attacks resolve simultaneously within a tick instead of in dict order
+- every reward term (see `simulation.rewards.REWARD_TERMS`) is recorded
+  per slot in `reward_terms` and weighted by that slot's reward weights
+  (`ARENA_REWARD_WEIGHTS` unless set), then summed into the tick's reward
+  and accumulated into `cumulative_rewards`
+"""
+import numpy as np
+from typing import Dict, Any, Optional
+
+from simulation.arena import SNAPSHOT_FIELDS, SNAPSHOT_HEADER
+from simulation.rewards import ARENA_REWARD_WEIGHTS, TERM_INDEX, RewardEngine
+
+# Action index -> movement direction (0-7 compass, 8 idle, 9 attack)
+MOVEMENTS = np.array(
+    [
+        [0.0, 1.0],       # N
+        [0.707, 0.707],   # NE
+        [1.0, 0.0],       # E
+        [0.707, -0.707],  # SE
+        [0.0, -1.0],      # S
+        [-0.707, -0.707], # SW
+        [-1.0, 0.0],      # W
+        [-0.707, 0.707],  # NW
+        [0.0, 0.0],       # Idle
+        [0.0, 0.0],       # Attack
+    ],
+    dtype=np.float64,
+)
+ATTACK_ACTION = 9
+
+OBSERVATION_SIZE = 30
+MAX_OBSERVED_ENEMIES = 5
+
+
+class BatchedArena:
+    """
+    `num_arenas` arenas x `num_fighters` slots, stepped together.
+
+    State arrays (E = num_arenas, F = num_fighters):
+    - positions, velocities: (E, F, 2)
+    - health, rewards, cumulative_rewards: (E, F)
+    - alive: (E, F) bool
+    - step_count: (E,)
+    - reward_terms: (E, F, T) of the last tick; `reward_engine.weights` (E, F, T)
+    """
+
+    speed = 2.0
+    timestep = 0.1
+    edge_buffer = 5.0
+    attack_range = 10.0
+    attack_damage = 20.0
+    visibility_range = 50.0
+    spawn_range = 20.0
+
+    def __init__(
+        self,
+        num_arenas: int,
+        num_fighters: int = 8,
+        ring_size: float = 100.0,
+        max_steps: int = 5000,
+        seed: Optional[int] = None,
+        reward_weights: np.ndarray = ARENA_REWARD_WEIGHTS,
+    ):
+        self.num_arenas = num_arenas
+        self.num_fighters = num_fighters
+        self.ring_size = ring_size
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+
+        E, F = num_arenas, num_fighters
+        self.positions = np.zeros((E, F, 2))
+        self.velocities = np.zeros((E, F, 2))
+        self.health = np.zeros((E, F))
+        self.alive = np.zeros((E, F), dtype=bool)
+        self.rewards = np.zeros((E, F))
+        self.cumulative_rewards = np.zeros((E, F))
+        self.step_count = np.zeros(E, dtype=np.int64)
+        self.reward_engine = RewardEngine(E, F, reward_weights)
+        self.reward_terms = self.reward_engine.empty_terms()
+
+        self._not_self = ~np.eye(F, dtype=bool)
+        self.reset()
+
+    def reset(self, arena_ids: Optional[np.ndarray] = None):
+        """Reset all arenas, or only `arena_ids`, to a fresh episode"""
+        if arena_ids is None:
+            arena_ids = np.arange(self.num_arenas)
+        arena_ids = np.asarray(arena_ids)
+        n = len(arena_ids)
+        if n == 0:
+            return
+
+        self.positions[arena_ids] = self.rng.uniform(
+            -self.spawn_range, self.spawn_range, size=(n, self.num_fighters, 2)
+        )
+        self.velocities[arena_ids] = 0.0
+        self.health[arena_ids] = 100.0
+        self.alive[arena_ids] = True
+        self.rewards[arena_ids] = 0.0
+        self.cumulative_rewards[arena_ids] = 0.0
+        self.step_count[arena_ids] = 0
+
+    def step(self, actions: np.ndarray):
+        """
+        Advance every arena by one tick.
+
+        Args:
+            actions: int array of shape (E, F); entries for dead fighters are ignored
+        """
+        actions = np.asarray(actions)
+        acting = self.alive.copy()
+        self.step_count += 1
+
+        # Movement
+        moves = MOVEMENTS[actions]
+        self.velocities = np.where(acting[..., None], moves * self.speed, self.velocities)
+        self.positions += np.where(acting[..., None], self.velocities * self.timestep, 0.0)
+
+        half = self.ring_size / 2
+        limit = half - self.edge_buffer
+        np.clip(self.positions, -limit, limit, out=self.positions)
+
+        terms = self.reward_terms  # Every column is overwritten below
+        terms[..., TERM_INDEX["survival"]] = acting
+        terms[..., TERM_INDEX["movement"]] = acting & (actions < 8)
+        terms[..., TERM_INDEX["center_distance"]] = np.where(
+            acting, np.hypot(self.positions[..., 0], self.positions[..., 1]) / half, 0.0
+        )
+
+        # Inside the last 10 units of the ring
+        near_edge = (np.abs(self.positions) > half - 10).any(axis=-1)
+        terms[..., TERM_INDEX["near_edge"]] = acting & near_edge
+
+        # Attacks (simultaneous): attacker a hits defender d within range
+        attacking = acting & (actions == ATTACK_ACTION)
+        terms[..., TERM_INDEX["attack_attempts"]] = attacking
+        distances = self.pairwise_distances()
+        hits = (
+            attacking[:, :, None]
+            & self.alive[:, None, :]
+            & self._not_self
+            & (distances < self.attack_range)
+        )
+        hits_dealt = hits.sum(axis=2)
+        hurt = 1.0 - np.clip(self.health, 0.0, 100.0) / 100.0  # Before this tick's hits
+        terms[..., TERM_INDEX["finishing"]] = np.matmul(hits, hurt[..., None])[..., 0]
+        damage = self.attack_damage * hits.sum(axis=1)
+        self.health -= damage
+        terms[..., TERM_INDEX["damage_taken"]] = damage
+        terms[..., TERM_INDEX["hits"]] = hits_dealt
+
+        knocked_out = self.alive & (self.health <= 0)
+        terms[..., TERM_INDEX["knockouts"]] = (hits & knocked_out[:, None, :]).sum(axis=2)
+        terms[..., TERM_INDEX["knocked_out"]] = knocked_out
+        self.alive &= ~knocked_out
+
+        # Ring eliminations
+        out_of_ring = self.alive & (np.abs(self.positions) > half).any(axis=-1)
+        terms[..., TERM_INDEX["ring_out"]] = out_of_ring
+        self.alive &= ~out_of_ring
+
+        self.rewards = self.reward_engine.compute(terms)
+        self.cumulative_rewards += self.rewards
+
+    @property
+    def snapshot_size(self) -> int:
+        """Floats per arena in a snapshot: positions, velocities, health, alive, rewards, cumulative, step"""
+        return 8 * self.num_fighters + 1
+
+    def snapshot(self, arena_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Capture arena state as one contiguous float64 buffer of shape (n, snapshot_size).
+
+        Row layout: positions (2F), velocities (2F), health (F), alive (F),
+        rewards (F), cumulative_rewards (F), step_count (1).
+        """
+        if arena_ids is None:
+            arena_ids = np.arange(self.num_arenas)
+        arena_ids = np.asarray(arena_ids)
+        F = self.num_fighters
+        n = len(arena_ids)
+
+        buf = np.empty((n, self.snapshot_size), dtype=np.float64)
+        buf[:, 0 : 2 * F] = self.positions[arena_ids].reshape(n, 2 * F)
+        buf[:, 2 * F : 4 * F] = self.velocities[arena_ids].reshape(n, 2 * F)
+        buf[:, 4 * F : 5 * F] = self.health[arena_ids]
+        buf[:, 5 * F : 6 * F] = self.alive[arena_ids]
+        buf[:, 6 * F : 7 * F] = self.rewards[arena_ids]
+        buf[:, 7 * F : 8 * F] = self.cumulative_rewards[arena_ids]
+        buf[:, 8 * F] = self.step_count[arena_ids]
+        return buf
+
+    def restore(self, snapshot: np.ndarray, arena_ids: Optional[np.ndarray] = None):
+        """
+        Restore arenas from `snapshot()` rows.
+
+        A single row (shape (snapshot_size,) or (1, snapshot_size)) is
+        broadcast to every arena in `arena_ids`, which branches many
+        continuations from one mid-fight state.
+        """
+        if arena_ids is None:
+            arena_ids = np.arange(self.num_arenas)
+        arena_ids = np.asarray(arena_ids)
+        F = self.num_fighters
+        n = len(arena_ids)
+
+        rows = np.broadcast_to(np.atleast_2d(snapshot), (n, self.snapshot_size))
+        self.positions[arena_ids] = rows[:, 0 : 2 * F].reshape(n, F, 2)
+        self.velocities[arena_ids] = rows[:, 2 * F : 4 * F].reshape(n, F, 2)
+        self.health[arena_ids] = rows[:, 4 * F : 5 * F]
+        self.alive[arena_ids] = rows[:, 5 * F : 6 * F] != 0
+        self.rewards[arena_ids] = rows[:, 6 * F : 7 * F]
+        self.cumulative_rewards[arena_ids] = rows[:, 7 * F : 8 * F]
+        self.step_count[arena_ids] = rows[:, 8 * F]
+
+    def load_headless(self, snapshot: np.ndarray, arena_ids: Optional[np.ndarray] = None):
+        """
+        Start arenas from a `HeadlessArena.snapshot()` (e.g. a position taken
+        from a recorded replay). Fighters fill slots in snapshot order; unused
+        slots are dead.
+        """
+        n = int(snapshot[1])
+        if n > self.num_fighters:
+            raise ValueError(f"Snapshot has {n} fighters, arena has {self.num_fighters} slots")
+        width = len(SNAPSHOT_FIELDS)
+        fighters = snapshot[SNAPSHOT_HEADER : SNAPSHOT_HEADER + n * width].reshape(n, width)
+
+        F = self.num_fighters
+        row = np.zeros(self.snapshot_size)
+        positions = np.zeros((F, 2))
+        velocities = np.zeros((F, 2))
+        positions[:n] = fighters[:, 2:4]
+        velocities[:n] = fighters[:, 4:6]
+        row[0 : 2 * F] = positions.ravel()
+        row[2 * F : 4 * F] = velocities.ravel()
+        row[4 * F : 4 * F + n] = fighters[:, 6]
+        row[5 * F : 5 * F + n] = fighters[:, 7]
+        row[6 * F : 6 * F + n] = fighters[:, 8]
+        row[7 * F : 7 * F + n] = fighters[:, 9]
+        row[8 * F] = snapshot[0]
+        self.restore(row, arena_ids)
+
+    def pairwise_distances(self) -> np.ndarray:
+        """Distances between every pair of fighters in each arena, shape (E, F, F)"""
+        deltas = self.positions[:, None, :, :] - self.positions[:, :, None, :]
+        return np.sqrt((deltas ** 2).sum(axis=-1))
+
+    def get_observations(self) -> np.ndarray:
+        """
+        Observation vectors for every slot, shape (E, F, 30), float32.
+
+        Same layout as `WrestlingArenaEnv._get_observation`: own position,
+        health, velocity, then the 5 nearest visible living enemies as
+        [distance, rel_x, rel_z, health, threat_level].
+        """
+        E, F = self.num_arenas, self.num_fighters
+        half = self.ring_size / 2
+        obs = np.zeros((E, F, OBSERVATION_SIZE), dtype=np.float32)
+
+        obs[..., 0:2] = self.positions / half
+        obs[..., 2] = self.health / 100.0
+        obs[..., 3:5] = self.velocities
+
+        distances = self.pairwise_distances()
+        visible = self.alive[:, None, :] & self._not_self & (distances < self.visibility_range)
+        sort_keys = np.where(visible, distances, np.inf)
+
+        k = min(MAX_OBSERVED_ENEMIES, F - 1)
+        nearest = np.argsort(sort_keys, axis=-1, kind="stable")[..., :k]  # (E, F, k)
+        valid = np.take_along_axis(visible, nearest, axis=-1)
+
+        e_idx = np.arange(E)[:, None, None]
+        enemy_dist = np.take_along_axis(distances, nearest, axis=-1)
+        rel = self.positions[e_idx, nearest] - self.positions[:, :, None, :]
+        enemy_health = self.health[e_idx, nearest]
+        threat = (1.0 / (1.0 + enemy_dist / 10.0) + enemy_health / 100.0) / 2.0
+
+        enemy_obs = np.stack(
+            [
+                enemy_dist / half,
+                rel[..., 0] / half,
+                rel[..., 1] / half,
+                enemy_health / 100.0,
+                threat,
+            ],
+            axis=-1,
+        )
+        enemy_obs[~valid] = 0.0
+        obs[..., 5 : 5 + 5 * k] = enemy_obs.reshape(E, F, 5 * k)
+
+        return obs
+
+    def dones(self) -> np.ndarray:
+        """Per-arena episode termination, shape (E,)"""
+        return (self.alive.sum(axis=1) <= 1) | (self.step_count >= self.max_steps)
+
+    def get_episode_stats(self, arena_id: int) -> Dict[str, Any]:
+        """Stats for one arena, in the same shape as `HeadlessArena.get_episode_stats`"""
+        winners = np.flatnonzero(self.alive[arena_id]).tolist()
+        return {
+            "step_count": int(self.step_count[arena_id]),
+            "winners": winners,
+            "winner_count": len(winners),
+            "total_fighters": self.num_fighters,
+            "fighter_stats": {
+                slot: {
+                    "health": float(self.health[arena_id, slot]),
+                    "cumulative_reward": float(self.cumulative_rewards[arena_id, slot]),
+                    "alive": bool(self.alive[arena_id, slot]),
+                }
+                for slot in range(self.num_fighters)
+            },
+        }
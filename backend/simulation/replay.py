@@ -0,0 +1,131 @@
+"""
+Compact match replays.
+
+A replay is the arena seed plus the action stream: one uint8 per fighter per
+tick. Re-simulating it on a fresh `HeadlessArena` reproduces the match
+exactly, which makes regressions debuggable and lets evaluation results be
+cached per (seed, policies).
+"""
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from simulation.arena import HeadlessArena
+
+NO_ACTION = 255  # Fighter had no action this tick (dead or not controlled)
+
+
+def state_digest(arena: HeadlessArena) -> str:
+    """Hash of the full simulation state, for verifying a re-simulation"""
+    h = hashlib.sha1()
+    h.update(np.int64(arena.step_count).tobytes())
+    for fighter_id in sorted(arena.fighters):
+        f = arena.fighters[fighter_id]
+        h.update(np.int64(fighter_id).tobytes())
+        h.update(np.asarray(f.position, dtype=np.float64).tobytes())
+        h.update(np.asarray(f.velocity, dtype=np.float64).tobytes())
+        h.update(np.float64(f.health).tobytes())
+        h.update(np.bool_(f.alive).tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class MatchReplay:
+    """Seed + action stream for one HeadlessArena match"""
+    seed: int
+    ring_size: float
+    max_steps: int
+    fighter_ids: List[int]
+    agent_ids: List[int]
+    actions: np.ndarray  # (num_steps, num_fighters) uint8, columns in fighter_ids order
+    final_digest: str = ""
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def simulate(self, until_step: Optional[int] = None) -> HeadlessArena:
+        """
+        Re-run the match and return the arena in its final state, or after
+        `until_step` ticks (take `arena.snapshot()` there to branch from it).
+        """
+        arena = HeadlessArena(ring_size=self.ring_size, max_steps=self.max_steps, seed=self.seed)
+        for fighter_id in self.fighter_ids:
+            arena.add_fighter(fighter_id, is_agent=fighter_id in self.agent_ids)
+
+        for row in self.actions[:until_step]:
+            arena.step({
+                fighter_id: int(action)
+                for fighter_id, action in zip(self.fighter_ids, row)
+                if action != NO_ACTION
+            })
+        return arena
+
+    def verify(self) -> bool:
+        """True if re-simulation reproduces the recorded final state"""
+        return state_digest(self.simulate()) == self.final_digest
+
+    def save(self, filepath: str):
+        """Save as a compressed .npz (action stream + JSON header)"""
+        header = {
+            "seed": self.seed,
+            "ring_size": self.ring_size,
+            "max_steps": self.max_steps,
+            "fighter_ids": self.fighter_ids,
+            "agent_ids": self.agent_ids,
+            "final_digest": self.final_digest,
+            "metadata": self.metadata,
+        }
+        with open(filepath, "wb") as f:
+            np.savez_compressed(f, actions=self.actions, header=np.array(json.dumps(header)))
+
+    @classmethod
+    def load(cls, filepath: str) -> "MatchReplay":
+        with np.load(filepath) as data:
+            header = json.loads(str(data["header"]))
+            return cls(actions=data["actions"], **header)
+
+
+class ReplayRecorder:
+    """
+    Records a match as it is played.
+
+    Create it after all fighters have been added (their spawn positions come
+    from the arena generator in insertion order) and step the arena through
+    `recorder.step()`.
+    """
+
+    def __init__(self, arena: HeadlessArena):
+        if arena.seed is None:
+            raise ValueError("Replays need a seeded arena (HeadlessArena(seed=...))")
+        self.arena = arena
+        self.fighter_ids = list(arena.fighters.keys())
+        self._rows: List[np.ndarray] = []
+
+    def step(self, actions: Dict[int, int]):
+        """Step the arena and record the actions (applied in fighter_ids order)"""
+        row = np.full(len(self.fighter_ids), NO_ACTION, dtype=np.uint8)
+        ordered = {}
+        for col, fighter_id in enumerate(self.fighter_ids):
+            if fighter_id in actions:
+                ordered[fighter_id] = int(actions[fighter_id])
+                row[col] = ordered[fighter_id]
+        self.arena.step(ordered)
+        self._rows.append(row)
+
+    def finish(self, metadata: Optional[Dict[str, Any]] = None) -> MatchReplay:
+        actions = (
+            np.stack(self._rows)
+            if self._rows
+            else np.zeros((0, len(self.fighter_ids)), dtype=np.uint8)
+        )
+        return MatchReplay(
+            seed=self.arena.seed,
+            ring_size=self.arena.ring_size,
+            max_steps=self.arena.max_steps,
+            fighter_ids=self.fighter_ids,
+            agent_ids=list(self.arena.agent_ids),
+            actions=actions,
+            final_digest=state_digest(self.arena),
+            metadata=metadata or {},
+        )
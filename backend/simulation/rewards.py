@@ -0,0 +1,197 @@
+"""
+Vectorized reward shaping.
+
+A simulation step reports what happened to each fighter as a row of reward
+terms (survival, hits, knockouts, ...), shape (E, F, T) for E arenas x F
+fighter slots. The reward is the dot product of each row with that slot's
+weight vector. A personality is therefore just a weight vector, and one
+batched run can train fighters with different personalities side by side.
+
+Weight vectors come from:
+- `ARENA_REWARD_WEIGHTS` / `ENV_REWARD_WEIGHTS`: the fixed rewards
+  `BatchedArena` and `WrestlingArenaEnv` used before shaping
+- `personality_weights()`: the five 0-100 personality traits of a
+  `FighterProfile` / `TrainingJob` scale the terms. All traits at 50 give
+  the base weights. `reward_weights` overrides individual terms by name.
+"""
+import logging
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-fighter, per-tick quantities (counts or 0/1 flags unless noted)
+REWARD_TERMS = (
+    "survival",          # Alive and acting this tick
+    "near_edge",         # Within the edge margin of the ring
+    "attack_attempts",   # Chose the attack action
+    "hits",              # Attacks that landed
+    "knockouts",         # Defenders this fighter's hits finished
+    "finishing",         # Hits weighted by how hurt the defender already was (0-1 each)
+    "damage_taken",      # Health points lost
+    "knocked_out",       # Eliminated by hits
+    "ring_out",          # Eliminated by leaving the ring
+    "center_distance",   # Distance from the ring center / half ring size (0-1)
+    "movement",          # Moved (any compass action)
+)
+TERM_INDEX = {name: i for i, name in enumerate(REWARD_TERMS)}
+NUM_TERMS = len(REWARD_TERMS)
+
+PERSONALITY_TRAITS = ("aggression", "positioning", "targeting", "risk_tolerance", "endurance")
+
+
+def check_reward_weights(weights: Mapping[str, float]) -> Dict[str, float]:
+    """{term: weight} with every key a known term (ValueError otherwise), e.g. before storing it"""
+    unknown = [name for name in weights if name not in TERM_INDEX]
+    if unknown:
+        raise ValueError(f"Unknown reward terms {unknown}; expected any of {REWARD_TERMS}")
+    return {name: float(value) for name, value in weights.items()}
+
+
+def weights_from_dict(
+    weights: Mapping[str, float],
+    base: Optional[np.ndarray] = None,
+    strict: bool = True,
+) -> np.ndarray:
+    """
+    Weight vector from {term: weight}; unspecified terms keep `base` (or 0).
+    Unknown terms raise ValueError, or with `strict=False` are logged and
+    skipped (stored profile data shouldn't break env construction).
+    """
+    vector = np.zeros(NUM_TERMS) if base is None else np.array(base, dtype=np.float64)
+    for name, value in weights.items():
+        if name not in TERM_INDEX:
+            if strict:
+                raise ValueError(f"Unknown reward term {name!r}; expected one of {REWARD_TERMS}")
+            logger.warning(f"Ignoring unknown reward term {name!r}")
+            continue
+        vector[TERM_INDEX[name]] = float(value)
+    return vector
+
+
+def weights_to_dict(weights: np.ndarray) -> Dict[str, float]:
+    return {name: float(weights[i]) for i, name in enumerate(REWARD_TERMS)}
+
+
+# BatchedArena's original rewards
+ARENA_REWARD_WEIGHTS = weights_from_dict({
+    "survival": 0.5,
+    "near_edge": -1.0,
+    "hits": 2.0,
+    "knockouts": 10.0,
+    "ring_out": -10.0,
+})
+
+# WrestlingArenaEnv's original rewards
+ENV_REWARD_WEIGHTS = weights_from_dict({
+    "survival": 1.0,
+    "near_edge": -1.0,
+    "attack_attempts": 0.5,
+    "damage_taken": -1.0,
+    "knocked_out": -10.0,
+    "ring_out": -10.0,
+})
+
+
+def _trait(value: Optional[float]) -> float:
+    """0-100 trait -> [-1, 1] offset from neutral (None counts as neutral)"""
+    if value is None:
+        return 0.0
+    return float(np.clip((value - 50.0) / 50.0, -1.0, 1.0))
+
+
+def personality_weights(
+    aggression: float = 50.0,
+    positioning: float = 50.0,
+    targeting: float = 50.0,
+    risk_tolerance: float = 50.0,
+    endurance: float = 50.0,
+    reward_weights: Optional[Mapping[str, float]] = None,
+    base: np.ndarray = ARENA_REWARD_WEIGHTS,
+) -> np.ndarray:
+    """
+    Weight vector for a personality.
+
+    - aggression: more reward for hits and knockouts, a bonus (or, below 50,
+      a cost) per attack attempt, and less for passively surviving
+    - positioning: bigger edge penalty, and above 50 a pull toward the center
+    - targeting: above 50, a bonus for hits on already-hurt enemies
+    - risk_tolerance: smaller elimination penalties; below 50, a cost per
+      point of damage taken
+    - endurance: more survival reward; above 50, a cost per movement tick
+
+    `reward_weights` (e.g. `FighterProfile.reward_weights`) then sets
+    individual terms outright; unknown terms are logged and ignored.
+    """
+    a, p, g = _trait(aggression), _trait(positioning), _trait(targeting)
+    r, n = _trait(risk_tolerance), _trait(endurance)
+
+    w = np.array(base, dtype=np.float64)
+    i = TERM_INDEX
+    w[i["hits"]] *= 1.0 + 0.5 * a
+    w[i["knockouts"]] *= 1.0 + 0.5 * a
+    w[i["attack_attempts"]] += 0.25 * a
+    w[i["survival"]] *= (1.0 - 0.25 * a) * (1.0 + 0.5 * n)
+
+    w[i["near_edge"]] *= 1.0 + p
+    w[i["center_distance"]] -= 0.5 * max(p, 0.0)
+
+    w[i["finishing"]] += 2.0 * max(g, 0.0)
+
+    w[i["knocked_out"]] *= 1.0 - 0.5 * r
+    w[i["ring_out"]] *= 1.0 - 0.5 * r
+    w[i["damage_taken"]] = w[i["damage_taken"]] * (1.0 - 0.5 * r) - 0.05 * max(-r, 0.0)
+
+    w[i["movement"]] -= 0.1 * max(n, 0.0)
+
+    if reward_weights:
+        w = weights_from_dict(reward_weights, base=w, strict=False)
+    return w
+
+
+def profile_weights(profile: Any, base: np.ndarray = ARENA_REWARD_WEIGHTS) -> np.ndarray:
+    """
+    Weight vector for anything carrying personality traits: a FighterProfile
+    or TrainingJob row, a schema, or a plain dict
+    """
+    get = profile.get if isinstance(profile, Mapping) else lambda name: getattr(profile, name, None)
+    return personality_weights(
+        **{trait: get(trait) for trait in PERSONALITY_TRAITS},
+        reward_weights=get("reward_weights"),
+        base=base,
+    )
+
+
+class RewardEngine:
+    """
+    Per-slot reward weights for E arenas x F fighter slots.
+
+    `weights` broadcasts to (E, F, T): one vector for everybody, (F, T) per
+    slot, or (E, F, T) per arena and slot.
+    """
+
+    def __init__(self, num_arenas: int, num_fighters: int, weights: np.ndarray = ARENA_REWARD_WEIGHTS):
+        self.weights = np.empty((num_arenas, num_fighters, NUM_TERMS))
+        self.set_weights(weights)
+
+    def set_weights(self, weights: np.ndarray, arena_ids: Optional[np.ndarray] = None, slots: Optional[np.ndarray] = None):
+        """Assign weights to every slot, or to `slots` of `arena_ids`"""
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape[-1] != NUM_TERMS:
+            raise ValueError(f"Reward weights need {NUM_TERMS} terms, got shape {weights.shape}")
+        if arena_ids is None and slots is None:
+            self.weights[...] = weights
+        elif slots is None:
+            self.weights[np.asarray(arena_ids)] = weights
+        elif arena_ids is None:
+            self.weights[:, np.asarray(slots)] = weights
+        else:
+            self.weights[np.ix_(np.asarray(arena_ids), np.asarray(slots))] = weights
+
+    def empty_terms(self) -> np.ndarray:
+        return np.zeros(self.weights.shape)
+
+    def compute(self, terms: np.ndarray) -> np.ndarray:
+        """Rewards of shape (E, F) from terms of shape (E, F, T)"""
+        return np.einsum("eft,eft->ef", terms, self.weights)
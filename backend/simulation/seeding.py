@@ -0,0 +1,51 @@
+"""
+Deterministic seed trees.
+
+Every arena, env and worker gets its own `np.random.Generator` derived from a
+root seed and a path of keys, e.g. `SeedTree(42).derive("match", 17)`. The
+same path always yields the same stream and different paths yield
+independent streams (NumPy `SeedSequence` spawn keys), so parallel workers
+never share RNG state and any run can be reproduced from its root seed.
+"""
+import zlib
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+Key = Union[int, str]
+
+
+def _key_to_int(key: Key) -> int:
+    if isinstance(key, (int, np.integer)):
+        if key < 0:
+            raise ValueError(f"Seed tree keys must be non-negative, got {key}")
+        return int(key)
+    return zlib.crc32(str(key).encode("utf-8"))
+
+
+class SeedTree:
+    """A node in a tree of seeds: a root seed plus a path of keys"""
+
+    def __init__(self, seed: Optional[int] = None, path: Tuple[int, ...] = ()):
+        # With no seed, draw fresh entropy but remember it so the run can be replayed
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else int(seed)
+        self.path = tuple(path)
+
+    def derive(self, *keys: Key) -> "SeedTree":
+        """Child node for `keys` (ints or strings)"""
+        return SeedTree(self.seed, self.path + tuple(_key_to_int(k) for k in keys))
+
+    @property
+    def sequence(self) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.seed, spawn_key=self.path)
+
+    def generator(self) -> np.random.Generator:
+        """Fresh Generator for this node (same node -> same stream)"""
+        return np.random.default_rng(self.sequence)
+
+    def int_seed(self) -> int:
+        """63-bit integer seed for this node, for APIs that take plain ints"""
+        return int(self.sequence.generate_state(1, np.uint64)[0] >> np.uint64(1))
+
+    def __repr__(self):
+        return f"SeedTree(seed={self.seed}, path={self.path})"
@@ -0,0 +1,31 @@
+"""Two gloo ranks training on different data keep identical replicas"""
+import os
+
+import torch
+
+from rl.agent import FighterPolicyNetwork
+from rl.distributed import DistributedTrainer, launch
+from rl.environment import WrestlingArenaEnv
+from rl.training import TrainingConfig
+from simulation.seeding import SeedTree
+
+
+def _train(rank: int, world_size: int, output_dir: str):
+    torch.manual_seed(rank)  # Replicas start apart; DistributedTrainer syncs them from rank 0
+    trainer = DistributedTrainer(FighterPolicyNetwork(), TrainingConfig(batch_size=16, num_epochs=2))
+    env = WrestlingArenaEnv({"seed": SeedTree(0).derive("rank", rank).int_seed()})
+    for _ in range(2):
+        trainer.collect_trajectory(env, max_steps=30 + 10 * rank)  # Uneven shards
+        trainer.train_step()
+    torch.save(trainer.model.state_dict(), os.path.join(output_dir, f"rank_{rank}.pt"))
+
+
+def test_two_ranks_stay_in_sync(tmp_path):
+    launch(_train, 2, str(tmp_path))
+
+    torch.manual_seed(0)
+    start = FighterPolicyNetwork().state_dict()  # Rank 0's initial weights
+    replicas = [torch.load(tmp_path / f"rank_{rank}.pt") for rank in range(2)]
+    for name, tensor in replicas[0].items():
+        assert torch.equal(tensor, replicas[1][name]), name
+    assert any(not torch.equal(replicas[0][name], start[name]) for name in start)
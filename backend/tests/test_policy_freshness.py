@@ -0,0 +1,44 @@
+"""A checkpoint rewritten in place must be served as written, not from stale exports"""
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from inference.runtime import PolicyCache
+from rl.agent import AgentCheckpoint, FighterPolicyNetwork
+from rl.export import export_policy_artifacts
+
+
+def _save(path, seed):
+    torch.manual_seed(seed)
+    model = FighterPolicyNetwork()
+    AgentCheckpoint.save(model, str(path))
+    return model
+
+
+def _probs(model, observations):
+    with torch.no_grad():
+        logits, _ = model(torch.from_numpy(observations))
+    return torch.softmax(logits, dim=-1).numpy()
+
+
+@pytest.mark.parametrize("backend", ["auto", "numpy", "torchscript"])
+def test_overwritten_checkpoint_is_served(tmp_path, backend):
+    weights_path = tmp_path / "fighter_1_best.pth"
+    observations = np.random.default_rng(0).uniform(-1, 1, size=(8, 30)).astype(np.float32)
+
+    old_model = _save(weights_path, seed=1)
+    export_policy_artifacts(str(weights_path), formats=("torchscript", "numpy"))
+    cache = PolicyCache(backend=backend)
+    served, _ = cache.get(str(weights_path), quantized=False).evaluate_batch(observations)
+    np.testing.assert_allclose(served, _probs(old_model, observations), atol=1e-5)
+
+    # New best model written over the same path, artifacts not re-exported
+    new_model = _save(weights_path, seed=2)
+    later = max(os.path.getmtime(p) for p in tmp_path.iterdir()) + 1
+    os.utime(weights_path, (later, later))
+
+    served, _ = cache.get(str(weights_path), quantized=False).evaluate_batch(observations)
+    np.testing.assert_allclose(served, _probs(new_model, observations), atol=1e-5)
+    assert not np.allclose(served, _probs(old_model, observations), atol=1e-3)
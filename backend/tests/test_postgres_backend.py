@@ -0,0 +1,105 @@
+"""
+PostgresBackend against a real server: COPY ingestion, monthly partitions
+and the column upgrade. Skipped unless TEST_POSTGRES_URL points at a
+scratch database (it is wiped), e.g.
+
+    TEST_POSTGRES_URL=postgresql://arena@localhost/arena_test pytest tests
+"""
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import inspect, text
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+
+
+@pytest.fixture
+def manager():
+    pytest.importorskip("psycopg2")
+    from database.db import DatabaseManager
+
+    manager = DatabaseManager(POSTGRES_URL)
+    with manager.engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    manager.init_db()
+    yield manager
+    manager.close()
+
+
+def _partitions(manager):
+    with manager.engine.connect() as conn:
+        return set(conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'fight_frames'"
+        )).scalars())
+
+
+def test_copy_frames_into_monthly_partitions(manager):
+    from database.backends import partition_name
+    from database.models import Episode, Fighter, FightFrame
+
+    with manager.session_scope() as session:
+        fighter = Fighter(glb_filename="fighter.glb")
+        session.add(fighter)
+        session.flush()
+        episode = Episode(fighter_id=fighter.id, episode_number=1)
+        session.add(episode)
+        session.flush()
+        episode_id = episode.id
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "episode_id": episode_id, "frame_number": 6 * k + 1, "timestamp": now,
+            "fighter_position": [k, -k], "fighter_health": 100.0 - k, "action_vector": [1, 0, 0, -1],
+            "enemies_state": [{"pos": [0, 0], "health": 50.0, "distance": 3.5}], "reward_delta": None,
+        }
+        for k in range(50)
+    ]
+    with manager.session_scope() as session:
+        assert manager.bulk_insert_frames(session, rows) == 50
+
+    with manager.session_scope() as session:
+        frames = session.query(FightFrame).order_by(FightFrame.frame_number).all()
+        assert len(frames) == 50
+        assert frames[3].fighter_position == [3, -3]
+        assert frames[0].enemies_state[0]["distance"] == 3.5
+        assert frames[0].reward_delta is None
+    current = partition_name(now.date())
+    with manager.engine.connect() as conn:
+        assert conn.execute(text(f"SELECT count(*) FROM {current}")).scalar() == 50
+
+
+def test_partitions_created_ahead_and_old_empty_ones_dropped(manager):
+    from database.backends import partition_name
+
+    backend = manager.backend
+    assert partition_name(date.today().replace(day=1)) in _partitions(manager)
+
+    backend.ensure_partitions(manager.engine, start=date(2020, 1, 1), months_ahead=1)
+    dropped = backend.maintain_partitions(manager.engine, datetime(2030, 6, 15), drop_before=datetime(2020, 2, 10))
+    assert dropped == ["fight_frames_2020_01"]
+    partitions = _partitions(manager)
+    assert "fight_frames_2020_02" in partitions  # Not wholly before the cutoff
+    assert {"fight_frames_2030_06", "fight_frames_2030_09"} <= partitions
+
+
+def test_missing_columns_added(manager):
+    with manager.engine.begin() as conn:
+        conn.execute(text("ALTER TABLE episodes DROP COLUMN is_flagged, DROP COLUMN archive_path"))
+        conn.execute(text("ALTER TABLE training_jobs DROP COLUMN profile_report"))
+        conn.execute(text("ALTER TABLE model_checkpoints DROP COLUMN elo, DROP COLUMN matches_played"))
+
+    added = manager.backend.add_missing_columns(manager.engine)
+    assert sorted(added) == sorted([
+        "episodes.is_flagged", "episodes.archive_path", "training_jobs.profile_report",
+        "model_checkpoints.elo", "model_checkpoints.matches_played",
+    ])
+    columns = {c["name"]: c for c in inspect(manager.engine).get_columns("episodes")}
+    assert "is_flagged" in columns and "archive_path" in columns
+    assert manager.backend.add_missing_columns(manager.engine) == []
@@ -0,0 +1,27 @@
+"""Profiling armed for one training job only captures that job, and expires"""
+import time
+
+from utils.profiling import Profiler
+
+
+def test_job_arm_ignores_other_jobs():
+    profiler = Profiler()
+    reports = []
+    profiler.arm("training", 1, on_complete=reports.append, key=7)
+
+    for job_id in (8, None):
+        with profiler.maybe_profile("training", key=job_id):
+            pass
+    assert reports == [] and profiler.is_armed("training", key=7)
+
+    with profiler.maybe_profile("training", key=7):
+        pass
+    assert len(reports) == 1 and not profiler.is_armed("training", key=7)
+
+
+def test_job_arm_expires():
+    profiler = Profiler()
+    profiler.arm("training", 1, key=7, ttl=0.01)
+    time.sleep(0.02)
+    assert profiler.status()["armed"] == {}
+    assert not profiler.is_armed("training", key=7)
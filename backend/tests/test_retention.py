@@ -0,0 +1,37 @@
+"""Stride downsampling keeps ~1/stride of the frames clients actually send"""
+from datetime import datetime, timedelta
+
+from database.db import DatabaseManager
+from database.models import Episode, Fighter, FightFrame
+from database.retention import RetentionEngine, RetentionPolicy
+
+
+def test_stride_downsampling_on_sampled_frame_numbers(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'arena.db'}")
+    manager.init_db()
+    now = datetime.utcnow()
+    with manager.session_scope() as session:
+        fighter = Fighter(glb_filename="fighter.glb")
+        session.add(fighter)
+        session.flush()
+        episode = Episode(fighter_id=fighter.id, episode_number=1, started_at=now - timedelta(days=10))
+        session.add(episode)
+        session.flush()
+        episode_id = episode.id
+        # backend-integration.js posts every 6th game frame: 1, 7, 13, ...
+        session.add_all(
+            FightFrame(
+                episode_id=episode_id, frame_number=6 * k + 1, fighter_health=100.0,
+                action_vector=[0, 0, 0, -1], reward_delta=0.0,
+            )
+            for k in range(1000)
+        )
+
+    policy = RetentionPolicy(full_resolution_days=7, downsample="stride", stride=10, archive_days=0)
+    stats = RetentionEngine(manager, policy, archive_dir=str(tmp_path / "archive")).run_pass(now)
+
+    with manager.session_scope() as session:
+        kept = session.query(FightFrame).filter(FightFrame.episode_id == episode_id).count()
+    assert stats["downsampled_episodes"] == 1
+    assert 100 <= kept <= 102  # Every 10th row plus the first/last keyframes
+    manager.close()
@@ -0,0 +1,28 @@
+"""Stored reward_weights with unknown terms are rejected on write, ignored on load"""
+import logging
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from api.schemas import FighterProfileCreateSchema
+from simulation.rewards import ARENA_REWARD_WEIGHTS, TERM_INDEX, profile_weights, weights_from_dict
+
+
+def test_unknown_terms_ignored_when_loading_profiles(caplog):
+    profile = {"aggression": 50.0, "reward_weights": {"hits": 3.0, "hitz": 9.0}}
+    with caplog.at_level(logging.WARNING):
+        weights = profile_weights(profile)
+    assert weights[TERM_INDEX["hits"]] == 3.0
+    assert np.delete(weights, TERM_INDEX["hits"]).tolist() == np.delete(ARENA_REWARD_WEIGHTS, TERM_INDEX["hits"]).tolist()
+    assert "hitz" in caplog.text
+
+    with pytest.raises(ValueError):
+        weights_from_dict({"hitz": 1.0})
+
+
+def test_profile_schema_rejects_unknown_terms():
+    fields = {"fighter_id": 1, "profile_name": "brawler", "model_path": "m.pth"}
+    assert FighterProfileCreateSchema(**fields, reward_weights={"hits": 3}).reward_weights == {"hits": 3.0}
+    with pytest.raises(ValidationError):
+        FighterProfileCreateSchema(**fields, reward_weights={"hitz": 3})
@@ -0,0 +1,33 @@
+"""Databases created before a column was added get it on startup"""
+import sqlite3
+
+from database.db import DatabaseManager
+from database.models import Episode, TrainingJob
+
+
+def test_init_db_adds_missing_columns(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE episodes (id INTEGER PRIMARY KEY, fighter_id INTEGER NOT NULL, "
+        "episode_number INTEGER NOT NULL, started_at DATETIME)"
+    )
+    conn.execute("INSERT INTO episodes (fighter_id, episode_number) VALUES (1, 1)")
+    conn.commit()
+    conn.close()
+
+    manager = DatabaseManager(f"sqlite:///{path}")
+    manager.init_db()
+    session = manager.get_session()
+    try:
+        episode = session.query(Episode).one()
+        assert episode.is_flagged is False
+        assert episode.total_reward == 0.0
+        assert episode.archive_path is None
+        assert session.query(Episode).filter(Episode.is_flagged == False).count() == 1  # noqa: E712
+        assert session.query(TrainingJob).count() == 0
+    finally:
+        session.close()
+
+    assert manager.backend.add_missing_columns(manager.engine) == []
+    manager.close()
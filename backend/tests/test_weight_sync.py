@@ -0,0 +1,63 @@
+"""Pushed policies only win while newer than the checkpoint; watches are bounded"""
+import os
+import time
+
+from inference.weight_sync import WeightPublisher, WeightSubscriber
+from rl.agent import AgentCheckpoint, FighterPolicyNetwork
+
+
+def test_push_superseded_by_rewritten_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "fighter_1_best.pth")
+    AgentCheckpoint.save(FighterPolicyNetwork(), checkpoint)
+    publisher = WeightPublisher(1, transport="file", directory=str(tmp_path))
+    publisher.publish(FighterPolicyNetwork(), checkpoint_path=checkpoint)
+
+    published = WeightSubscriber(str(tmp_path), transport="file").get(1)
+    assert published.checkpoint_path == checkpoint
+    assert published.supersedes(checkpoint)
+    assert published.supersedes(None)
+
+    later = time.time() + 10
+    os.utime(checkpoint, (later, later))
+    assert not published.supersedes(checkpoint)
+
+    other = str(tmp_path / "fighter_1_epoch_4.pth")
+    AgentCheckpoint.save(FighterPolicyNetwork(), other)
+    os.utime(other, (published.published_at - 10,) * 2)
+    assert published.supersedes(other)
+
+
+def test_watches_are_capped(tmp_path):
+    subscriber = WeightSubscriber(str(tmp_path), transport="file", max_watches=2)
+    for fighter_id in (1, 2, 1, 3):
+        subscriber.get(fighter_id)
+    assert list(subscriber.status()["channels"]) == ["fighter_1_default", "fighter_3_default"]
+
+
+def test_publish_after_background_save_is_served(tmp_path, monkeypatch):
+    from rl import checkpointing
+    from rl.checkpointing import AsyncCheckpointWriter
+    from rl.training import Trainer
+
+    slow_save = checkpointing.atomic_save
+
+    def atomic_save(obj, filepath):
+        time.sleep(0.2)  # The write lands well after save_checkpoint returns
+        slow_save(obj, filepath)
+
+    monkeypatch.setattr(checkpointing, "atomic_save", atomic_save)
+    trainer = Trainer(
+        FighterPolicyNetwork(),
+        checkpoint_writer=AsyncCheckpointWriter(),
+        weight_publisher=WeightPublisher(1, transport="file", directory=str(tmp_path)),
+    )
+    checkpoint = str(tmp_path / "fighter_1_best.pth")
+    try:
+        trainer.save_checkpoint(checkpoint)
+        trainer.publish_weights(checkpoint)
+    finally:
+        trainer.checkpoint_writer.close()
+
+    published = WeightSubscriber(str(tmp_path), transport="file").get(1)
+    assert published.checkpoint_mtime == os.path.getmtime(checkpoint)
+    assert published.supersedes(checkpoint)
@@ -0,0 +1,344 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are plain Python objects guarded by one lock
+each, so recording a sample costs a dict lookup and a few additions; there is
+no background thread and no dependency on prometheus_client. `render()`
+produces the text format served at `/metrics`.
+
+Per-request database stats (query count and time) are accumulated in a
+`RequestStats` object held in a context variable: the HTTP middleware sets it,
+the SQLAlchemy engine hooks (`instrument_engine`) add to it. Starlette runs
+sync endpoints in a thread pool with a copy of the context, so queries made
+from those threads land in the right request.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds): sub-millisecond inference up to slow training calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Current value per label set"""
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution per label set (cumulative buckets on export)"""
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def get_count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*e[0]], e[1], e[2])) for key, e in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together, plus hooks run before each scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collect_hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.metric_type}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collect_hook(self, hook: Callable[[], None]):
+        """Run `hook` before every render (e.g. to refresh a gauge from the DB)"""
+        self._collect_hooks.append(hook)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        for hook in self._collect_hooks:
+            hook()
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP
+HTTP_REQUESTS = REGISTRY.counter(
+    "arena_http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "arena_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("arena_http_requests_in_flight", "HTTP requests being served")
+HTTP_REQUEST_BYTES = REGISTRY.histogram(
+    "arena_http_request_body_bytes", "Request body size on the wire (before decompression)",
+    ("method", "route"), buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    "arena_http_response_body_bytes", "Response body size on the wire (after compression)",
+    ("method", "route"), buckets=SIZE_BUCKETS,
+)
+HTTP_COMPRESSION_BYTES = REGISTRY.counter(
+    "arena_http_compression_bytes_total",
+    "Body bytes through content encoding; stage is identity (uncompressed) or encoded",
+    ("direction", "encoding", "stage"),
+)
+
+# Database (per request)
+DB_QUERIES = REGISTRY.histogram(
+    "arena_db_queries_per_request", "SQL statements executed per request",
+    ("route",), buckets=COUNT_BUCKETS,
+)
+DB_QUERY_TIME = REGISTRY.histogram(
+    "arena_db_query_seconds_per_request", "Time spent executing SQL per request",
+    ("route",),
+)
+DB_SESSION_TIME = REGISTRY.histogram(
+    "arena_db_session_seconds", "Lifetime of request-scoped DB sessions",
+    ("route",),
+)
+
+# Inference
+INFERENCE_CACHE = REGISTRY.counter(
+    "arena_inference_cache_requests_total", "Policy cache lookups by result (hit, miss, missing)",
+    ("result",),
+)
+INFERENCE_BATCH_SIZE = REGISTRY.histogram(
+    "arena_inference_batch_size", "Observations per policy evaluation",
+    ("backend",), buckets=BATCH_BUCKETS,
+)
+INFERENCE_LATENCY = REGISTRY.histogram(
+    "arena_inference_seconds", "Policy evaluation time (excluding HTTP and DB)",
+    ("backend",),
+)
+
+# Weight sync
+WEIGHT_SYNC_PUBLISHES = REGISTRY.counter(
+    "arena_weight_sync_publishes_total", "Policy versions published by this process", ("transport",),
+)
+WEIGHT_SYNC_SWAPS = REGISTRY.counter(
+    "arena_weight_sync_swaps_total", "Pushed policy versions swapped into serving", ("source",),
+)
+WEIGHT_SYNC_LAG = REGISTRY.histogram(
+    "arena_weight_sync_lag_seconds", "Time from publish to swap-in on this worker", ("source",),
+)
+
+# Training
+TRAINING_JOBS = REGISTRY.gauge(
+    "arena_training_jobs", "Training jobs by status (pending + in_progress = queue depth)",
+    ("status",),
+)
+
+
+class RequestStats:
+    """Database work attributed to one HTTP request"""
+    __slots__ = ("queries", "query_seconds", "session_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.session_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("arena_request_stats", default=None)
+
+
+def begin_request() -> Tuple[RequestStats, object]:
+    """Start collecting stats for the current request; returns (stats, token)"""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def end_request(token):
+    _request_stats.reset(token)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def instrument_engine(engine):
+    """Count and time SQL statements on `engine` into the current request's stats"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("arena_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["arena_query_start"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute
+        conn = context.connection
+        if conn is not None and conn.info.get("arena_query_start"):
+            conn.info["arena_query_start"].pop()
+
+
+def record_inference(backend: str, batch_size: int, seconds: float):
+    INFERENCE_BATCH_SIZE.observe(batch_size, backend=backend)
+    INFERENCE_LATENCY.observe(seconds, backend=backend)
@@ -0,0 +1,320 @@
+"""
+Opt-in profiling for training and inference.
+
+Two tools:
+- `PhaseTimer`: always-on wall-clock totals per named phase (rollout, GAE,
+  PPO update, checkpoint...). Costs two `perf_counter()` calls per phase.
+- `Profiler`: captures a cProfile (or torch.profiler) report for the next N
+  events of a target ("inference" requests or "training" iterations). Arm it
+  at runtime through the API or at startup with environment variables:
+
+      PROFILE_INFERENCE=50 PROFILE_TRAINING=3 PROFILE_MODE=cprofile python main.py
+
+Events are profiled one at a time; events that start while another event of
+the same target is being profiled run unprofiled and don't count toward N, so
+concurrent requests never share a profiler.
+
+An arm can be keyed (e.g. by training job id): it then only captures events
+that pass the same key, and it expires after `ttl` seconds if they never come.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config import PROFILE_INFERENCE, PROFILE_TRAINING, PROFILE_MODE
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TARGETS = ("inference", "training")
+PROFILE_MODES = ("cprofile", "torch")
+REPORT_TOP_N = 40  # Functions / ops listed per report
+MAX_STORED_REPORTS = 20
+
+
+class PhaseTimer:
+    """Accumulated wall time per phase"""
+
+    def __init__(self):
+        self._totals: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._totals[name] = self._totals.get(name, 0.0) + elapsed
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{phase: {total_s, count, mean_ms, share}} (share of all timed phases)"""
+        grand_total = sum(self._totals.values()) or 1.0
+        return {
+            name: {
+                "total_s": total,
+                "count": self._counts[name],
+                "mean_ms": total / self._counts[name] * 1000.0,
+                "share": total / grand_total,
+            }
+            for name, total in sorted(self._totals.items(), key=lambda kv: -kv[1])
+        }
+
+    def reset(self):
+        self._totals.clear()
+        self._counts.clear()
+
+
+class _CProfileCapture:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    @contextmanager
+    def capture(self):
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+    def report(self) -> Dict[str, Any]:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(REPORT_TOP_N)
+        return {"text": stream.getvalue(), "total_calls": stats.total_calls}
+
+
+class _TorchCapture:
+    """Aggregates torch.profiler op statistics over several events"""
+
+    def __init__(self):
+        self.ops: Dict[str, List[float]] = {}  # name -> [count, cpu_total_us, self_cpu_total_us]
+
+    @contextmanager
+    def capture(self):
+        import torch
+
+        with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU]) as prof:
+            yield
+        for event in prof.key_averages():
+            entry = self.ops.setdefault(event.key, [0, 0.0, 0.0])
+            entry[0] += event.count
+            entry[1] += event.cpu_time_total
+            entry[2] += event.self_cpu_time_total
+
+    def report(self) -> Dict[str, Any]:
+        rows = sorted(self.ops.items(), key=lambda kv: -kv[1][2])[:REPORT_TOP_N]
+        lines = [f"{'op':<48} {'calls':>8} {'self cpu ms':>12} {'cpu ms':>10}"]
+        for name, (count, cpu_total, self_cpu_total) in rows:
+            lines.append(f"{name[:48]:<48} {count:>8} {self_cpu_total / 1000:>12.3f} {cpu_total / 1000:>10.3f}")
+        return {"text": "\n".join(lines), "total_calls": sum(int(v[0]) for v in self.ops.values())}
+
+
+def _session_key(target: str, key: Any = None) -> str:
+    return target if key is None else f"{target}:{key}"
+
+
+class _Session:
+    def __init__(
+        self,
+        target: str,
+        count: int,
+        mode: str,
+        on_complete: Optional[Callable],
+        key: Any = None,
+        ttl: Optional[float] = None,
+    ):
+        self.target = target
+        self.key = key
+        self.expires_at = time.monotonic() + ttl if ttl is not None else None
+        self.count = count
+        self.mode = mode
+        self.on_complete = on_complete
+        self.captured = 0
+        self.seconds = 0.0
+        self.started_at = datetime.utcnow()
+        self.capture = _TorchCapture() if mode == "torch" else _CProfileCapture()
+        self.busy = False
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and not self.busy and time.monotonic() > self.expires_at
+
+
+class Profiler:
+    """Captures profiles for the next N events of a target"""
+
+    def __init__(self, max_reports: int = MAX_STORED_REPORTS):
+        self._sessions: Dict[str, _Session] = {}
+        self._reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self._next_report_id = 1
+        self._lock = threading.Lock()
+
+    def arm(
+        self,
+        target: str,
+        count: int,
+        mode: str = "cprofile",
+        on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+        key: Any = None,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Profile the next `count` events of `target`.
+
+        `on_complete(report)` is called from the thread that finishes the
+        last event (e.g. to store the report with a training job). With a
+        `key`, only events profiled with that key count; `ttl` drops the arm
+        after that many seconds if it hasn't completed.
+        """
+        if target not in PROFILE_TARGETS:
+            raise ValueError(f"Unknown profiling target {target!r}; expected one of {PROFILE_TARGETS}")
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected one of {PROFILE_MODES}")
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        name = _session_key(target, key)
+        with self._lock:
+            self._sessions[name] = _Session(target, count, mode, on_complete, key, ttl)
+        logger.info(f"Profiling armed: next {count} {name} events ({mode})")
+
+    def cancel(self, target: str, key: Any = None):
+        with self._lock:
+            self._sessions.pop(_session_key(target, key), None)
+
+    def is_armed(self, target: str, key: Any = None) -> bool:
+        return self._lookup(_session_key(target, key)) is not None
+
+    def _lookup(self, name: str) -> Optional[_Session]:
+        session = self._sessions.get(name)
+        if session is not None and session.expired:
+            with self._lock:
+                if self._sessions.get(name) is session:
+                    del self._sessions[name]
+            logger.info(f"Profiling arm for {name} expired after {session.captured}/{session.count} events")
+            return None
+        return session
+
+    @contextmanager
+    def maybe_profile(self, target: str, key: Any = None):
+        """
+        Profile the enclosed event if `target` is armed for `key` or for
+        any event of the target (no-op otherwise)
+        """
+        name = _session_key(target, key)
+        session = self._lookup(name) if key is not None else None
+        if session is None:
+            name = target
+            session = self._lookup(name)
+        if session is None:
+            yield
+            return
+
+        with self._lock:
+            if session.busy or self._sessions.get(name) is not session:
+                session = None
+            else:
+                session.busy = True
+        if session is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            with session.capture.capture():
+                yield
+        finally:
+            session.seconds += time.perf_counter() - start
+            session.captured += 1
+            finished = session.captured >= session.count
+            with self._lock:
+                session.busy = False
+                if finished and self._sessions.get(name) is session:
+                    del self._sessions[name]
+            if finished:
+                self._finish(session)
+
+    def _finish(self, session: _Session):
+        report = {
+            "target": session.target,
+            "mode": session.mode,
+            "events": session.captured,
+            "profiled_seconds": session.seconds,
+            "started_at": session.started_at.isoformat(),
+            "completed_at": datetime.utcnow().isoformat(),
+            **session.capture.report(),
+        }
+        with self._lock:
+            report["id"] = self._next_report_id
+            self._next_report_id += 1
+            self._reports.append(report)
+        logger.info(f"Profile {report['id']} captured ({session.captured} {session.target} events)")
+
+        if session.on_complete is not None:
+            try:
+                session.on_complete(report)
+            except Exception as e:
+                logger.warning(f"Profile completion callback failed: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        for name in list(self._sessions):
+            self._lookup(name)
+        with self._lock:
+            return {
+                "armed": {
+                    name: {"remaining": s.count - s.captured, "mode": s.mode}
+                    for name, s in self._sessions.items()
+                },
+                "reports": [
+                    {k: r[k] for k in ("id", "target", "mode", "events", "profiled_seconds", "completed_at")}
+                    for r in self._reports
+                ],
+            }
+
+    def get_report(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for report in self._reports:
+                if report["id"] == report_id:
+                    return report
+        return None
+
+    @contextmanager
+    def capture(self, mode: str = "cprofile"):
+        """
+        Profile an arbitrary block now (independent of armed targets).
+
+        Yields a dict that is filled with the report when the block exits.
+        """
+        capture = _TorchCapture() if mode == "torch" else _CProfileCapture()
+        result: Dict[str, Any] = {}
+        start = time.perf_counter()
+        try:
+            with capture.capture():
+                yield result
+        finally:
+            result.update(capture.report())
+            result["mode"] = mode
+            result["profiled_seconds"] = time.perf_counter() - start
+
+
+# Global profiler instance
+_profiler = None
+
+
+def get_profiler() -> Profiler:
+    """Get or create the global profiler (armed from PROFILE_* env vars on creation)"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+        for target, count in (("inference", PROFILE_INFERENCE), ("training", PROFILE_TRAINING)):
+            if count > 0:
+                _profiler.arm(target, count, PROFILE_MODE)
+    return _profiler